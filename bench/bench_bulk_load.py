@@ -0,0 +1,83 @@
+"""
+Full telemetry load into SQLite: the original DataFrame.to_sql(replace) path
+(which drops the declared keys), to_sql appending into the declared table,
+etl.bulk_load into the declared table, and (when the sqlite3 shell is on PATH)
+writing a CSV and running the shell's .import into the declared table;
+indexes are rebuilt at the end.
+
+    python bench/bench_bulk_load.py --equipment 40 --days 90
+"""
+from __future__ import annotations
+import argparse, shutil, sqlite3, subprocess, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from src import etl
+from src.generate_data import iter_telemetry
+from src.timekeys import add_time_keys
+
+def telemetry(n_equipment: int, days: int):
+    tele = next(iter_telemetry(n_equipment, days))
+    tele["timestamp"] = tele["timestamp"].astype(str)
+    tele["equipment_id"] = tele["equipment_id"].astype(str)
+    tele["area"] = tele["area"].astype(str)
+    return add_time_keys(tele)
+
+def timed(db: Path, load) -> tuple[float, float]:
+    """(insert, insert + index rebuild and rollups) seconds."""
+    db.unlink(missing_ok=True)
+    with sqlite3.connect(db) as con:
+        etl.apply_schema(con)
+        t = time.perf_counter()
+        load(con)
+        con.commit()
+        insert = time.perf_counter() - t
+        etl.apply_schema(con)
+        con.commit()
+        return insert, time.perf_counter() - t
+
+def legacy(con: sqlite3.Connection, tele) -> None:
+    tele.to_sql("fact_telemetry", con, if_exists="replace", index=False)
+
+def declared(con: sqlite3.Connection, tele) -> None:
+    tele.to_sql("fact_telemetry", con, if_exists="append", index=False)
+
+def bulk(con: sqlite3.Connection, tele) -> None:
+    for pragma in etl.LOAD_PRAGMAS:
+        con.execute(pragma)
+    etl.bulk_load(con, "fact_telemetry", tele)
+
+def csv_import(con: sqlite3.Connection, db: Path, tele) -> None:
+    # the shell's C importer; Python's sqlite3 here cannot load the csv virtual table
+    con.commit()
+    cols = [r[1] for r in con.execute("PRAGMA table_info(fact_telemetry)")]
+    csv = db.with_suffix(".csv")
+    tele.assign(load_ts=time.strftime("%Y-%m-%d %H:%M:%S"))[cols].to_csv(csv, index=False, header=False)
+    subprocess.run(["sqlite3", str(db), "-cmd", "PRAGMA synchronous = OFF", "-cmd", "PRAGMA cache_size = -262144",
+                    f".import --csv {csv} fact_telemetry"], check=True)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--equipment", type=int, default=40)
+    ap.add_argument("--days", type=int, default=90)
+    args = ap.parse_args()
+
+    tele = telemetry(args.equipment, args.days)
+    print(f"{len(tele)} rows, {args.equipment} equipment, {args.days} days")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "bench.db"
+        runs = {
+            "to_sql replace": timed(db, lambda con: legacy(con, tele)),
+            "to_sql append": timed(db, lambda con: declared(con, tele)),
+            "bulk_load": timed(db, lambda con: bulk(con, tele)),
+        }
+        if shutil.which("sqlite3"):
+            runs["csv .import"] = timed(db, lambda con: csv_import(con, db, tele))
+    new = runs["bulk_load"]
+    for label, (insert, total) in runs.items():
+        print(f"{label:<15} insert {insert:6.2f} s ({len(tele) / insert:>9,.0f} rows/s) x{insert / new[0]:.1f}"
+              f"   end to end {total:6.2f} s x{total / new[1]:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Day-query latency vs. history length: the old `date(substr(timestamp,1,10))`
+filter against the indexed `day` / `ts` keys.
+
+    python bench/bench_day_query.py --equipment 20 --days 1 30 180 365
+"""
+from __future__ import annotations
+import argparse, sqlite3, sys, tempfile, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from src import etl
+from src.timekeys import add_time_keys, day_bounds
+
+QUERIES = {
+    "kpi_old": """SELECT equipment_id, SUM(throughput_tph), SUM(power_kw), SUM(status=1), COUNT(*)
+                  FROM fact_telemetry WHERE date(substr(timestamp,1,10)) = date(:d) GROUP BY equipment_id""",
+    "kpi_new": """SELECT equipment_id, SUM(throughput_tph), SUM(power_kw), SUM(status=1), COUNT(*)
+                  FROM fact_telemetry WHERE day = :d GROUP BY equipment_id""",
+    "series_old": """SELECT timestamp, throughput_tph, power_kw, status FROM fact_telemetry
+                     WHERE date(substr(timestamp,1,10)) = date(:d) AND equipment_id = :eid ORDER BY timestamp""",
+    "series_new": """SELECT timestamp, throughput_tph, power_kw, status FROM fact_telemetry
+                     WHERE equipment_id = :eid AND ts >= :t0 AND ts < :t1 ORDER BY ts""",
+}
+
+def telemetry(n_equipment: int, start: pd.Timestamp, days: int) -> pd.DataFrame:
+    times = pd.date_range(start, periods=days * 288, freq="5min")
+    n = len(times) * n_equipment
+    df = pd.DataFrame({
+        "timestamp": np.tile(times, n_equipment),
+        "equipment_id": np.repeat([f"EQ-{i:03d}" for i in range(n_equipment)], len(times)),
+        "area": "Crusher",
+        "throughput_tph": np.random.normal(350, 15, n).round(3),
+        "power_kw": np.random.normal(1500, 20, n).round(3),
+        "temperature_c": 40.0,
+        "pressure_kpa": 200.0,
+        "status": 1,
+    })
+    add_time_keys(df)
+    df["timestamp"] = df["timestamp"].astype(str)
+    return df
+
+def timeit(con: sqlite3.Connection, sql: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        con.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--equipment", type=int, default=20)
+    ap.add_argument("--days", type=int, nargs="+", default=[1, 30, 90, 180])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    end = pd.Timestamp("2025-08-01")
+    print(f"{'days':>6} {'rows':>10} " + " ".join(f"{k + ' ms':>14}" for k in QUERIES))
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "bench.db"
+        with sqlite3.connect(db) as con:
+            etl.apply_schema(con)
+            loaded = 0
+            for days in sorted(args.days):
+                # grow history backwards so the queried day stays the same
+                extra = telemetry(args.equipment, end - pd.Timedelta(days=days - 1), days - loaded)
+                extra.to_sql("fact_telemetry", con, if_exists="append", index=False)
+                con.commit()
+                loaded = days
+                t0, t1 = day_bounds("2025-08-01")
+                params = {"d": "2025-08-01", "eid": "EQ-000", "t0": t0, "t1": t1}
+                rows = con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0]
+                ms = [timeit(con, sql, params, args.repeat) for sql in QUERIES.values()]
+                print(f"{days:>6} {rows:>10} " + " ".join(f"{m:>14.2f}" for m in ms))
+
+if __name__ == "__main__":
+    main()
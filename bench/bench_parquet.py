@@ -0,0 +1,66 @@
+"""
+Scan time and on-disk size: fact_telemetry in SQLite vs. the partitioned
+Parquet dataset, reading only the columns analytics needs.
+
+    python bench/bench_parquet.py --equipment 50 --days 30
+"""
+from __future__ import annotations
+import argparse, sqlite3, sys, tempfile, time
+from pathlib import Path
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from src import etl, parquet_store
+from bench.bench_day_query import telemetry
+
+COLUMNS = ["equipment_id", "ts", "throughput_tph", "power_kw", "status"]
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+def size_mb(path: Path) -> float:
+    files = [path] if path.is_file() else list(path.rglob("*"))
+    return sum(f.stat().st_size for f in files if f.is_file()) / 2**20
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--equipment", type=int, default=50)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    start = pd.Timestamp("2025-08-01")
+    first, last = start.strftime("%Y-%m-%d"), (start + pd.Timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+    df = telemetry(args.equipment, start, args.days)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db, pq = Path(tmp) / "bench.db", Path(tmp) / "parquet"
+        with sqlite3.connect(db) as con:
+            etl.apply_schema(con)
+            df.to_sql("fact_telemetry", con, if_exists="append", index=False)
+            con.commit()
+            con.execute("VACUUM")
+        parquet_store.write(df, "replace", root=pq)
+        print(f"{len(df)} rows   sqlite {size_mb(db):8.1f} MB   parquet {size_mb(pq):8.1f} MB")
+
+        cols = ", ".join(COLUMNS)
+        cases = {
+            "full history": (f"SELECT {cols} FROM fact_telemetry", {}, (first, last, None)),
+            "one day": (f"SELECT {cols} FROM fact_telemetry WHERE day = :d", {"d": last}, (last, last, None)),
+            "one day, one asset": (f"SELECT {cols} FROM fact_telemetry WHERE day = :d AND equipment_id = :e",
+                                   {"d": last, "e": "EQ-000"}, (last, last, ["EQ-000"])),
+        }
+        with sqlite3.connect(db) as con:
+            for name, (sql, params, (a, b, ids)) in cases.items():
+                s = best_of(lambda: pd.read_sql_query(sql, con, params=params), args.repeat)
+                p = best_of(lambda: parquet_store.read(COLUMNS, a, b, ids, root=pq), args.repeat)
+                print(f"{name:<20} sqlite {s:9.1f} ms   parquet {p:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ CREATE TABLE IF NOT EXISTS dim_equipment
 (
     equipment_id TEXT PRIMARY KEY,
     area TEXT NOT NULL,
-    commissioned_data TEXT,
+    commissioned_date TEXT,
     nameplate_tph INTEGER
 );
 
@@ -14,11 +14,13 @@ CREATE TABLE IF NOT EXISTS fact_telemetry
     equipment_id TEXT NOT NULL,
     area TEXT NOT NULL,
     throughput_tph REAL,
-    power_kew REAL,
+    power_kw REAL,
     temperature_c REAL,
     pressure_kpa REAL,
     status INTEGER,
-    load_test TEXt DEFAULT (datetime('now')),
+    ts INTEGER,
+    day TEXT,
+    load_ts TEXT DEFAULT (datetime('now')),
     PRIMARY KEY (timestamp, equipment_id),
     FOREIGN KEY (equipment_id) REFERENCES dim_equipment(equipment_id)
 );
@@ -29,8 +31,11 @@ CREATE TABLE IF NOT EXISTS fact_downtime
     equipment_id TEXT NOT NULL,
     start_ts TEXT NOT NULL,
     end_ts TEXT NOT NULL,
-    duration_mind REAL,
+    duration_min REAL,
     reason TEXT,
+    start_epoch INTEGER,
+    end_epoch INTEGER,
+    day TEXT,
     load_ts TEXT DEFAULT (datetime('now')),
     FOREIGN KEY (equipment_id) REFERENCES dim_equipment(equipment_id)
 );
@@ -69,4 +74,162 @@ CREATE TABLE IF NOT EXISTS data_quality
     check_result TEXT,
     severity TEXT,
     created_ts TEXT DEFAULT (datetime('now'))
-);
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS etl_watermark
+(
+    table_name TEXT NOT NULL,
+    equipment_id TEXT NOT NULL,
+    high_water_ts TEXT NOT NULL,
+    updated_ts TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY (table_name, equipment_id)
+);
+
+-- telemetry files already ingested (see src/ingest.py), keyed by content
+CREATE TABLE IF NOT EXISTS etl_ingested_file
+(
+    checksum TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    rows INTEGER,
+    ingested_ts TEXT DEFAULT (datetime('now'))
+);
+
+-- scheduled ETL runs and their tasks (see src/scheduler.py); a run that did
+-- not finish is resumed by the next load with the same key
+CREATE TABLE IF NOT EXISTS etl_run
+(
+    run_id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_ts TEXT NOT NULL,
+    finished_ts TEXT
+);
+
+CREATE TABLE IF NOT EXISTS etl_task
+(
+    run_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    finished_ts TEXT,
+    PRIMARY KEY (run_id, task)
+);
+
+-- days a chunked telemetry load already committed whose rollups are not
+-- refreshed yet; a load that failed part-way picks them up when it resumes
+CREATE TABLE IF NOT EXISTS etl_pending_day
+(
+    table_name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (table_name, day)
+);
+
+-- bumped by every ETL load; readers key their caches on it (see src/query_cache.py)
+CREATE TABLE IF NOT EXISTS etl_version
+(
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated_ts TEXT DEFAULT (datetime('now'))
+);
+
+-- streaming z-score detector (see src/anomaly.py): running EWMA state per
+-- equipment and measure, and the samples it flagged
+CREATE TABLE IF NOT EXISTS anomaly_state
+(
+    equipment_id TEXT NOT NULL,
+    measure TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    var REAL NOT NULL,
+    last_ts INTEGER NOT NULL,
+    PRIMARY KEY (equipment_id, measure)
+);
+
+CREATE TABLE IF NOT EXISTS fact_anomaly
+(
+    equipment_id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    measure TEXT NOT NULL,
+    timestamp TEXT,
+    day TEXT,
+    value REAL,
+    mean REAL,
+    std REAL,
+    zscore REAL,
+    detected_ts TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY (equipment_id, ts, measure)
+);
+
+-- per-equipment rollups maintained by the ETL (additive sums only)
+CREATE TABLE IF NOT EXISTS agg_hourly
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour_ts INTEGER NOT NULL,
+    intervals INTEGER,
+    run_intervals INTEGER,
+    tonnage_t REAL,
+    energy_kwh REAL,
+    throughput_sum REAL,
+    PRIMARY KEY (equipment_id, hour_ts)
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    intervals INTEGER,
+    run_intervals INTEGER,
+    tonnage_t REAL,
+    energy_kwh REAL,
+    throughput_sum REAL,
+    PRIMARY KEY (day, equipment_id)
+);
+
+-- agg_hourly priced and weighted by hardness (see src/costs.py); additive sums
+-- only, bwi_tonnage = tonnage_t * bond_work_index_kwhpt
+CREATE TABLE IF NOT EXISTS agg_cost_hourly
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour_ts INTEGER NOT NULL,
+    intervals INTEGER,
+    tonnage_t REAL,
+    energy_kwh REAL,
+    usd_per_mwh REAL,
+    energy_cost_usd REAL,
+    bond_work_index_kwhpt REAL,
+    bwi_tonnage REAL,
+    PRIMARY KEY (equipment_id, hour_ts)
+);
+
+CREATE TABLE IF NOT EXISTS agg_cost_daily
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    intervals INTEGER,
+    tonnage_t REAL,
+    energy_kwh REAL,
+    energy_cost_usd REAL,
+    bwi_tonnage REAL,
+    PRIMARY KEY (day, equipment_id)
+);
+
+-- covering indexes for per-equipment time ranges and per-day rollups
+CREATE INDEX IF NOT EXISTS ix_telemetry_equipment_ts
+    ON fact_telemetry (equipment_id, ts, timestamp, throughput_tph, power_kw, status);
+CREATE INDEX IF NOT EXISTS ix_telemetry_day_equipment
+    ON fact_telemetry (day, equipment_id, status, throughput_tph, power_kw, ts);
+CREATE INDEX IF NOT EXISTS ix_downtime_day_equipment
+    ON fact_downtime (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_downtime_span
+    ON fact_downtime (end_epoch, start_epoch);
+CREATE INDEX IF NOT EXISTS ix_agg_hourly_day
+    ON agg_hourly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_agg_cost_hourly_day
+    ON agg_cost_hourly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_anomaly_day
+    ON fact_anomaly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_etl_run_key
+    ON etl_run (key, started_ts);
@@ -0,0 +1,238 @@
+-- Postgres version of schema.sql (RT_DB_URL=postgresql://..., see src/postgres.py).
+-- Same tables and columns; DOUBLE PRECISION for REAL, BIGINT for epoch
+-- seconds, and foreign keys are left to the DQ checks as in SQLite, which
+-- does not enforce them either.
+
+CREATE TABLE IF NOT EXISTS dim_equipment
+(
+    equipment_id TEXT PRIMARY KEY,
+    area TEXT NOT NULL,
+    commissioned_date TEXT,
+    nameplate_tph INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS fact_telemetry
+(
+    timestamp TEXT NOT NULL,
+    equipment_id TEXT NOT NULL,
+    area TEXT NOT NULL,
+    throughput_tph DOUBLE PRECISION,
+    power_kw DOUBLE PRECISION,
+    temperature_c DOUBLE PRECISION,
+    pressure_kpa DOUBLE PRECISION,
+    status INTEGER,
+    ts BIGINT,
+    day TEXT,
+    load_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS')),
+    -- a partitioned table's key must hold the partition column; ts follows from
+    -- timestamp, so this is unique exactly where (timestamp, equipment_id) is
+    PRIMARY KEY (timestamp, equipment_id, ts)
+) PARTITION BY RANGE (ts);
+
+-- monthly partitions (fact_telemetry_YYYY_MM) are added by src/postgres.py
+-- before each write
+
+CREATE TABLE IF NOT EXISTS fact_downtime 
+(
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    equipment_id TEXT NOT NULL,
+    start_ts TEXT NOT NULL,
+    end_ts TEXT NOT NULL,
+    duration_min DOUBLE PRECISION,
+    reason TEXT,
+    start_epoch BIGINT,
+    end_epoch BIGINT,
+    day TEXT,
+    load_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS'))
+);
+
+
+CREATE TABLE IF NOT EXISTS fact_lab_assays 
+(
+    date TEXT PRIMARY KEY,
+    ore_grade_pct DOUBLE PRECISION,
+    moisture_pct DOUBLE PRECISION,
+    bond_work_index_kwhpt DOUBLE PRECISION
+);
+
+
+CREATE TABLE IF NOT EXISTS fact_power_price
+(
+    date TEXT PRIMARY KEY,
+    usd_per_mwh DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS benchmarks
+(
+    equipment_id TEXT PRIMARY KEY,
+    target_utilization_pct DOUBLE PRECISION,
+    max_specific_energy_kwhpt DOUBLE PRECISION,
+    min_throughput_tph DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS data_quality 
+(
+    dq_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    table_name TEXT,
+    record_key TEXT,
+    check_name TEXT,
+    check_result TEXT,
+    severity TEXT,
+    created_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS'))
+);
+
+CREATE TABLE IF NOT EXISTS etl_watermark
+(
+    table_name TEXT NOT NULL,
+    equipment_id TEXT NOT NULL,
+    high_water_ts TEXT NOT NULL,
+    updated_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS')),
+    PRIMARY KEY (table_name, equipment_id)
+);
+
+-- telemetry files already ingested (see src/ingest.py), keyed by content
+CREATE TABLE IF NOT EXISTS etl_ingested_file
+(
+    checksum TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    rows INTEGER,
+    ingested_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS'))
+);
+
+-- scheduled ETL runs and their tasks (see src/scheduler.py); a run that did
+-- not finish is resumed by the next load with the same key
+CREATE TABLE IF NOT EXISTS etl_run
+(
+    run_id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_ts TEXT NOT NULL,
+    finished_ts TEXT
+);
+
+CREATE TABLE IF NOT EXISTS etl_task
+(
+    run_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    finished_ts TEXT,
+    PRIMARY KEY (run_id, task)
+);
+
+CREATE TABLE IF NOT EXISTS etl_pending_day
+(
+    table_name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (table_name, day)
+);
+
+-- bumped by every ETL load; readers key their caches on it (see src/query_cache.py)
+CREATE TABLE IF NOT EXISTS etl_version
+(
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS'))
+);
+
+-- streaming z-score detector (see src/anomaly.py): running EWMA state per
+-- equipment and measure, and the samples it flagged
+CREATE TABLE IF NOT EXISTS anomaly_state
+(
+    equipment_id TEXT NOT NULL,
+    measure TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean DOUBLE PRECISION NOT NULL,
+    var DOUBLE PRECISION NOT NULL,
+    last_ts BIGINT NOT NULL,
+    PRIMARY KEY (equipment_id, measure)
+);
+
+CREATE TABLE IF NOT EXISTS fact_anomaly
+(
+    equipment_id TEXT NOT NULL,
+    ts BIGINT NOT NULL,
+    measure TEXT NOT NULL,
+    timestamp TEXT,
+    day TEXT,
+    value DOUBLE PRECISION,
+    mean DOUBLE PRECISION,
+    std DOUBLE PRECISION,
+    zscore DOUBLE PRECISION,
+    detected_ts TEXT DEFAULT (to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS')),
+    PRIMARY KEY (equipment_id, ts, measure)
+);
+
+-- per-equipment rollups maintained by the ETL (additive sums only)
+CREATE TABLE IF NOT EXISTS agg_hourly
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour_ts BIGINT NOT NULL,
+    intervals INTEGER,
+    run_intervals INTEGER,
+    tonnage_t DOUBLE PRECISION,
+    energy_kwh DOUBLE PRECISION,
+    throughput_sum DOUBLE PRECISION,
+    PRIMARY KEY (equipment_id, hour_ts)
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    intervals INTEGER,
+    run_intervals INTEGER,
+    tonnage_t DOUBLE PRECISION,
+    energy_kwh DOUBLE PRECISION,
+    throughput_sum DOUBLE PRECISION,
+    PRIMARY KEY (day, equipment_id)
+);
+
+-- agg_hourly priced and weighted by hardness (see src/costs.py); additive sums
+-- only, bwi_tonnage = tonnage_t * bond_work_index_kwhpt
+CREATE TABLE IF NOT EXISTS agg_cost_hourly
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour_ts BIGINT NOT NULL,
+    intervals INTEGER,
+    tonnage_t DOUBLE PRECISION,
+    energy_kwh DOUBLE PRECISION,
+    usd_per_mwh DOUBLE PRECISION,
+    energy_cost_usd DOUBLE PRECISION,
+    bond_work_index_kwhpt DOUBLE PRECISION,
+    bwi_tonnage DOUBLE PRECISION,
+    PRIMARY KEY (equipment_id, hour_ts)
+);
+
+CREATE TABLE IF NOT EXISTS agg_cost_daily
+(
+    equipment_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    intervals INTEGER,
+    tonnage_t DOUBLE PRECISION,
+    energy_kwh DOUBLE PRECISION,
+    energy_cost_usd DOUBLE PRECISION,
+    bwi_tonnage DOUBLE PRECISION,
+    PRIMARY KEY (day, equipment_id)
+);
+
+-- covering indexes for per-equipment time ranges and per-day rollups
+CREATE INDEX IF NOT EXISTS ix_telemetry_equipment_ts
+    ON fact_telemetry (equipment_id, ts, timestamp, throughput_tph, power_kw, status);
+CREATE INDEX IF NOT EXISTS ix_telemetry_day_equipment
+    ON fact_telemetry (day, equipment_id, status, throughput_tph, power_kw, ts);
+CREATE INDEX IF NOT EXISTS ix_downtime_day_equipment
+    ON fact_downtime (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_downtime_span
+    ON fact_downtime (end_epoch, start_epoch);
+CREATE INDEX IF NOT EXISTS ix_agg_hourly_day
+    ON agg_hourly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_agg_cost_hourly_day
+    ON agg_cost_hourly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_anomaly_day
+    ON fact_anomaly (day, equipment_id);
+CREATE INDEX IF NOT EXISTS ix_etl_run_key
+    ON etl_run (key, started_ts);
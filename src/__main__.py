@@ -0,0 +1,39 @@
+from __future__ import annotations
+import argparse, importlib, sys
+
+# The `mining` command: one entry point for the pipeline's scripts.
+#
+#   python -m src etl --incremental
+#   python -m src kpis 2025-08-01 --end 2025-08-07 --freq shift
+#   python -m src render 2025-08-01 --workers 4
+#
+# Only the standard library is imported here. Each subcommand's module (and
+# with it pandas, matplotlib, ...) is imported when that subcommand runs, so
+# `--help` and cheap commands start in tens of milliseconds. Everything after
+# the subcommand name goes to the module's own argparse.
+
+# name -> (module, entry point taking argv, help)
+COMMANDS = {
+    "etl": ("src.etl", "main", "load raw CSVs into the database"),
+    "kpis": ("src.analytics", "main", "print production, energy-cost and downtime KPIs"),
+    "render": ("src.visualize", "cli", "render per-equipment charts and the daily summary"),
+    "generate": ("src.generate_data", "main", "generate synthetic raw data"),
+    "bench": ("src.bench", "main", "benchmark the pipeline and check for regressions"),
+    "ingest": ("src.ingest", "main", "ingest many telemetry CSVs in parallel"),
+    "live": ("src.live", "main", "serve or simulate live telemetry"),
+}
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="mining", description="Mining telemetry pipeline.")
+    sub = ap.add_subparsers(dest="command", required=True, metavar="command")
+    for name, (_, _, text) in COMMANDS.items():
+        # no arguments of its own: the rest of the line, --help included, is left over
+        sub.add_parser(name, help=text, add_help=False)
+    args, rest = ap.parse_known_args(argv)
+    module, func, _ = COMMANDS[args.command]
+    sys.argv[0] = f"mining {args.command}"  # the module's usage line reads "mining kpis ..."
+    rc = getattr(importlib.import_module(module), func)(rest)
+    return rc if isinstance(rc, int) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,161 @@
 from __future__ import annotations
 from pathlib import Path
-import os, sqlite3
+import sys
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.rollups import INTERVAL_HOURS
+    from src.db import get_storage, read as _read, read_telemetry
+    from src import downtime
+except Exception:
+    from rollups import INTERVAL_HOURS
+    from db import get_storage, read as _read, read_telemetry
+    import downtime
 
-def get_db_path() -> Path:
-    # Read fresh each call so tests can set RT_DB_PATH after import
-    return Path(os.getenv("RT_DB_PATH", str(ROOT / "db" / "rt_mining.db")))
+KPI_COLUMNS = [
+    "equipment_id","utilization_pct","total_tonnage_t","total_energy_kwh",
+    "specific_energy_kwhpt","avg_throughput_tph","meets_min_throughput","meets_max_specific_energy"
+]
 
-def _read(sql: str, params: dict | tuple = ()):
-    with sqlite3.connect(get_db_path()) as con:
-        return pd.read_sql_query(sql, con, params=params)
+COST_COLUMNS = [
+    "equipment_id","total_energy_kwh","total_tonnage_t","energy_cost_usd","cost_per_t_usd",
+    "cost_per_day_usd","specific_energy_kwhpt","bond_work_index_kwhpt","bwi_energy_ratio"
+]
+
+# shift calendar used by kpis_range(freq="shift"): two 12h shifts from 06:00
+SHIFT_START_HOUR = 6
+SHIFT_HOURS = 12
+
+def _kpis(agg: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """KPI columns from additive rollup sums (see rollups.py)."""
+    agg["utilization_pct"] = 100.0 * agg["run_intervals"] / agg["intervals"]
+    agg["avg_throughput_tph"] = agg["throughput_sum"] / agg["intervals"]
+    agg["specific_energy_kwhpt"] = agg["total_energy_kwh"] / agg["total_tonnage_t"].replace(0, float("nan"))
+    agg["meets_min_throughput"] = agg["avg_throughput_tph"] >= agg["min_throughput_tph"]
+    agg["meets_max_specific_energy"] = agg["specific_energy_kwhpt"] <= agg["max_specific_energy_kwhpt"]
+    return agg[keys + KPI_COLUMNS[1:]]
+
+def kpis_from_telemetry(tele: pd.DataFrame, benchmarks: pd.DataFrame,
+                        keys: list[str] | None = None) -> pd.DataFrame:
+    """
+    The same KPIs straight from raw telemetry rows (throughput_tph, power_kw,
+    status), for frames that never went through the rollups.
+
+    Only built-in aggregations: rows are grouped by keys (default equipment_id)
+    and benchmarks are joined onto the much smaller grouped result.
+    """
+    keys = keys or ["equipment_id"]
+    if tele.empty:
+        return pd.DataFrame(columns=keys + KPI_COLUMNS[1:])
+    g = tele.assign(run=tele["status"] == 1).groupby(keys, sort=False, observed=True)
+    # float32 measures are summed per group, the few totals carry on in float64
+    agg = g[["run", "throughput_tph", "power_kw"]].sum().astype("float64")
+    agg.insert(0, "intervals", g.size())
+    agg = agg.reset_index().rename(columns={"run": "run_intervals", "throughput_tph": "throughput_sum"})
+    agg["total_tonnage_t"] = agg["throughput_sum"] * INTERVAL_HOURS
+    agg["total_energy_kwh"] = agg.pop("power_kw") * INTERVAL_HOURS
+    bench = benchmarks[["equipment_id", "min_throughput_tph", "max_specific_energy_kwhpt"]]
+    agg = agg.merge(bench, on="equipment_id", how="left")
+    return _kpis(agg, keys).sort_values(keys).reset_index(drop=True)
+
+def kpis_range(start: str, end: str, freq: str = "D") -> pd.DataFrame:
+    """
+    KPIs (same definitions as daily_kpis) for every equipment and period
+    between days start and end, inclusive.
+
+    freq is "D" (calendar day), "H" (hour) or "shift" (SHIFT_HOURS-long shifts
+    starting at SHIFT_START_HOUR; shifts crossing the range edges are cut).
+    Returns a tidy frame keyed by equipment_id and `period` (period start).
+    Reads the rollups, or the raw Parquet columns when RT_STORAGE=parquet.
+    """
+    if freq not in ("D", "H", "shift"):
+        raise ValueError(f"freq must be 'D', 'H' or 'shift', not {freq!r}")
+    keys = ["equipment_id", "period"]
+    if get_storage() == "parquet":
+        # raw columns only, pruned to the range's day partitions
+        tele = read_telemetry(["equipment_id", "ts", "throughput_tph", "power_kw", "status"], start, end)
+        tele["period"] = _period(tele["ts"], freq)
+        bench = _read("SELECT equipment_id, min_throughput_tph, max_specific_energy_kwhpt FROM benchmarks")
+        return kpis_from_telemetry(tele, bench, keys)
+
+    table, period = ("agg_daily", "a.day") if freq == "D" else ("agg_hourly", "a.hour_ts")
+    agg = _read(f"""
+        SELECT a.equipment_id, {period} AS period, a.intervals, a.run_intervals,
+               a.tonnage_t AS total_tonnage_t, a.energy_kwh AS total_energy_kwh,
+               a.throughput_sum, b.min_throughput_tph, b.max_specific_energy_kwhpt
+        FROM {table} a
+        LEFT JOIN benchmarks b USING (equipment_id)
+        WHERE a.day >= :start AND a.day <= :end
+    """, {"start": start, "end": end})
+
+    if agg.empty:
+        return pd.DataFrame(columns=keys + KPI_COLUMNS[1:])
+    if freq == "D":
+        agg["period"] = pd.to_datetime(agg["period"])
+    else:
+        agg["period"] = _period(agg["period"], freq)
+    if freq == "shift":
+        agg = agg.groupby(keys, as_index=False).agg(
+            intervals=("intervals", "sum"),
+            run_intervals=("run_intervals", "sum"),
+            total_tonnage_t=("total_tonnage_t", "sum"),
+            total_energy_kwh=("total_energy_kwh", "sum"),
+            throughput_sum=("throughput_sum", "sum"),
+            min_throughput_tph=("min_throughput_tph", "first"),
+            max_specific_energy_kwhpt=("max_specific_energy_kwhpt", "first"),
+        )
+    return _kpis(agg, keys).sort_values(keys).reset_index(drop=True)
+
+def cost_kpis(start: str, end: str, freq: str = "D") -> pd.DataFrame:
+    """
+    Energy-cost KPIs for every equipment and period (freq as in kpis_range)
+    between days start and end, inclusive, from the costed rollups (see
+    costs.py):
+      - energy_cost_usd, cost_per_t_usd
+      - cost_per_day_usd (the period's cost as a daily rate over the
+        intervals it covers)
+      - specific_energy_kwhpt, bond_work_index_kwhpt (tonnage-weighted)
+      - bwi_energy_ratio (kWh/t over the ore's Bond work index; 1.0 means
+        the energy Bond predicts for that ore)
+    """
+    if freq not in ("D", "H", "shift"):
+        raise ValueError(f"freq must be 'D', 'H' or 'shift', not {freq!r}")
+    keys = ["equipment_id", "period"]
+    table, period = ("agg_cost_daily", "day") if freq == "D" else ("agg_cost_hourly", "hour_ts")
+    agg = _read(f"""
+        SELECT equipment_id, {period} AS period, intervals, tonnage_t AS total_tonnage_t,
+               energy_kwh AS total_energy_kwh, energy_cost_usd, bwi_tonnage
+        FROM {table}
+        WHERE day >= :start AND day <= :end
+    """, {"start": start, "end": end})
+    if agg.empty:
+        return pd.DataFrame(columns=keys + COST_COLUMNS[1:])
+    if freq == "D":
+        agg["period"] = pd.to_datetime(agg["period"])
+    else:
+        agg["period"] = _period(agg["period"], freq)
+        if freq == "shift":
+            agg = agg.groupby(keys, as_index=False).sum()
+    tons = agg["total_tonnage_t"].replace(0, float("nan"))
+    agg["cost_per_t_usd"] = agg["energy_cost_usd"] / tons
+    agg["cost_per_day_usd"] = agg["energy_cost_usd"] / (agg["intervals"] * INTERVAL_HOURS / 24.0)
+    agg["specific_energy_kwhpt"] = agg["total_energy_kwh"] / tons
+    agg["bond_work_index_kwhpt"] = agg["bwi_tonnage"] / tons
+    agg["bwi_energy_ratio"] = agg["specific_energy_kwhpt"] / agg["bond_work_index_kwhpt"]
+    return agg[keys + COST_COLUMNS[1:]].sort_values(keys).reset_index(drop=True)
+
+def _period_spec(freq: str) -> tuple[int, int]:
+    """(width, offset) in seconds of the day / hour / shift periods."""
+    width = {"D": 86400, "H": 3600, "shift": SHIFT_HOURS * 3600}[freq]
+    return width, SHIFT_START_HOUR * 3600 if freq == "shift" else 0
+
+def _period(epoch: pd.Series, freq: str) -> pd.Series:
+    """Start of the day / hour / shift containing each epoch-seconds value."""
+    width, off = _period_spec(freq)
+    return pd.to_datetime((epoch - off) // width * width + off, unit="s")
 
 def daily_kpis(date_str: str) -> pd.DataFrame:
     """
@@ -23,61 +167,55 @@ def daily_kpis(date_str: str) -> pd.DataFrame:
       - avg_throughput_tph
       - meets_min_throughput (vs benchmarks)
       - meets_max_specific_energy (vs benchmarks)
-    """
-    tele = _read("""
-        SELECT t.*, b.min_throughput_tph, b.max_specific_energy_kwhpt
-        FROM fact_telemetry t
-        LEFT JOIN benchmarks b USING (equipment_id)
-        WHERE date(substr(timestamp,1,10)) = date(:d)
-        ORDER BY equipment_id, timestamp
-    """, {"d": date_str})
 
-    if tele.empty:
-        return pd.DataFrame(columns=[
-            "equipment_id","utilization_pct","total_tonnage_t","total_energy_kwh",
-            "specific_energy_kwhpt","avg_throughput_tph","meets_min_throughput","meets_max_specific_energy"
-        ])
-
-    # 5-minute cadence
-    hours = 5.0 / 60.0
-    tele["tons_this_interval"] = tele["throughput_tph"] * hours
-    tele["kwh_this_interval"]  = tele["power_kw"] * hours
-
-    agg = tele.groupby(["equipment_id","min_throughput_tph","max_specific_energy_kwhpt"], as_index=False).agg(
-        intervals=("status","size"),
-        run_intervals=("status", lambda s: (s==1).sum()),
-        total_tonnage_t=("tons_this_interval","sum"),
-        total_energy_kwh=("kwh_this_interval","sum"),
-        avg_throughput_tph=("throughput_tph","mean"),
-    )
+    Served from the agg_daily rollup, so the cost does not grow with raw rows.
+    """
+    return kpis_range(date_str, date_str, "D").drop(columns="period")
 
-    agg["utilization_pct"] = 100.0 * agg["run_intervals"] / agg["intervals"]
-    agg["specific_energy_kwhpt"] = agg["total_energy_kwh"] / agg["total_tonnage_t"].replace(0, float("nan"))
-    agg["meets_min_throughput"] = agg["avg_throughput_tph"] >= agg["min_throughput_tph"]
-    agg["meets_max_specific_energy"] = agg["specific_energy_kwhpt"] <= agg["max_specific_energy_kwhpt"]
+def downtime_range(start: str, end: str, freq: str = "D", source: str = "events") -> pd.DataFrame:
+    """
+    Downtime per equipment and period (freq as in kpis_range) between days
+    start and end, inclusive: `events` stops touching the period and
+    `downtime_min` merged downtime minutes inside it (see downtime.py).
 
-    return agg[[
-        "equipment_id","utilization_pct","total_tonnage_t","total_energy_kwh",
-        "specific_energy_kwhpt","avg_throughput_tph","meets_min_throughput","meets_max_specific_energy"
-    ]].sort_values("equipment_id").reset_index(drop=True)
+    source="events" uses the logged fact_downtime events, "status" the runs of
+    status == 0 in the telemetry.
+    """
+    if freq not in ("D", "H", "shift"):
+        raise ValueError(f"freq must be 'D', 'H' or 'shift', not {freq!r}")
+    if source == "events":
+        intervals = _read(*downtime.events_query(start, end))
+    elif source == "status":
+        intervals = downtime.from_status(read_telemetry(["equipment_id", "ts", "status"], start, end),
+                                         round(INTERVAL_HOURS * 3600))
+    else:
+        raise ValueError(f"source must be 'events' or 'status', not {source!r}")
+    return downtime.summarize(intervals, start, end, *_period_spec(freq))
 
 def downtime_summary(date_str: str) -> pd.DataFrame:
-    """Downtime rollup for the day."""
-    dt = _read("""
-        SELECT equipment_id, start_ts, end_ts, duration_min, reason
-        FROM fact_downtime
-        WHERE date(substr(start_ts,1,10)) = date(:d)
-        ORDER BY equipment_id, start_ts
-    """, {"d": date_str})
-    if dt.empty:
-        return pd.DataFrame(columns=["equipment_id","events","total_downtime_min"])
-    return (dt.groupby("equipment_id", as_index=False)
-              .agg(events=("duration_min","size"), total_downtime_min=("duration_min","sum"))
-              .sort_values("equipment_id"))
+    """
+    Downtime for the day: events touching it and their merged minutes within
+    it, so overlapping events count once and a stop across midnight is split
+    between the two days.
+    """
+    dt = downtime_range(date_str, date_str)
+    return (dt.drop(columns="period").rename(columns={"downtime_min": "total_downtime_min"})
+              [["equipment_id", "events", "total_downtime_min"]])
 
-if __name__ == "__main__":
-    day = "2025-08-01"
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Print production, energy-cost and downtime KPIs.")
+    ap.add_argument("day", nargs="?", default="2025-08-01", help="first day (YYYY-MM-DD)")
+    ap.add_argument("--end", default=None, help="last day, inclusive (default: the first)")
+    ap.add_argument("--freq", choices=["D", "H", "shift"], default="D")
+    args = ap.parse_args(argv)
+    end = args.end or args.day
     print("\n=== KPIs ===")
-    print(daily_kpis(day).to_string(index=False))
+    print(kpis_range(args.day, end, args.freq).to_string(index=False))
+    print("\n=== Energy cost ===")
+    print(cost_kpis(args.day, end, args.freq).to_string(index=False))
     print("\n=== Downtime ===")
-    print(downtime_summary(day).to_string(index=False))
+    print(downtime_range(args.day, end, args.freq).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
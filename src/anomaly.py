@@ -0,0 +1,149 @@
+from __future__ import annotations
+from pathlib import Path
+import os, sqlite3, sys
+import numpy as np
+import pandas as pd
+
+# Streaming z-score anomaly detection. Each (equipment, measure) carries an
+# exponentially weighted mean and variance:
+#   d = x - mean;  mean += a*d;  var = (1-a)*(var + a*d*d)
+# A sample is flagged when |d| / sqrt(var) (against the state *before* the
+# sample, bias-corrected while var is still warming up from 0) exceeds the
+# threshold. State lives in anomaly_state, so each batch
+# costs O(1) per sample however much history came before; flagged samples go
+# to fact_anomaly. Both recurrences are linear, so a batch is scored with
+# pandas' ewm (adjust=False) seeded with the stored state instead of a
+# Python loop per sample.
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.db import query
+except Exception:
+    from db import query
+
+MEASURES = ["throughput_tph", "power_kw", "temperature_c", "pressure_kpa"]
+WARMUP = 30  # samples before a series may flag anything
+STATE_COLUMNS = ["equipment_id", "measure", "n", "mean", "var", "last_ts"]
+ANOMALY_COLUMNS = ["equipment_id", "ts", "measure", "timestamp", "day", "value", "mean", "std", "zscore"]
+
+def get_alpha() -> float:
+    """EWMA weight from RT_ANOMALY_HALFLIFE, in samples (default one day of 5-min data)."""
+    return 1 - 0.5 ** (1 / float(os.getenv("RT_ANOMALY_HALFLIFE", "288")))
+
+def get_threshold() -> float:
+    return float(os.getenv("RT_ANOMALY_Z", "4.0"))
+
+def _ewm(values: np.ndarray, groups: np.ndarray, alpha: float) -> np.ndarray:
+    # rows are contiguous per group, so the grouped result is already in row order
+    return pd.Series(values).groupby(groups, sort=False).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def score(df: pd.DataFrame, state: pd.DataFrame, alpha: float | None = None,
+          threshold: float | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Score telemetry rows against state (STATE_COLUMNS) and return
+    (flagged rows, updated state). Rows at or before a series' last_ts are
+    skipped, so re-scoring a batch is a no-op.
+    """
+    alpha = get_alpha() if alpha is None else alpha
+    threshold = get_threshold() if threshold is None else threshold
+    eq = pd.Categorical(df["equipment_id"].astype(str))
+    names = np.asarray(eq.categories, dtype=object)
+    codes, ts = eq.codes.astype(np.int64), df["ts"].to_numpy(np.int64)
+    flags, new_state = [], []
+    for measure in MEASURES:
+        if measure not in df.columns:
+            continue
+        known = (state[state["measure"] == measure].set_index("equipment_id")
+                 .reindex(names)[["n", "mean", "var", "last_ts"]])
+        last = known["last_ts"].to_numpy(float, na_value=-np.inf)
+        value = df[measure].to_numpy(float)
+
+        # samples of this measure, ordered by (equipment, ts), newer than the state
+        rows = np.lexsort((ts, codes))
+        rows = rows[~np.isnan(value[rows]) & (ts[rows] > last[codes[rows]])]
+        if not len(rows):
+            continue
+        g, t = codes[rows], ts[rows]
+        rows = rows[np.r_[(g[1:] != g[:-1]) | (t[1:] != t[:-1]), True]]  # last of equal keys
+        g, x = codes[rows], value[rows]
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        eids = g[starts]
+
+        # one seed row per series ahead of its samples: the stored state, or
+        # the series' first value with zero variance for a new equipment
+        n0 = known["n"].to_numpy(float, na_value=0)[eids].astype(np.int64)
+        m0 = known["mean"].to_numpy(float, na_value=np.nan)[eids]
+        m0 = np.where(np.isnan(m0), x[starts], m0)
+        v0 = known["var"].to_numpy(float, na_value=0.0)[eids]
+        seeded = starts + np.arange(len(starts))  # seed positions after insertion
+        sg = np.insert(g, starts, eids)
+        sx = np.insert(x, starts, m0)
+        is_seed = np.zeros(len(sx), dtype=bool)
+        is_seed[seeded] = True
+
+        mean = _ewm(sx, sg, alpha)
+        prev_mean = np.r_[np.nan, mean[:-1]]
+        d = sx - prev_mean
+        v_in = (1 - alpha) * d * d
+        v_in[seeded] = v0
+        var = _ewm(v_in, sg, alpha)
+        prev_var = np.r_[np.nan, var[:-1]]
+        # samples already seen before each row, per series
+        pos = np.arange(len(sx)) - np.repeat(seeded, np.diff(np.r_[seeded, len(sx)]))
+        n = np.repeat(n0, np.diff(np.r_[seeded, len(sx)])) + pos - 1
+
+        smp = ~is_seed
+        # var starts at 0, so early on it is biased low by (1-a)^n; undo that
+        bias = 1 - (1 - alpha) ** np.maximum(n[smp], 1)
+        std = np.sqrt(prev_var[smp] / bias)
+        z = np.divide(d[smp], std, out=np.zeros(len(rows)), where=std > 0)
+        hit = (n[smp] >= WARMUP) & (np.abs(z) > threshold)
+        if hit.any():
+            f = df.iloc[rows[hit]].reindex(columns=["equipment_id", "ts", "timestamp", "day"])
+            f = f.assign(equipment_id=names[g[hit]], measure=measure, value=x[hit],
+                         mean=prev_mean[smp][hit], std=std[hit], zscore=z[hit])
+            flags.append(f[ANOMALY_COLUMNS])
+        ends = np.r_[seeded[1:], len(sx)] - 1
+        new_state.append(pd.DataFrame({
+            "equipment_id": names[eids], "measure": measure, "n": n[ends] + 1,
+            "mean": mean[ends], "var": var[ends], "last_ts": ts[rows][ends - np.arange(1, len(ends) + 1)],
+        }))
+    flagged = pd.concat(flags, ignore_index=True) if flags else pd.DataFrame(columns=ANOMALY_COLUMNS)
+    state = pd.concat(new_state, ignore_index=True) if new_state else pd.DataFrame(columns=STATE_COLUMNS)
+    return flagged, state
+
+def load_state(con: sqlite3.Connection) -> pd.DataFrame:
+    return query(con, f"SELECT {', '.join(STATE_COLUMNS)} FROM anomaly_state")
+
+def reset(con: sqlite3.Connection) -> None:
+    """Forget all state and flags, e.g. before a full reload."""
+    con.execute("DELETE FROM anomaly_state")
+    con.execute("DELETE FROM fact_anomaly")
+
+def process(con: sqlite3.Connection, df: pd.DataFrame) -> int:
+    """Score a telemetry batch, persist the new state and flags; returns the number flagged."""
+    flagged, state = score(df, load_state(con))
+    con.executemany(f"""
+        INSERT INTO anomaly_state ({', '.join(STATE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (equipment_id, measure) DO UPDATE SET
+            n = excluded.n, mean = excluded.mean, var = excluded.var, last_ts = excluded.last_ts
+    """, state.itertuples(index=False, name=None))
+    con.executemany(f"""
+        INSERT OR REPLACE INTO fact_anomaly ({', '.join(ANOMALY_COLUMNS)})
+        VALUES ({', '.join('?' * len(ANOMALY_COLUMNS))})
+    """, flagged.itertuples(index=False, name=None))
+    return len(flagged)
+
+def catch_up(con: sqlite3.Connection) -> int:
+    """Score every fact_telemetry row newer than its equipment's state, in time order."""
+    df = query(con, f"""
+        SELECT t.equipment_id, t.ts, t.timestamp, t.day, {', '.join('t.' + m for m in MEASURES)}
+        FROM fact_telemetry t
+        LEFT JOIN (SELECT equipment_id, MIN(last_ts) AS last_ts FROM anomaly_state GROUP BY equipment_id) s
+            USING (equipment_id)
+        WHERE t.ts > COALESCE(s.last_ts, -1)
+        ORDER BY t.equipment_id, t.ts
+    """)
+    return process(con, df) if not df.empty else 0
@@ -1,27 +1,83 @@
 from __future__ import annotations
 from pathlib import Path
-import os, sqlite3
+import sys
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.timekeys import day_bounds
+    from src.downsample import downsample, get_max_points
+    from src.query_cache import QueryCache, get_cache
+    from src.telemetry import compact
+    from src import downtime
+except Exception:
+    from timekeys import day_bounds
+    from downsample import downsample, get_max_points
+    from query_cache import QueryCache, get_cache
+    from telemetry import compact
+    import downtime
+
+DATES_SQL = "SELECT DISTINCT day FROM agg_daily ORDER BY day"
+EQUIPMENT_SQL = "SELECT equipment_id, area FROM dim_equipment ORDER BY equipment_id"
+
+def kpi_query(day: str, equip: list[str]) -> tuple[str, tuple]:
+    # Build parameter placeholders safely
+    placeholders = ",".join(["?"] * len(equip))
+    # KPI table from the ETL-maintained daily rollup
+    return f"""
+        SELECT a.equipment_id,
+               a.throughput_sum*1.0/a.intervals AS avg_tph,
+               a.tonnage_t  AS total_tons,
+               a.energy_kwh AS total_kwh,
+               a.run_intervals*100.0/a.intervals AS utilization_pct,
+               b.min_throughput_tph,
+               b.max_specific_energy_kwhpt
+        FROM agg_daily a
+        LEFT JOIN benchmarks b USING (equipment_id)
+        WHERE a.day = ?
+          AND a.equipment_id IN ({placeholders})
+        ORDER BY a.equipment_id
+    """, (day, *equip)
+
+def ts_query(day: str, equipment_id: str) -> tuple[str, dict]:
+    t0, t1 = day_bounds(day)
+    return """
+        SELECT timestamp, equipment_id, throughput_tph, power_kw, status
+        FROM fact_telemetry
+        WHERE equipment_id=:eid AND ts >= :t0 AND ts < :t1
+        ORDER BY ts
+    """, {"eid": equipment_id, "t0": t0, "t1": t1}
+
+def prewarm(cache: QueryCache) -> None:
+    """After a load: the default view (latest day, all equipment) and each timeseries."""
+    dates = cache.read(DATES_SQL)
+    if dates.empty:
+        return
+    day = dates["day"].iloc[-1]
+    ids = cache.read(EQUIPMENT_SQL)["equipment_id"].tolist()
+    cache.read(*kpi_query(day, ids))
+    for eid in ids[: cache.maxsize // 4]:
+        cache.read(*ts_query(day, eid))
+
+# one cache per server process, shared by every session; keyed on the ETL's
+# data version, so a new load is visible on the next rerun
+cache = get_cache()
+cache.set_prewarm(prewarm)
+cache.watch()
 
-def get_db_path() -> Path:
-    # Reads fresh so tests or shells can override with RT_DB_PATH
-    return Path(os.getenv("RT_DB_PATH", str(ROOT / "db" / "rt_mining.db")))
-
-@st.cache_data(show_spinner=False)
 def q(sql: str, params: dict | tuple = ()):
-    with sqlite3.connect(get_db_path()) as con:
-        return pd.read_sql_query(sql, con, params=params)
+    return cache.read(sql, params)
 
 st.set_page_config(page_title="Mining Ops Dashboard", layout="wide")
 st.title("⛏️ Mining Operations Dashboard")
 
 # --- Data presence checks
 try:
-    dates = q("SELECT DISTINCT substr(timestamp,1,10) AS day FROM fact_telemetry ORDER BY day")
+    dates = q(DATES_SQL)
 except Exception as e:
     st.error("Database not found or schema missing. Run:\n\n`python src/generate_data.py && python src/etl.py`")
     st.stop()
@@ -33,37 +89,18 @@ if dates.empty:
 # --- Sidebar filters
 day = st.sidebar.selectbox("Date", dates["day"].tolist(), index=len(dates)-1)
 
-eq = q("SELECT equipment_id, area FROM dim_equipment ORDER BY equipment_id")
+eq = q(EQUIPMENT_SQL)
 all_equip = eq["equipment_id"].tolist()
 default_pick = all_equip[:] if all_equip else []
 equip = st.sidebar.multiselect("Equipment", all_equip, default=default_pick)
+max_points = st.sidebar.number_input("Max points per chart", 100, 20000, get_max_points(), step=100)
 
 if not equip:
     st.info("Select at least one equipment on the left.")
     st.stop()
 
-# Build parameter placeholders safely
-placeholders = ",".join(["?"] * len(equip))
-
 # --- KPI table
-kpi = q(
-    f"""
-    SELECT t.equipment_id,
-           AVG(t.throughput_tph) AS avg_tph,
-           SUM(t.throughput_tph)*(5.0/60.0) AS total_tons,
-           SUM(t.power_kw)*(5.0/60.0)       AS total_kwh,
-           SUM(CASE WHEN t.status=1 THEN 1 ELSE 0 END)*100.0/COUNT(*) AS utilization_pct,
-           b.min_throughput_tph,
-           b.max_specific_energy_kwhpt
-    FROM fact_telemetry t
-    LEFT JOIN benchmarks b USING (equipment_id)
-    WHERE date(substr(t.timestamp,1,10))=date(?)
-      AND t.equipment_id IN ({placeholders})
-    GROUP BY t.equipment_id, b.min_throughput_tph, b.max_specific_energy_kwhpt
-    ORDER BY t.equipment_id
-    """,
-    (day, *equip),
-)
+kpi = q(*kpi_query(day, equip))
 
 if kpi.empty:
     st.info("No data for the chosen filters.")
@@ -84,23 +121,17 @@ st.divider()
 # --- Time series for a selected equipment
 pick = st.selectbox("Timeseries Equipment", kpi["equipment_id"].tolist(), index=0)
 
-ts = q(
-    """
-    SELECT timestamp, equipment_id, throughput_tph, power_kw, status
-    FROM fact_telemetry
-    WHERE date(substr(timestamp,1,10))=date(:d) AND equipment_id=:eid
-    ORDER BY timestamp
-    """,
-    {"d": day, "eid": pick},
-)
-ts["timestamp"] = pd.to_datetime(ts["timestamp"])
+ts = compact(q(*ts_query(day, pick)))
 
+# charts get at most max_points each (LTTB), whatever the range or cadence
 left, right = st.columns(2)
 with left:
-    fig1 = px.line(ts, x="timestamp", y="throughput_tph", title=f"{pick} — Throughput (tph)")
+    fig1 = px.line(downsample(ts, ["throughput_tph"], max_points), x="timestamp", y="throughput_tph",
+                   title=f"{pick} — Throughput (tph)")
     st.plotly_chart(fig1, use_container_width=True)
 with right:
-    fig2 = px.line(ts, x="timestamp", y="power_kw", title=f"{pick} — Power (kW)")
+    fig2 = px.line(downsample(ts, ["power_kw"], max_points), x="timestamp", y="power_kw",
+                   title=f"{pick} — Power (kW)")
     st.plotly_chart(fig2, use_container_width=True)
 
 # Rolling kWh/t (1h = 12 intervals of 5 min)
@@ -112,22 +143,13 @@ ts["roll_kwhpt"] = (
     / ts["tons"].rolling(12, min_periods=3).sum().replace(0, pd.NA)
 )
 
-fig3 = px.line(ts, x="timestamp", y="roll_kwhpt", title=f"{pick} — Rolling Specific Energy (kWh/t, 1h)")
+fig3 = px.line(downsample(ts, ["roll_kwhpt"], max_points), x="timestamp", y="roll_kwhpt",
+               title=f"{pick} — Rolling Specific Energy (kWh/t, 1h)")
 st.plotly_chart(fig3, use_container_width=True)
 
-# --- Downtime day summary
-dt = q(
-    """
-    SELECT equipment_id,
-           COUNT(*) AS events,
-           SUM(duration_min) AS total_downtime_min
-    FROM fact_downtime
-    WHERE date(substr(start_ts,1,10))=date(:d)
-    GROUP BY equipment_id
-    ORDER BY equipment_id
-    """,
-    {"d": day},
-)
+# --- Downtime day summary: overlapping events merged, clipped to the day
+dt = (downtime.summarize(q(*downtime.events_query(day)), day)
+              .drop(columns="period").rename(columns={"downtime_min": "total_downtime_min"}))
 
 st.subheader("Downtime (day)")
 st.dataframe(dt if not dt.empty else pd.DataFrame(columns=["equipment_id", "events", "total_downtime_min"]), use_container_width=True)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+import argparse, json, multiprocessing as mp, os, platform, subprocess, sys, tempfile, time
+
+# Benchmark harness for the pipeline's hot paths. Each size gets a synthetic
+# dataset; each entry point then runs in a fresh process so wall time and peak
+# RSS are its own. Results go to JSON and can be checked against a baseline.
+#
+#   python -m src.bench --sizes xs s --baseline bench/baseline.json
+#
+# --startup also times a cold `mining <command> --help` per subcommand (size
+# "startup"), which catches a heavy import creeping back into a module's top
+# level.
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+# name -> (equipment, days)
+SIZES = {
+    "xs": (2, 1),
+    "s": (20, 7),
+    "m": (50, 30),
+    "l": (200, 90),
+    "xl": (500, 365),
+}
+CASES = ["etl.load_all", "analytics.daily_kpis", "analytics.downtime_summary", "visualize.main"]
+START = "2025-08-01"
+INTERVALS_PER_DAY = 288
+
+def _run_case(case: str, env: dict[str, str], day: str) -> dict:
+    """Runs in a spawned child: time one entry point and report its peak RSS."""
+    import contextlib, io, resource
+    os.environ.update(env)
+    from src import analytics, etl, visualize
+    fn = {
+        "etl.load_all": etl.load_all,
+        "analytics.daily_kpis": lambda: analytics.daily_kpis(day),
+        "analytics.downtime_summary": lambda: analytics.downtime_summary(day),
+        "visualize.main": lambda: visualize.main(day, workers=None, force=True),
+    }[case]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        fn()
+        wall = time.perf_counter() - t
+    rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return {"wall_s": wall, "peak_rss_mb": rss / (2**20 if sys.platform == "darwin" else 2**10)}
+
+def run(sizes: list[str], cases: list[str] | None = None, repeat: int = 1) -> list[dict]:
+    from src.generate_data import generate
+    cases = cases or CASES
+    ctx = mp.get_context("spawn")
+    results = []
+    for size in sizes:
+        n_eq, days = SIZES[size]
+        day = (date.fromisoformat(START) + timedelta(days=days - 1)).isoformat()
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            generate(tmp / "raw", n_eq, days, start=START, chunk_rows=1_000_000)
+            env = {"RT_DATA_DIR": str(tmp / "raw"), "RT_DB_PATH": str(tmp / "bench.db"),
+                   "RT_OUT_DIR": str(tmp / "out")}
+            for case in cases:
+                rows = n_eq * INTERVALS_PER_DAY * (days if case == "etl.load_all" else 1)
+                runs = []
+                for _ in range(repeat):
+                    # fresh, non-daemonic child so visualize.main may start its own pool
+                    with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                        runs.append(pool.submit(_run_case, case, env, day).result())
+                best = min(runs, key=lambda r: r["wall_s"])
+                results.append({
+                    "size": size, "case": case, "rows": rows,
+                    "wall_s": round(best["wall_s"], 4),
+                    "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+                    "rows_per_s": round(rows / best["wall_s"]),
+                })
+                print(f"{size:>3} {case:<28} {best['wall_s']:9.3f} s {results[-1]['peak_rss_mb']:8.1f} MB "
+                      f"{results[-1]['rows_per_s']:>12,} rows/s")
+    return results
+
+def startup(commands: list[str] | None = None, repeat: int = 5) -> list[dict]:
+    """Best wall time of `python -m src [command] --help` in a fresh interpreter, per command."""
+    from src.__main__ import COMMANDS
+    results = []
+    for cmd in [""] + list(COMMANDS) if commands is None else commands:
+        argv = [sys.executable, "-m", "src", *cmd.split(), "--help"]
+        runs = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+            runs.append(time.perf_counter() - t)
+        results.append({"size": "startup", "case": f"mining {cmd}".strip(), "rows": 0,
+                        "wall_s": round(min(runs), 4)})
+        print(f"startup {results[-1]['case']:<24} {min(runs):9.3f} s")
+    return results
+
+def compare(results: list[dict], baseline: list[dict], threshold: float,
+            min_delta_s: float = 0.05) -> list[str]:
+    """
+    Messages for every (size, case) whose wall time grew by more than
+    threshold (a fraction) and by more than min_delta_s, which keeps
+    millisecond-scale cases from failing on timer noise.
+    """
+    base = {(b["size"], b["case"]): b for b in baseline}
+    out = []
+    for r in results:
+        b = base.get((r["size"], r["case"]))
+        if b and r["wall_s"] > b["wall_s"] * (1 + threshold) and r["wall_s"] - b["wall_s"] > min_delta_s:
+            out.append(f"{r['size']} {r['case']}: {r['wall_s']:.3f}s vs baseline {b['wall_s']:.3f}s "
+                       f"(+{100 * (r['wall_s'] / b['wall_s'] - 1):.0f}%)")
+    return out
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark ETL, analytics and rendering on synthetic data.")
+    ap.add_argument("--sizes", nargs="+", default=["xs", "s"], choices=list(SIZES))
+    ap.add_argument("--cases", nargs="+", default=None, choices=CASES)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--startup", action="store_true", help="also time a cold start of every subcommand")
+    ap.add_argument("--out", type=Path, default=ROOT / "bench" / "results.json")
+    ap.add_argument("--baseline", type=Path, default=None, help="fail on regressions against this file")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed wall-time growth (0.25 = 25%%)")
+    ap.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns below this many seconds")
+    ap.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    args = ap.parse_args(argv)
+    if args.save_baseline and args.baseline is None:
+        ap.error("--save-baseline needs --baseline FILE to write to")
+
+    results = run(args.sizes, args.cases, args.repeat)
+    if args.startup:
+        results += startup(repeat=max(args.repeat, 5))
+    doc = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(doc, indent=1))
+    print("Saved:", args.out)
+
+    if args.baseline is None:
+        return 0
+    if args.save_baseline:
+        # keep entries this run did not measure, e.g. larger sizes or startup times
+        if args.baseline.exists():
+            seen = {(r["size"], r["case"]) for r in results}
+            old = json.loads(args.baseline.read_text())["results"]
+            doc["results"] = [b for b in old if (b["size"], b["case"]) not in seen] + results
+        args.baseline.write_text(json.dumps(doc, indent=1))
+        print("Saved baseline:", args.baseline)
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold,
+                          args.min_delta)
+    for msg in regressions:
+        print("REGRESSION", msg)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
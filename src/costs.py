@@ -0,0 +1,165 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable
+import sqlite3, sys
+import pandas as pd
+
+# Energy cost and ore hardness on top of the rollups. Each agg_hourly row gets
+# the power price and lab assay in effect at its hour through an as-of join
+# (pd.merge_asof, backward), so prices may be daily ("2025-08-01") or hourly
+# ("2025-08-01T13:00:00") and assays need not exist for every day. Rows
+# before the first price/assay take the first one.
+#
+# agg_cost_hourly/agg_cost_daily keep additive sums only, like the rollups:
+#   energy_cost_usd  energy_kwh * usd_per_mwh / 1000
+#   bwi_tonnage      tonnage_t * bond_work_index_kwhpt (sum / tonnage_t is the
+#                    tonnage-weighted Bond work index of any period)
+# Joining per hour is exact for hourly or daily prices, and costing a year of
+# many assets is one merge_asof over ~9k rows per equipment.
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.db import query
+except Exception:
+    from db import query
+
+_DAILY = """
+    INSERT INTO agg_cost_daily (equipment_id, day, intervals, tonnage_t, energy_kwh,
+                                energy_cost_usd, bwi_tonnage)
+    SELECT equipment_id, day, SUM(intervals), SUM(tonnage_t), SUM(energy_kwh),
+           SUM(energy_cost_usd), SUM(bwi_tonnage)
+    FROM agg_cost_hourly
+    WHERE day IN (SELECT day FROM temp.cost_days)
+    GROUP BY equipment_id, day
+"""
+_DAYS_OF_HOURS = """
+    INSERT INTO agg_cost_daily (equipment_id, day, intervals, tonnage_t, energy_kwh,
+                                energy_cost_usd, bwi_tonnage)
+    SELECT equipment_id, day, SUM(intervals), SUM(tonnage_t), SUM(energy_kwh),
+           SUM(energy_cost_usd), SUM(bwi_tonnage)
+    FROM agg_cost_hourly
+    WHERE (equipment_id, day) IN (SELECT equipment_id, day FROM temp.cost_hours)
+    GROUP BY equipment_id, day
+"""
+HOURLY_COLUMNS = ["equipment_id", "day", "hour_ts", "intervals", "tonnage_t", "energy_kwh",
+                  "usd_per_mwh", "energy_cost_usd", "bond_work_index_kwhpt", "bwi_tonnage"]
+
+def _curve(con: sqlite3.Connection, table: str, columns: list[str]) -> pd.DataFrame:
+    """A dated table as (effective_ts epoch, columns...), sorted for merge_asof."""
+    df = query(con, f"SELECT date, {', '.join(columns)} FROM {table}")
+    # daily and hourly dates side by side: ISO8601 parses both forms
+    df["effective_ts"] = (pd.to_datetime(df.pop("date"), format="ISO8601")
+                          - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)
+    return df.dropna().sort_values("effective_ts", ignore_index=True)
+
+def price_curve(con: sqlite3.Connection) -> pd.DataFrame:
+    return _curve(con, "fact_power_price", ["usd_per_mwh"])
+
+def assay_curve(con: sqlite3.Connection) -> pd.DataFrame:
+    return _curve(con, "fact_lab_assays", ["bond_work_index_kwhpt"])
+
+def asof(df: pd.DataFrame, curve: pd.DataFrame, on: str = "hour_ts") -> pd.DataFrame:
+    """df (sorted by `on`) with the curve's values in effect at each row."""
+    cols = [c for c in curve.columns if c != "effective_ts"]
+    if curve.empty:
+        return df.assign(**dict.fromkeys(cols, float("nan")))
+    out = pd.merge_asof(df, curve, left_on=on, right_on="effective_ts", direction="backward")
+    out[cols] = out[cols].fillna(curve[cols].iloc[0])
+    return out.drop(columns="effective_ts")
+
+def hourly_costs(hourly: pd.DataFrame, prices: pd.DataFrame, assays: pd.DataFrame) -> pd.DataFrame:
+    """agg_hourly rows priced and weighted (HOURLY_COLUMNS)."""
+    df = hourly.astype({"hour_ts": "int64"}).sort_values("hour_ts", kind="stable", ignore_index=True)
+    df = asof(asof(df, prices), assays)
+    df["energy_cost_usd"] = df["energy_kwh"] * df["usd_per_mwh"] / 1000.0
+    df["bwi_tonnage"] = df["tonnage_t"] * df["bond_work_index_kwhpt"]
+    # back in primary-key order, so inserts append to the table's b-tree
+    return df.sort_values(["equipment_id", "hour_ts"], ignore_index=True)[HOURLY_COLUMNS]
+
+def refresh(con: sqlite3.Connection, days: Iterable[str] | None = None) -> None:
+    """
+    Recompute agg_cost_hourly/agg_cost_daily for the given days from
+    agg_hourly (refresh the rollups first). days=None rebuilds every day,
+    e.g. after prices or assays were reloaded.
+    """
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS cost_days (day TEXT PRIMARY KEY)")
+    con.execute("DELETE FROM temp.cost_days")
+    sql = "SELECT equipment_id, day, hour_ts, intervals, tonnage_t, energy_kwh FROM agg_hourly"
+    if days is None:
+        con.execute("INSERT INTO temp.cost_days SELECT DISTINCT day FROM agg_hourly")
+        # whole tables: truncate and scan instead of probing day by day
+        for table in ("agg_cost_hourly", "agg_cost_daily"):
+            con.execute(f"DELETE FROM {table}")
+    else:
+        con.executemany("INSERT OR IGNORE INTO temp.cost_days VALUES (?)", ((d,) for d in days))
+        for table in ("agg_cost_hourly", "agg_cost_daily"):
+            con.execute(f"DELETE FROM {table} WHERE day IN (SELECT day FROM temp.cost_days)")
+        sql += " WHERE day IN (SELECT day FROM temp.cost_days)"
+    if _insert_hourly(con, query(con, sql)):
+        con.execute(_DAILY)
+    n = con.execute("SELECT COUNT(*) FROM temp.cost_days").fetchone()[0]
+    print(f"→ refreshed costs: {n} days")
+
+def refresh_hours(con: sqlite3.Connection, hours: Iterable[tuple[str, int, str]]) -> None:
+    """
+    Recompute agg_cost_hourly for the given (equipment_id, hour_ts, day)
+    and agg_cost_daily for their days, from agg_hourly (see
+    rollups.refresh_hours).
+    """
+    con.execute("""CREATE TEMP TABLE IF NOT EXISTS cost_hours
+        (equipment_id TEXT, hour_ts INTEGER, day TEXT, PRIMARY KEY (equipment_id, hour_ts))""")
+    con.execute("DELETE FROM temp.cost_hours")
+    con.executemany("INSERT OR IGNORE INTO temp.cost_hours VALUES (?, ?, ?)", hours)
+    con.execute("DELETE FROM agg_cost_hourly WHERE (equipment_id, hour_ts) IN "
+                "(SELECT equipment_id, hour_ts FROM temp.cost_hours)")
+    con.execute("DELETE FROM agg_cost_daily WHERE (equipment_id, day) IN "
+                "(SELECT equipment_id, day FROM temp.cost_hours)")
+    hourly = query(con, """
+        SELECT a.equipment_id, a.day, a.hour_ts, a.intervals, a.tonnage_t, a.energy_kwh
+        FROM agg_hourly a JOIN temp.cost_hours h USING (equipment_id, hour_ts)
+    """)
+    _insert_hourly(con, hourly)
+    con.execute(_DAYS_OF_HOURS)
+
+def _insert_hourly(con: sqlite3.Connection, hourly: pd.DataFrame) -> bool:
+    """Price agg_hourly rows into agg_cost_hourly; False when there were none."""
+    if hourly.empty:
+        return False
+    df = hourly_costs(hourly, price_curve(con), assay_curve(con))
+    con.executemany(
+        f"INSERT INTO agg_cost_hourly ({', '.join(HOURLY_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(HOURLY_COLUMNS))})",
+        # plain Python scalars column-wise; SQLite stores a NaN (no price yet) as NULL
+        zip(*(df[c].tolist() for c in HOURLY_COLUMNS)),
+    )
+    return True
+
+def changed_since(con: sqlite3.Connection, table: str, new: pd.DataFrame) -> str | None:
+    """
+    The earliest date at which new (about to replace fact_power_price or
+    fact_lab_assays) differs from what table holds, "" when that is at or
+    before the first date (the first price also covers earlier hours), or
+    None when nothing changed.
+    """
+    old = query(con, f"SELECT {', '.join(new.columns)} FROM {table}")
+    both = pd.concat([old, new], ignore_index=True)
+    for c in both.columns.drop("date"):
+        both[c] = pd.to_numeric(both[c], errors="coerce")  # 55 in the CSV is 55.0 in the table
+    diff = both.drop_duplicates(keep=False)
+    if diff.empty:
+        return None
+    since = str(diff["date"].min())
+    return "" if since <= str(both["date"].min()) else since
+
+def days_since(con: sqlite3.Connection, since: str) -> set[str]:
+    """Days in agg_hourly priced by a curve that changed at since (see changed_since)."""
+    return {d for (d,) in con.execute("SELECT DISTINCT day FROM agg_hourly WHERE day >= ?", (since[:10],))}
+
+def backfill(con: sqlite3.Connection) -> None:
+    """Cost the rollups once for a database that predates the cost tables."""
+    if con.execute("SELECT 1 FROM agg_cost_daily LIMIT 1").fetchone():
+        return
+    if con.execute("SELECT 1 FROM agg_hourly LIMIT 1").fetchone():
+        refresh(con)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import os
+import numpy as np
+import pandas as pd
+
+# Point reduction for charts: whatever the selected range or cadence, a series
+# is cut to a fixed number of points before it reaches Plotly/matplotlib.
+#   lttb    Largest-Triangle-Three-Buckets, keeps the visual shape
+#   minmax  per-bucket min and max, keeps every peak and trough
+
+def get_max_points() -> int:
+    # read fresh each call so tests can set RT_MAX_POINTS after import
+    return int(os.getenv("RT_MAX_POINTS", "1000"))
+
+def _numeric(values) -> np.ndarray:
+    s = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        s = s.astype("int64")
+    # gaps are interpolated for point selection only; the rows themselves are kept
+    return s.astype(float).interpolate(limit_direction="both").fillna(0.0).to_numpy()
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Positions of the n_out points LTTB keeps (all positions if n_out >= len(y))."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _numeric(x), _numeric(y)
+    # n_out - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def minmax(y, n_out: int) -> np.ndarray:
+    """Positions of each bucket's min and max (n_out // 2 buckets) plus the endpoints."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = pd.Series(_numeric(y))
+    g = y.groupby(np.arange(n) * (n_out // 2) // n)
+    return np.unique(np.concatenate([[0, n - 1], g.idxmin().to_numpy(), g.idxmax().to_numpy()]))
+
+def downsample(df: pd.DataFrame, columns: list[str], n_out: int | None = None,
+               x: str = "timestamp", method: str = "lttb") -> pd.DataFrame:
+    """
+    Rows of df (ordered by x) reduced to about n_out points per column
+    (default RT_MAX_POINTS); the union over columns is returned in order.
+    """
+    n_out = n_out or get_max_points()
+    if len(df) <= n_out:
+        return df
+    if method == "lttb":
+        keep = [lttb(df[x].to_numpy(), df[c].to_numpy(), n_out) for c in columns]
+    elif method == "minmax":
+        keep = [minmax(df[c].to_numpy(), n_out) for c in columns]
+    else:
+        raise ValueError(f"method must be 'lttb' or 'minmax', got {method!r}")
+    return df.iloc[np.unique(np.concatenate(keep))].reset_index(drop=True)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from pathlib import Path
+import sys
+import numpy as np
+import pandas as pd
+
+# Downtime as intervals [start_epoch, end_epoch) per equipment, from either
+# source:
+#   fact_downtime   logged events, which may overlap and cross midnight
+#   fact_telemetry  runs of status == 0 (run-length encoded)
+# merge() folds overlapping/touching intervals into disjoint stops, split()
+# cuts them at day or shift boundaries, and DowntimeIndex answers range
+# lookups with two binary searches per equipment. Everything is a sort plus
+# vectorized passes, so n intervals cost O(n log n).
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.timekeys import day_bounds
+except Exception:
+    from timekeys import day_bounds
+
+DAY_S = 86400
+INTERVAL_COLUMNS = ["equipment_id", "start_epoch", "end_epoch"]
+
+def events_query(start_day: str, end_day: str | None = None) -> tuple[str, dict]:
+    """fact_downtime events overlapping days start..end (inclusive), not only those starting there."""
+    t0, t1 = day_bounds(start_day, end_day)
+    # end_ts is NOT NULL and the ETL stores its epoch, so the overlap test is a
+    # plain range on ix_downtime_span (end_epoch, start_epoch)
+    return """
+        SELECT equipment_id, start_epoch, end_epoch, reason
+        FROM fact_downtime
+        WHERE end_epoch > :t0 AND start_epoch < :t1
+        ORDER BY equipment_id, start_epoch
+    """, {"t0": t0, "t1": t1}
+
+def merge(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Disjoint intervals per equipment (INTERVAL_COLUMNS plus `events`, the
+    number of input intervals folded into each), sorted by equipment, start.
+    """
+    df = df.loc[df["end_epoch"] > df["start_epoch"], INTERVAL_COLUMNS]
+    if df.empty:
+        return pd.DataFrame(columns=INTERVAL_COLUMNS + ["events"])
+    df = df.sort_values(["equipment_id", "start_epoch"], ignore_index=True)
+    eq = df["equipment_id"].to_numpy()
+    start = df["start_epoch"].to_numpy(np.int64)
+    # furthest end seen so far in the equipment; a start beyond it opens a new stop
+    reach = df.groupby("equipment_id", sort=False, observed=True)["end_epoch"].cummax().to_numpy(np.int64)
+    new = np.r_[True, (eq[1:] != eq[:-1]) | (start[1:] > reach[:-1])]
+    label = np.cumsum(new) - 1
+    out = df.groupby(label).agg(equipment_id=("equipment_id", "first"), start_epoch=("start_epoch", "min"),
+                                end_epoch=("end_epoch", "max"), events=("start_epoch", "size"))
+    return out.reset_index(drop=True)
+
+def split(df: pd.DataFrame, width: int = DAY_S, offset: int = 0) -> pd.DataFrame:
+    """
+    Cut intervals at period boundaries (periods of `width` seconds starting
+    `offset` seconds after midnight UTC). Each piece gets `period`, the epoch
+    of its period start, and `minutes`.
+    """
+    df = df[df["end_epoch"] > df["start_epoch"]]
+    s, e = df["start_epoch"].to_numpy(np.int64), df["end_epoch"].to_numpy(np.int64)
+    first, last = (s - offset) // width, (e - 1 - offset) // width
+    n = last - first + 1
+    rows = np.repeat(np.arange(len(df)), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    period = (first[rows] + k) * width + offset
+    out = df.iloc[rows].reset_index(drop=True)
+    out["start_epoch"] = np.maximum(s[rows], period)
+    out["end_epoch"] = np.minimum(e[rows], period + width)
+    out["period"] = period
+    out["minutes"] = (out["end_epoch"] - out["start_epoch"]) / 60.0
+    return out
+
+def from_status(tele: pd.DataFrame, cadence_s: int = 300) -> pd.DataFrame:
+    """
+    Downtime intervals from runs of status == 0 in telemetry (equipment_id,
+    ts, status). A sample covers [ts, ts + cadence_s); a missing sample ends
+    the run. Returns INTERVAL_COLUMNS plus `samples`.
+    """
+    t = tele[["equipment_id", "ts", "status"]].sort_values(["equipment_id", "ts"], ignore_index=True)
+    eq, ts = t["equipment_id"].to_numpy(), t["ts"].to_numpy(np.int64)
+    down = (t["status"] == 0).to_numpy()
+    same = np.r_[False, (eq[1:] == eq[:-1]) & (ts[1:] - ts[:-1] == cadence_s)]
+    # run-length encoding: a run starts wherever down does not continue a down predecessor
+    starts = down & ~(same & np.r_[False, down[:-1]])
+    ends = down & ~np.r_[same[1:] & down[1:], False]
+    s, e = np.flatnonzero(starts), np.flatnonzero(ends)
+    return pd.DataFrame({
+        "equipment_id": eq[s],
+        "start_epoch": ts[s],
+        "end_epoch": ts[e] + cadence_s,
+        "samples": e - s + 1,
+    }, columns=INTERVAL_COLUMNS + ["samples"])
+
+class DowntimeIndex:
+    """
+    Merged downtime of every equipment in sorted start/end arrays. Stops of
+    one equipment are disjoint, so their ends are sorted too and the stops
+    overlapping any range are found with two binary searches.
+    """
+
+    def __init__(self, intervals: pd.DataFrame):
+        m = merge(intervals)
+        self._starts = m["start_epoch"].to_numpy(np.int64)
+        self._ends = m["end_epoch"].to_numpy(np.int64)
+        self._events = m["events"].to_numpy(np.int64)
+        eq = m["equipment_id"].astype(str).to_numpy()
+        cut = np.flatnonzero(np.r_[True, eq[1:] != eq[:-1], True]) if len(eq) else np.array([0])
+        self._slices = {eq[a]: (a, b) for a, b in zip(cut[:-1], cut[1:])}
+
+    def equipment(self) -> list[str]:
+        return list(self._slices)
+
+    def intervals(self, equipment_id: str) -> pd.IntervalIndex:
+        a, b = self._slices.get(equipment_id, (0, 0))
+        return pd.IntervalIndex.from_arrays(self._starts[a:b], self._ends[a:b], closed="left")
+
+    def is_down(self, equipment_id: str, ts: int) -> bool:
+        a, b = self._slices.get(equipment_id, (0, 0))
+        i = a + np.searchsorted(self._ends[a:b], ts, "right")
+        return bool(i < b and self._starts[i] <= ts)
+
+    def query(self, t0: int, t1: int, equipment_ids: list[str] | None = None) -> pd.DataFrame:
+        """Stops overlapping [t0, t1), clipped to it (INTERVAL_COLUMNS plus `events`)."""
+        parts = []
+        for eid in self._slices if equipment_ids is None else equipment_ids:
+            a, b = self._slices.get(eid, (0, 0))
+            lo = a + np.searchsorted(self._ends[a:b], t0, "right")
+            hi = a + np.searchsorted(self._starts[a:b], t1, "left")
+            if hi > lo:
+                parts.append(pd.DataFrame({
+                    "equipment_id": eid,
+                    "start_epoch": np.maximum(self._starts[lo:hi], t0),
+                    "end_epoch": np.minimum(self._ends[lo:hi], t1),
+                    "events": self._events[lo:hi],
+                }))
+        if not parts:
+            return pd.DataFrame(columns=INTERVAL_COLUMNS + ["events"])
+        return pd.concat(parts, ignore_index=True)
+
+def summarize(intervals: pd.DataFrame, start_day: str, end_day: str | None = None,
+              width: int = DAY_S, offset: int = 0) -> pd.DataFrame:
+    """
+    Downtime per equipment and period over days start..end: `events` counts
+    the input intervals touching the period, `downtime_min` the minutes of
+    merged downtime inside it, so overlaps are counted once and stops
+    crossing a boundary are shared out between periods.
+    """
+    cols = ["equipment_id", "period", "events", "downtime_min"]
+    t0, t1 = day_bounds(start_day, end_day)
+    stops = split(DowntimeIndex(intervals).query(t0, t1), width, offset)
+    if stops.empty:
+        return pd.DataFrame(columns=cols)
+    raw = intervals[(intervals["start_epoch"] < t1) & (intervals["end_epoch"] > t0)]
+    raw = split(raw.assign(start_epoch=raw["start_epoch"].clip(lower=t0),
+                           end_epoch=raw["end_epoch"].clip(upper=t1)), width, offset)
+    keys = ["equipment_id", "period"]
+    raw["equipment_id"] = raw["equipment_id"].astype(str)
+    out = (stops.groupby(keys, as_index=False)["minutes"].sum().rename(columns={"minutes": "downtime_min"})
+                .merge(raw.groupby(keys).size().rename("events").reset_index(), on=keys, how="left"))
+    out["period"] = pd.to_datetime(out["period"], unit="s")
+    return out[cols].sort_values(keys, ignore_index=True)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import re
 import sys
 import sqlite3
+from contextlib import closing
 from pathlib import Path
+from itertools import chain, islice
+from typing import Iterator
 import pandas as pd
 
 # import integrity (works in tests and when run as a script)
@@ -11,88 +17,511 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 try:
-    from src.integrity import check_duplicates, check_ranges
+    from src.integrity import RULES, dq_rows, record_keys, run_checks, write_dq
+    from src.timekeys import add_time_keys, to_epoch
+    from src import costs, rollups
+    from src.db import connect, get_db_path, get_db_url, get_storage, query
+    from src import anomaly, metrics, parquet_store, postgres, scheduler, telemetry
 except Exception:
-    from integrity import check_duplicates, check_ranges
+    from integrity import RULES, dq_rows, record_keys, run_checks, write_dq
+    from timekeys import add_time_keys, to_epoch
+    import costs, rollups
+    from db import connect, get_db_path, get_db_url, get_storage, query
+    import anomaly, metrics, parquet_store, postgres, scheduler, telemetry
 
 SCHEMA = ROOT / "db" / "schema.sql"
+TELEMETRY_KEY = RULES["fact_telemetry"]["key"]
 
-def get_db_path() -> Path:
-    # read fresh each call so tests can set RT_DB_PATH after import
-    return Path(os.getenv("RT_DB_PATH", str(ROOT / "db" / "rt_mining.db")))
+# per-connection settings for the load; WAL stays on so dashboard readers keep
+# working, and the indexes in schema.sql are rebuilt once by apply_schema.
+# temp_store stays at its default (a file): a chunked load keeps every key of
+# the file in temp.seen_keys, which must not grow in RAM
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",  # 256 MiB
+)
+BULK_ROWS = 500  # rows per INSERT statement
+# bound parameters per statement
+SQLITE_MAX_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
 
 def get_raw_dir() -> Path:
     # read fresh each call so tests can set RT_DATA_DIR after import
     return Path(os.getenv("RT_DATA_DIR", str(ROOT / "data" / "raw")))
 
+# columns added after the first release, with the SQL that backfills them
+MIGRATIONS = {
+    "fact_telemetry": (
+        {"ts": "INTEGER", "day": "TEXT"},
+        "UPDATE fact_telemetry SET ts = CAST(strftime('%s', timestamp) AS INTEGER), "
+        "day = substr(timestamp, 1, 10)",
+    ),
+    "fact_downtime": (
+        {"start_epoch": "INTEGER", "end_epoch": "INTEGER", "day": "TEXT"},
+        "UPDATE fact_downtime SET start_epoch = CAST(strftime('%s', start_ts) AS INTEGER), "
+        "end_epoch = CAST(strftime('%s', end_ts) AS INTEGER), day = substr(start_ts, 1, 10)",
+    ),
+}
+
+def migrate(con: sqlite3.Connection) -> None:
+    """Add and backfill columns missing from databases built by older versions."""
+    for table, (cols, backfill) in MIGRATIONS.items():
+        have = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+        missing = [c for c in cols if c not in have]
+        if not have or not missing:
+            continue
+        for col in missing:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {col} {cols[col]}")
+        con.execute(backfill)
+        print(f"→ migrated {table}: added {', '.join(missing)}")
+
+def statements(script: str) -> list[str]:
+    """The complete SQL statements of script, in order."""
+    out, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    return out
+
+def apply_schema(con: sqlite3.Connection) -> None:
+    if postgres.is_postgres(con):
+        con.executescript(postgres.SCHEMA.read_text())
+    else:
+        # one execute per statement: executescript would commit the caller's
+        # transaction first, and the scheduler's schema task commits as one
+        stmts = statements(Path(SCHEMA).read_text())
+        pragmas = [s for s in stmts if s.upper().startswith("PRAGMA")]
+        for stmt in pragmas:  # journal_mode only changes outside a transaction
+            con.execute(stmt)
+        migrate(con)
+        for stmt in stmts:
+            if stmt not in pragmas:
+                con.execute(stmt)
+    rollups.backfill(con)
+    costs.backfill(con)
+
 def ensure_db() -> None:
-    db = get_db_path()
-    with sqlite3.connect(db) as con:
-        con.executescript(Path(SCHEMA).read_text())
-    print("✅ Database schema created at", db)
+    with closing(connect()) as con, con:
+        apply_schema(con)
+    where = postgres.redact(get_db_url()) if postgres.is_postgres(con) else get_db_path()
+    print("✅ Database schema created at", where)
+
+def table_ddl(name: str) -> str:
+    """The CREATE TABLE statement for name as declared in schema.sql."""
+    m = re.search(rf"CREATE TABLE IF NOT EXISTS {name}\s*\(.*?\n\);", Path(SCHEMA).read_text(), re.S)
+    if m is None:
+        raise ValueError(f"{name} is not declared in {SCHEMA.name}")
+    return m.group(0)
+
+def _columns(df: pd.DataFrame) -> list[list]:
+    """df's columns as lists of values sqlite3 can bind."""
+    # tolist() hands sqlite3 plain Python scalars without a per-row pandas hop
+    cols = []
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.astype(str).where(s.notna(), None)
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.hasnans:
+            # pd.NA of a nullable column (e.g. a missing Int8 status) binds as NULL
+            s = s.astype(object).where(s.notna(), None)
+        cols.append(s.tolist())
+    return cols
+
+def _batches(df: pd.DataFrame, rows: int) -> Iterator[list]:
+    """Flattened parameter lists of up to `rows` rows each, in row order."""
+    cols = _columns(df)
+    for a in range(0, len(df), rows):
+        yield list(chain.from_iterable(zip(*(c[a:a + rows] for c in cols))))
+
+def bulk_load(con: sqlite3.Connection, name: str, df: pd.DataFrame, mode: str = "replace") -> None:
+    """
+    Insert df into the table declared in schema.sql, keeping its keys.
+
+    mode="replace" drops and recreates the table from its declared DDL (which
+    also drops its secondary indexes until apply_schema rebuilds them),
+    "append" inserts into the existing table. Rows go through one
+    executemany of multi-row INSERTs in the caller's transaction, which
+    halves the per-row statement overhead; a repeated primary key keeps the
+    last row, as the duplicate is already recorded by the DQ checks.
+    On Postgres the rows go through COPY instead (postgres.copy_load).
+    """
+    if postgres.is_postgres(con):
+        return postgres.copy_load(con, name, df, mode)
+    if mode == "replace":
+        con.execute(f"DROP TABLE IF EXISTS {name}")
+        con.execute(table_ddl(name))
+    if df.empty:
+        return
+    per_stmt = max(1, min(BULK_ROWS, SQLITE_MAX_PARAMS // len(df.columns)))
+    cols, values = list(df.columns), ["?"] * len(df.columns)
+    if "load_ts" not in cols and any(r[1] == "load_ts" for r in con.execute(f"PRAGMA table_info({name})")):
+        # one literal for the batch instead of evaluating the datetime('now') default per row
+        load_ts = con.execute("SELECT datetime('now')").fetchone()[0]
+        cols, values = cols + ["load_ts"], values + [f"'{load_ts}'"]
+    row = f"({', '.join(values)})"
+    sql = f"INSERT OR REPLACE INTO {name} ({', '.join(cols)}) VALUES "
+    full, rest = divmod(len(df), per_stmt)
+    batches = _batches(df, per_stmt)
+    if full:
+        con.executemany(sql + ", ".join([row] * per_stmt), islice(batches, full))
+    if rest:
+        con.execute(sql + ", ".join([row] * rest), next(batches))
+
+def bump_data_version(con: sqlite3.Connection) -> None:
+    """Mark the data as changed so readers drop cached results (see query_cache.py)."""
+    con.execute("""
+        INSERT INTO etl_version (id, version) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET version = etl_version.version + 1, updated_ts = datetime('now')
+    """)
+
+def read_csv(path: Path, table: str, **kwargs) -> pd.DataFrame:
+    with metrics.stage("read_csv", table=table) as m:
+        df = pd.read_csv(path, **kwargs)
+        m["bytes"] = Path(path).stat().st_size
+        if not kwargs.get("chunksize"):
+            m["rows"] = len(df)
+    return df
 
 def load_table(con: sqlite3.Connection, name: str, df: pd.DataFrame, if_exists: str = "replace") -> None:
-    df.to_sql(name, con, if_exists=if_exists, index=False)
+    with metrics.stage("write", table=name) as m:
+        bulk_load(con, name, df, if_exists)
+        m["rows"] = len(df)
     print(f"→ loaded {name}: {len(df)} rows")
 
-def load_all() -> None:
-    ensure_db()
-    db = get_db_path()
+def upsert_table(con: sqlite3.Connection, name: str, df: pd.DataFrame, keys: list[str]) -> None:
+    if postgres.is_postgres(con):
+        # COPY into a stage, then INSERT ... ON CONFLICT on the table's key
+        with metrics.stage("write", table=name) as m:
+            postgres.copy_load(con, name, df, "append")
+            m["rows"] = len(df)
+        print(f"→ upserted {name}: {len(df)} rows")
+        return
+    cols = list(df.columns)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c not in keys)
+    sql = (
+        f"INSERT INTO {name} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+    with metrics.stage("write", table=name) as m:
+        con.executemany(sql, zip(*_columns(df)))
+        m["rows"] = len(df)
+    print(f"→ upserted {name}: {len(df)} rows")
+
+def ensure_unique_key(con: sqlite3.Connection, table: str, keys: list[str]) -> None:
+    # tables written by the old to_sql loader have no primary key; restore it once
+    if postgres.is_postgres(con):
+        return  # schema_pg.sql always declares them
+    for _, idx, unique, *_ in con.execute(f"PRAGMA index_list({table})").fetchall():
+        cols = [r[2] for r in con.execute(f"PRAGMA index_info({idx})")]
+        if unique and sorted(cols) == sorted(keys):
+            return
+    key = ", ".join(keys)
+    con.execute(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT MAX(rowid) FROM {table} GROUP BY {key})")
+    con.execute(f"CREATE UNIQUE INDEX ux_{table}_key ON {table} ({key})")
+
+def get_watermarks(con: sqlite3.Connection, table: str) -> dict[str, pd.Timestamp]:
+    """Per-equipment high-water mark (latest loaded timestamp) for a table."""
+    sql = "SELECT equipment_id, high_water_ts FROM etl_watermark WHERE table_name = ?"
+    rows = con.execute(sql, (table,)).fetchall()
+    if not rows:
+        # first incremental run against a table loaded before watermarks existed
+        con.execute(f"""
+            INSERT INTO etl_watermark (table_name, equipment_id, high_water_ts)
+            SELECT ?, equipment_id, MAX(timestamp) FROM {table} GROUP BY equipment_id
+        """, (table,))
+        rows = con.execute(sql, (table,)).fetchall()
+    return {eid: pd.Timestamp(ts) for eid, ts in rows}
+
+def update_watermarks(con: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    marks = df.groupby("equipment_id", observed=True)["timestamp"].max()
+    con.executemany("""
+        INSERT INTO etl_watermark (table_name, equipment_id, high_water_ts) VALUES (?, ?, ?)
+        ON CONFLICT (table_name, equipment_id) DO UPDATE SET
+            high_water_ts = max(etl_watermark.high_water_ts, excluded.high_water_ts),
+            updated_ts = datetime('now')
+    """, ((table, eid, ts) for eid, ts in marks.items()))
+
+def new_rows(df: pd.DataFrame, marks: dict[str, pd.Timestamp]) -> pd.DataFrame:
+    """Rows newer than their equipment's high-water mark (unknown equipment: all rows)."""
+    # to_datetime: with no mark for any row map() gives float NaNs, not NaT
+    hw = pd.to_datetime(df["equipment_id"].astype(str).map(marks))
+    return df[hw.isna() | (df["timestamp"] > hw)]
+
+def pending_days(con: sqlite3.Connection, table: str) -> set[str]:
+    """Days a chunked load of table committed whose rollups were not refreshed yet."""
+    return {d for (d,) in con.execute("SELECT day FROM etl_pending_day WHERE table_name = ?", (table,))}
+
+def stored_keys(con: sqlite3.Connection, keys: pd.DataFrame) -> pd.DataFrame:
+    """Keys of this batch that fact_telemetry already holds (sent again, or by another file)."""
+    con.execute("""CREATE TEMP TABLE IF NOT EXISTS batch_keys
+        (timestamp TEXT, equipment_id TEXT, PRIMARY KEY (timestamp, equipment_id)) WITHOUT ROWID""")
+    con.execute("DELETE FROM temp.batch_keys")
+    con.executemany("INSERT OR IGNORE INTO temp.batch_keys VALUES (?, ?)",
+                    keys.itertuples(index=False, name=None))
+    return query(con, """
+        SELECT k.timestamp, k.equipment_id
+        FROM temp.batch_keys k JOIN fact_telemetry t USING (timestamp, equipment_id)
+    """)
+
+def _seen_before(con: sqlite3.Connection, keys: pd.DataFrame) -> pd.DataFrame:
+    """Keys that already appeared in an earlier chunk of this load (and mark these as seen)."""
+    con.execute("DELETE FROM temp.chunk_keys")
+    con.executemany("INSERT OR IGNORE INTO temp.chunk_keys VALUES (?, ?)",
+                    keys.itertuples(index=False, name=None))
+    prev = query(con, """
+        SELECT c.timestamp, c.equipment_id
+        FROM temp.chunk_keys c JOIN temp.seen_keys s USING (timestamp, equipment_id)
+    """)
+    con.execute("INSERT OR IGNORE INTO temp.seen_keys SELECT * FROM temp.chunk_keys")
+    return prev
+
+def parse_telemetry(path: Path, chunksize: int | None = None):
+    """telemetry.csv as one frame, or with chunksize a reader of chunks parsed as they are read."""
+    # compact ids and status; measures stay float64 as they are stored as read
+    return read_csv(path, "fact_telemetry", dtype=telemetry.csv_dtypes("float64"),
+                    parse_dates=["timestamp"], chunksize=chunksize)
+
+def load_telemetry(con: sqlite3.Connection, path: Path, incremental: bool = False,
+                   chunksize: int | None = None, parsed=None) -> set[str]:
+    """
+    Check and load telemetry.csv into fact_telemetry; returns the days written.
+    parsed is parse_telemetry(path, chunksize) when it was already started.
+
+    Without chunksize nothing is committed here, so the caller's transaction
+    covers the whole table. With chunksize set the file is streamed: each
+    chunk is checked and written in its own transaction, so memory is bounded
+    by the chunk rather than the file. Keys seen in earlier chunks are tracked in a disk-backed temp table
+    so duplicates across chunk boundaries are still reported. The days each
+    chunk wrote are recorded in etl_pending_day with it: an incremental load
+    that failed part-way skips the committed rows when it is run again, so
+    their days come back from there; the caller clears them once the
+    rollups are refreshed.
+
+    With RT_STORAGE=parquet the rows are also written to the partitioned
+    Parquet dataset (see parquet_store.py). Every chunk is scored for
+    anomalies (see anomaly.py) in the same transaction as its rows.
+    """
+    chunked = chunksize is not None
+    parquet = get_storage() == "parquet"
+    if chunked:
+        for t in ("seen_keys", "chunk_keys"):
+            con.execute(f"""CREATE TEMP TABLE IF NOT EXISTS {t}
+                (timestamp TEXT, equipment_id TEXT, PRIMARY KEY (timestamp, equipment_id)) WITHOUT ROWID""")
+        con.execute("DELETE FROM temp.seen_keys")
+
+    marks = {}
+    if incremental:
+        ensure_unique_key(con, "fact_telemetry", TELEMETRY_KEY)
+        marks = get_watermarks(con, "fact_telemetry")
+    else:
+        con.execute("DELETE FROM etl_watermark WHERE table_name = 'fact_telemetry'")
+        # a full reload replays the whole history through the detector
+        anomaly.reset(con)
+    if chunked:
+        con.commit()
+
+    reader = parse_telemetry(path, chunksize) if parsed is None else parsed
+    total = n = 0
+    days: set[str] = set()
+    if chunked and incremental:
+        days.update(pending_days(con, "fact_telemetry"))
+    chunks = metrics.iter_stage("parse_chunk", reader, table="fact_telemetry") if chunked else [reader]
+    for n, tele in enumerate(chunks, 1):
+        if chunked:
+            # the first chunk drops and recreates the table: keep that in its transaction
+            scheduler.begin(con)
+        if incremental:
+            tele = new_rows(tele, marks)
+        with metrics.stage("time_keys", table="fact_telemetry") as m:
+            telemetry.compact(tele, "float64")
+            add_time_keys(tele)
+            tele["timestamp"] = tele["timestamp"].astype(str)
+            m["rows"] = len(tele)
+
+        with metrics.stage("dq_checks", table="fact_telemetry") as m:
+            dq = run_checks(tele, "fact_telemetry")
+            if chunked:
+                prev = _seen_before(con, tele[TELEMETRY_KEY].drop_duplicates())
+                if not prev.empty:
+                    dq = pd.concat([dq, dq_rows("fact_telemetry", record_keys(prev, TELEMETRY_KEY),
+                                                "duplicate_key", "HIGH")]).drop_duplicates()
+            write_dq(con, dq)
+            m["rows"] = len(tele)
+
+        if incremental:
+            upsert_table(con, "fact_telemetry", tele, TELEMETRY_KEY)
+        else:
+            with metrics.stage("write", table="fact_telemetry") as m:
+                bulk_load(con, "fact_telemetry", tele, "replace" if n == 1 else "append")
+                m["rows"] = len(tele)
+        if parquet:
+            with metrics.stage("parquet_write", table="fact_telemetry") as m:
+                parquet_store.write(tele, "upsert" if incremental else "replace" if n == 1 else "append")
+                m["rows"] = len(tele)
+        with metrics.stage("anomaly", table="fact_telemetry") as m:
+            anomaly.process(con, tele)
+            m["rows"] = len(tele)
+        with metrics.stage("commit", table="fact_telemetry"):
+            update_watermarks(con, "fact_telemetry", tele)
+            if chunked:
+                con.executemany("INSERT OR IGNORE INTO etl_pending_day (table_name, day) VALUES (?, ?)",
+                                (("fact_telemetry", d) for d in tele["day"].unique()))
+                con.commit()
+        total += len(tele)
+        days.update(tele["day"].unique())
+
+    if chunked:
+        print(f"→ loaded fact_telemetry: {total} rows in {n} chunks")
+    elif not incremental:
+        print(f"→ loaded fact_telemetry: {total} rows")
+    return days
+
+def load_all(incremental: bool = False, chunksize: int | None = None, workers: int | None = None,
+             retries: int = 0, if_changed: bool = False) -> None:
+    """
+    Load every raw CSV into the database.
+
+    With incremental=True, fact_telemetry is not replaced: only rows newer than
+    each equipment's high-water mark are checked and upserted on
+    (timestamp, equipment_id), so the write cost follows the new batch size.
+    chunksize streams telemetry.csv in chunks of that many rows.
+
+    The load runs as the task graph from tasks() through scheduler.py: the
+    CSVs are parsed concurrently on `workers` threads, each table is written
+    and committed as one task, and a load that failed part-way resumes after
+    its last committed task when run again on the same inputs (or on one of
+    `retries` immediate retries). if_changed skips the load when the last one
+    on the same inputs finished.
+
+    Each stage is timed through metrics.py when RT_METRICS_FILE is set, and
+    RT_PROFILE_DIR dumps a cProfile/tracemalloc report for the run.
+    """
+    with metrics.profiled("etl"), metrics.stage("load_all"):
+        _load_all(incremental, chunksize, workers, retries, if_changed)
+    metrics.flush()
+
+def run_key(incremental: bool, raw: Path | None = None) -> str:
+    """Identifies a load by its mode and its inputs (name, size and mtime of each raw CSV)."""
+    raw = raw or get_raw_dir()
+    files = [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in sorted(raw.glob("*.csv"))]
+    blob = json.dumps([str(raw.resolve()), incremental, files]).encode()
+    return hashlib.sha1(blob).hexdigest()
+
+def tasks(incremental: bool = False, chunksize: int | None = None) -> list[scheduler.Task]:
+    """
+    The load as a task graph: one task per table, telemetry and the other
+    equipment tables after dim_equipment, costs after what it prices, and
+    schema (indexes, data version) last.
+    """
     raw = get_raw_dir()
+    Task = scheduler.Task
+
+    def load(name: str, parse, checked: bool = True, deps: tuple[str, ...] = (), priced: bool = False) -> Task:
+        def run(con, df, _):
+            if checked:
+                with metrics.stage("dq_checks", table=name) as m:
+                    write_dq(con, run_checks(df, name))
+                    m["rows"] = len(df)
+            # a price or assay curve returns where it changed, for the costs task
+            since = costs.changed_since(con, name, df) if priced and incremental else None
+            load_table(con, name, df)
+            return since
+        return Task(name, run, parse, deps)
+
+    def load_telemetry_task(con, parsed, _):
+        days = load_telemetry(con, raw / "telemetry.csv", incremental=incremental, chunksize=chunksize,
+                              parsed=parsed)
+        # only days that received rows need their rollups recomputed
+        with metrics.stage("rollups"):
+            rollups.refresh(con, days if incremental else None)
+        con.execute("DELETE FROM etl_pending_day WHERE table_name = 'fact_telemetry'")
+        return sorted(days)
+
+    def parse_downtime():
+        downtime = read_csv(raw / "downtime_events.csv", "fact_downtime")
+        with metrics.stage("time_keys", table="fact_downtime") as m:
+            add_time_keys(downtime, "start_ts", "start_epoch")
+            downtime["end_epoch"] = to_epoch(downtime["end_ts"])
+            m["rows"] = len(downtime)
+        return downtime
+
+    def refresh_costs(con, _, results):
+        # a full load re-costs every day; an incremental one the days with new
+        # telemetry and those from where a reloaded price or assay changed
+        days = None
+        if incremental:
+            changed = [results[t] for t in ("fact_power_price", "fact_lab_assays") if results[t] is not None]
+            days = set(results["fact_telemetry"])
+            if changed:
+                days |= costs.days_since(con, min(changed))
+        with metrics.stage("costs"):
+            costs.refresh(con, days)
+
+    def finish(con, *_):
+        # replaced tables lose their indexes; put them back
+        with metrics.stage("schema"):
+            apply_schema(con)
+        bump_data_version(con)
+
+    graph = [
+        load("dim_equipment", lambda: read_csv(raw / "equipment_metadata.csv", "dim_equipment"),
+             checked=False),
+        Task("fact_telemetry", load_telemetry_task, lambda: parse_telemetry(raw / "telemetry.csv", chunksize),
+             deps=("dim_equipment",)),
+        load("fact_downtime", parse_downtime, deps=("dim_equipment",)),
+        load("fact_lab_assays", lambda: read_csv(raw / "lab_assays.csv", "fact_lab_assays"), priced=True),
+        load("fact_power_price", lambda: read_csv(raw / "power_prices.csv", "fact_power_price"), priced=True),
+        load("benchmarks", lambda: read_csv(raw / "benchmarks.csv", "benchmarks"), checked=False,
+             deps=("dim_equipment",)),
+        Task("costs", refresh_costs, deps=("fact_telemetry", "fact_lab_assays", "fact_power_price")),
+    ]
+    return graph + [Task("schema", finish, deps=tuple(t.name for t in graph))]
+
+def _load_all(incremental: bool, chunksize: int | None, workers: int | None, retries: int,
+              if_changed: bool) -> None:
+    ensure_db()
+    key = run_key(incremental)
+    with closing(connect()) as con, con:
+        if if_changed and scheduler.is_done(con, key):
+            print("→ raw data unchanged since the last load; skipped")
+            return
+        for pragma in LOAD_PRAGMAS:
+            con.execute(pragma)
+        scheduler.run(con, tasks(incremental, chunksize), key=key, workers=workers, retries=retries)
 
-    with sqlite3.connect(db) as con:
-        # dim_equipment
-        dim_equipment = pd.read_csv(raw / "equipment_metadata.csv")
-        load_table(con, "dim_equipment", dim_equipment)
-
-        # fact_telemetry + Data Quality
-        tele = pd.read_csv(raw / "telemetry.csv", parse_dates=["timestamp"])
-        dups = check_duplicates(tele, ["timestamp", "equipment_id"])
-        rng = check_ranges(
-            tele,
-            {
-                "throughput_tph": (0, 1000),
-                "power_kw": (0, 5000),
-                "temperature_c": (-10, 120),
-                "pressure_kpa": (0, 500),
-                "status": (0, 1),
-            },
-        )
-
-        if not dups.empty:
-            (
-                dups.assign(
-                    table_name="fact_telemetry",
-                    record_key=dups.astype(str).agg("|".join, axis=1),
-                    check_name="duplicate_key",
-                    check_result="FAIL",
-                    severity="HIGH",
-                )[["table_name", "record_key", "check_name", "check_result", "severity"]]
-                .to_sql("data_quality", con, if_exists="append", index=False)
-            )
-
-        if not rng.empty:
-            (
-                rng[["timestamp", "equipment_id"]]
-                .astype(str)
-                .drop_duplicates()
-                .assign(
-                    table_name="fact_telemetry",
-                    record_key=lambda d: d.astype(str).agg("|".join, axis=1),
-                    check_name="out_of_range",
-                    check_result="FAIL",
-                    severity="MEDIUM",
-                )[["table_name", "record_key", "check_name", "check_result", "severity"]]
-                .to_sql("data_quality", con, if_exists="append", index=False)
-            )
-
-        tele["timestamp"] = tele["timestamp"].astype(str)
-        load_table(con, "fact_telemetry", tele)
-
-        load_table(con, "fact_downtime", pd.read_csv(raw / "downtime_events.csv"))
-        load_table(con, "fact_lab_assays", pd.read_csv(raw / "lab_assays.csv"))
-        load_table(con, "fact_power_price", pd.read_csv(raw / "power_prices.csv"))
-        load_table(con, "benchmarks", pd.read_csv(raw / "benchmarks.csv"))
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Load raw CSVs into the mining database.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="append/upsert only telemetry newer than the stored high-water marks")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help="stream telemetry.csv in chunks of this many rows")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="threads parsing the raw CSVs (default: CPUs + 4, at most 32)")
+    ap.add_argument("--retries", type=int, default=0,
+                    help="retry a failed load this many times, resuming after its last finished task")
+    ap.add_argument("--every", type=float, default=None, metavar="SECONDS",
+                    help="keep running: load every SECONDS when the raw CSVs changed")
+    ap.add_argument("--migrate", action="store_true",
+                    help="only upgrade an existing database to the current schema")
+    ap.add_argument("--metrics", default=None,
+                    help="write stage metrics here (.prom: Prometheus textfile, else JSON lines)")
+    ap.add_argument("--profile", default=None, help="dump cProfile/tracemalloc output into this dir")
+    args = ap.parse_args(argv)
+    if args.metrics:
+        os.environ["RT_METRICS_FILE"] = args.metrics
+    if args.profile:
+        os.environ["RT_PROFILE_DIR"] = args.profile
+    opts = dict(incremental=args.incremental, chunksize=args.chunksize, workers=args.workers,
+                retries=args.retries)
+    if args.migrate:
+        ensure_db()
+    elif args.every:
+        scheduler.run_every(args.every, lambda: load_all(**opts, if_changed=True))
+    else:
+        load_all(**opts)
 
 if __name__ == "__main__":
-    load_all()
+    main()
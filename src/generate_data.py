@@ -1,70 +1,204 @@
 from __future__ import annotations
-from pathlib import Path 
-import numpy as np 
-import pandas as pd 
-from datetime import datetime, timedelta
-
-ROOT = Path(__file__).resolve().parent.parent 
-RAW = ROOT / "data" / "raw"
-RAW.mkdir(parents=True, exist_ok=True)
-np.random.seed(7)
-
-
-equip = pd.DataFrame([
-    {"equipment_id":"CR-01","area":"Crusher","commissioned_date":"2020-01-01","nameplate_tph":450},
-    {"equipment_id":"SAG-01","area":"SAG_Mill","commissioned_date":"2020-01-01","nameplate_tph":300}
-])
-equip.to_csv(RAW/"equipment_metadata.csv", index=False)
-
-
-# telemtry: 1 day, 5-min cadence
-start = datetime(2025, 8, 1, 0, 0, 0)
-times = [start + timedelta(minutes=5*i) for i in range(288)]
-rows = []
-
-for eid, area, base_tph in [("CR-01","Crusher",380), ("SAG-01","SAG_Mill",260)]:
-    nameplate = int(equip.loc[equip.equipment_id==eid,"nameplate_tph"].iloc[0])
-    for t in times:
-        diur = np.sin(2*np.pi*((t.hour*60+t.minute)/1440))
-        tph = np.clip(base_tph*(1+0.05*diur)+np.random.normal(0,12), 0, nameplate*1.05)
-        pkw = np.clip((400 if area=="Crusher" else 1200) + 3.0*tph + np.random.normal(0,15), 0, None)
-        rows.append({
-            "timestamp": t.isoformat(),
-            "equipment_id": eid,
-            "area": area,
-            "throughput_tph": round(float(tph),3),
-            "power_kw": round(float(pkw),3),
-            "temperature_c": round(35+5*diur+np.random.normal(0,1.2),3),
-            "pressure_kpa": round(200+20*diur+np.random.normal(0,4),3),
-            "status": 1
+from pathlib import Path
+from typing import Iterator
+import argparse, os
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (id prefix, area, base tph, nameplate tph, idle kW); equipment cycle through these,
+# so n_equipment=2 gives the original CR-01 / SAG-01 pair
+AREAS = [
+    ("CR", "Crusher", 380, 450, 400),
+    ("SAG", "SAG_Mill", 260, 300, 1200),
+]
+REASONS = np.array(["Maintenance", "Breakdown", "Blocked chute", "Power trip", "Liner change"])
+
+def get_raw_dir() -> Path:
+    # same default and override as etl.get_raw_dir
+    return Path(os.getenv("RT_DATA_DIR", str(ROOT / "data" / "raw")))
+
+def equipment(n: int) -> pd.DataFrame:
+    idx = np.arange(n)
+    spec = [AREAS[i % len(AREAS)] for i in idx]
+    return pd.DataFrame({
+        "equipment_id": [f"{p}-{i // len(AREAS) + 1:02d}" for i, (p, *_) in zip(idx, spec)],
+        "area": [s[1] for s in spec],
+        "commissioned_date": "2020-01-01",
+        "nameplate_tph": [s[3] for s in spec],
+        "_base_tph": [s[2] for s in spec],
+        "_idle_kw": [s[4] for s in spec],
+    })
+
+def _downtime_events(rng: np.random.Generator, equip: pd.DataFrame, times: pd.DatetimeIndex,
+                     cadence_min: int, rate: float) -> pd.DataFrame:
+    """Random stops covering about `rate` of each equipment's intervals (mean 30 min)."""
+    mean_len = max(1, round(30 / cadence_min))
+    per_equip = rng.poisson(rate * len(times) / mean_len, len(equip))
+    n = per_equip.sum()
+    eq = np.repeat(np.arange(len(equip)), per_equip)
+    start = rng.integers(0, len(times), n)
+    length = rng.geometric(1 / mean_len, n)
+    end = np.minimum(start + length, len(times))
+    step = pd.Timedelta(minutes=cadence_min)
+    return pd.DataFrame({
+        "_eq": eq, "_start": start, "_end": end,
+        "equipment_id": equip["equipment_id"].to_numpy()[eq],
+        "start_ts": times[start].strftime("%Y-%m-%dT%H:%M:%S"),
+        "end_ts": (times[end - 1] + step).strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration_min": ((end - start) * cadence_min).astype(float),
+        "reason": rng.choice(REASONS, n),
+    }).sort_values(["equipment_id", "start_ts"], ignore_index=True)
+
+def _down_mask(events: pd.DataFrame, n_equipment: int, n_times: int) -> np.ndarray:
+    """(n_times, n_equipment) bool array, True while a stop is active."""
+    delta = np.zeros((n_times + 1, n_equipment), dtype=np.int32)
+    np.add.at(delta, (events["_start"].to_numpy(), events["_eq"].to_numpy()), 1)
+    np.add.at(delta, (events["_end"].to_numpy(), events["_eq"].to_numpy()), -1)
+    return np.cumsum(delta, axis=0)[:-1] > 0
+
+def iter_telemetry(n_equipment: int = 2, days: int = 1, cadence_min: int = 5,
+                   start: str = "2025-08-01", dup_rate: float = 0.0, out_of_range_rate: float = 0.0,
+                   downtime_rate: float = 0.0, seed: int = 7, chunk_rows: int | None = None,
+                   ) -> Iterator[pd.DataFrame]:
+    """
+    Synthetic telemetry in time-ordered chunks of about chunk_rows rows
+    (None: one frame). Every column is drawn as a whole array per chunk.
+
+    dup_rate re-emits that fraction of rows with the same key,
+    out_of_range_rate pushes that fraction of rows outside the DQ ranges and
+    downtime_rate stops equipment for that fraction of intervals.
+    """
+    rng = np.random.default_rng(seed)
+    equip = equipment(n_equipment)
+    times = pd.date_range(start, periods=days * 24 * 60 // cadence_min, freq=f"{cadence_min}min")
+    events = _downtime_events(rng, equip, times, cadence_min, downtime_rate)
+    down = _down_mask(events, n_equipment, len(times))
+
+    ids = equip["equipment_id"].to_numpy()
+    area_names, area_idx = np.unique(equip["area"].to_numpy(), return_inverse=True)
+    base = equip["_base_tph"].to_numpy(float)
+    cap = equip["nameplate_tph"].to_numpy(float) * 1.05
+    idle = equip["_idle_kw"].to_numpy(float)
+    step = len(times) if chunk_rows is None else max(1, chunk_rows // n_equipment)
+
+    for a in range(0, len(times), step):
+        t = times[a:a + step]
+        shape = (len(t), n_equipment)
+        minute = (t.hour * 60 + t.minute).to_numpy()
+        diur = np.sin(2 * np.pi * minute / 1440)[:, None]
+        run = ~down[a:a + step]
+        codes = np.tile(np.arange(n_equipment), len(t))
+        area_codes = np.tile(area_idx, len(t))
+
+        tph = np.clip(base * (1 + 0.05 * diur) + rng.normal(0, 12, shape), 0, cap) * run
+        pkw = np.clip(np.where(run, idle, 0.1 * idle) + 3.0 * tph + rng.normal(0, 15, shape), 0, None)
+        temp = 35 + 5 * diur + rng.normal(0, 1.2, shape)
+        kpa = 200 + 20 * diur + rng.normal(0, 4, shape)
+        if out_of_range_rate:
+            bad = rng.random(shape) < out_of_range_rate
+            tph = np.where(bad, -tph - 1, tph)
+
+        df = pd.DataFrame({
+            "timestamp": np.repeat(t.to_numpy(), n_equipment),
+            "equipment_id": pd.Categorical.from_codes(codes, categories=ids),
+            "area": pd.Categorical.from_codes(area_codes, categories=area_names),
+            "throughput_tph": tph.ravel().round(3),
+            "power_kw": pkw.ravel().round(3),
+            "temperature_c": temp.ravel().round(3),
+            "pressure_kpa": kpa.ravel().round(3),
+            "status": run.ravel().astype(np.int8),
         })
-telemetry = pd.DataFrame(rows)
-telemetry.to_csv(RAW/"telemetry.csv", index=False)
-
-# --- downtime (one short event)
-pd.DataFrame([{
-    "equipment_id":"CR-01",
-    "start_ts": (start + timedelta(hours=6)).isoformat(),
-    "end_ts":   (start + timedelta(hours=6, minutes=30)).isoformat(),
-    "duration_min": 30.0,
-    "reason":"Maintenance"
-}]).to_csv(RAW/"downtime_events.csv", index=False)
-
-# --- lab assays (daily)
-pd.DataFrame([{
-    "date":"2025-08-01",
-    "ore_grade_pct": 0.52,
-    "moisture_pct": 0.09,
-    "bond_work_index_kwhpt": 14.8
-}]).to_csv(RAW/"lab_assays.csv", index=False)
-
-# --- power price
-pd.DataFrame([{"date":"2025-08-01","usd_per_mwh": 57.25}]).to_csv(RAW/"power_prices.csv", index=False)
-
-# --- benchmarks
-pd.DataFrame([
-    {"equipment_id":"CR-01","target_utilization_pct":92.0,"max_specific_energy_kwhpt":15.0,"min_throughput_tph":270},
-    {"equipment_id":"SAG-01","target_utilization_pct":92.0,"max_specific_energy_kwhpt":22.0,"min_throughput_tph":180},
-]).to_csv(RAW/"benchmarks.csv", index=False)
-
-print("created data written to", RAW)
\ No newline at end of file
+        if dup_rate:
+            df = pd.concat([df, df[rng.random(len(df)) < dup_rate]], ignore_index=True)
+        yield df
+
+def generate(out_dir: Path | None = None, n_equipment: int = 2, days: int = 1, cadence_min: int = 5,
+             start: str = "2025-08-01", dup_rate: float = 0.0, out_of_range_rate: float = 0.0,
+             downtime_rate: float = 0.0, seed: int = 7, chunk_rows: int | None = None,
+             price_freq: str = "D") -> Path:
+    """
+    Write the raw CSVs the ETL expects into out_dir (default: RT_DATA_DIR or
+    data/raw) and return it. Telemetry is streamed to disk chunk by chunk.
+    price_freq="h" writes hourly power prices instead of daily ones.
+    """
+    out = Path(out_dir or get_raw_dir())
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed + 1)
+    equip = equipment(n_equipment)
+    equip.drop(columns=["_base_tph", "_idle_kw"]).to_csv(out / "equipment_metadata.csv", index=False)
+
+    rows = 0
+    for i, df in enumerate(iter_telemetry(n_equipment, days, cadence_min, start, dup_rate,
+                                          out_of_range_rate, downtime_rate, seed, chunk_rows)):
+        df.to_csv(out / "telemetry.csv", index=False, mode="w" if i == 0 else "a", header=i == 0,
+                  date_format="%Y-%m-%dT%H:%M:%S")
+        rows += len(df)
+
+    times = pd.date_range(start, periods=days * 24 * 60 // cadence_min, freq=f"{cadence_min}min")
+    if downtime_rate:
+        # same seed and draws as iter_telemetry, so events line up with status == 0
+        events = _downtime_events(np.random.default_rng(seed), equip, times, cadence_min, downtime_rate)
+        events = events.drop(columns=["_eq", "_start", "_end"])
+    else:
+        # one short maintenance stop, as in the original sample data
+        t0 = pd.Timestamp(start) + pd.Timedelta(hours=6)
+        events = pd.DataFrame([{
+            "equipment_id": equip["equipment_id"].iloc[0],
+            "start_ts": t0.isoformat(),
+            "end_ts": (t0 + pd.Timedelta(minutes=30)).isoformat(),
+            "duration_min": 30.0,
+            "reason": "Maintenance",
+        }])
+    events.to_csv(out / "downtime_events.csv", index=False)
+
+    dates = pd.date_range(start, periods=days, freq="D").strftime("%Y-%m-%d")
+    pd.DataFrame({
+        "date": dates,
+        "ore_grade_pct": rng.normal(0.52, 0.03, days).round(3),
+        "moisture_pct": rng.normal(0.09, 0.01, days).round(3),
+        "bond_work_index_kwhpt": rng.normal(14.8, 0.6, days).round(2),
+    }).to_csv(out / "lab_assays.csv", index=False)
+    daily_price = 57.25 + np.cumsum(rng.normal(0, 1.5, days))
+    if price_freq == "h":
+        hours = pd.date_range(start, periods=days * 24, freq="h")
+        # evening peak, night trough
+        shape = 1 + 0.25 * np.sin(2 * np.pi * (hours.hour.to_numpy() - 12) / 24)
+        prices = pd.DataFrame({"date": hours.strftime("%Y-%m-%dT%H:%M:%S"),
+                               "usd_per_mwh": (np.repeat(daily_price, 24) * shape).round(2)})
+    elif price_freq == "D":
+        prices = pd.DataFrame({"date": dates, "usd_per_mwh": daily_price.round(2)})
+    else:
+        raise ValueError(f"price_freq must be 'D' or 'h', got {price_freq!r}")
+    prices.to_csv(out / "power_prices.csv", index=False)
+
+    pd.DataFrame({
+        "equipment_id": equip["equipment_id"],
+        "target_utilization_pct": 92.0,
+        "max_specific_energy_kwhpt": np.where(equip["area"] == "Crusher", 15.0, 22.0),
+        "min_throughput_tph": np.where(equip["area"] == "Crusher", 270, 180),
+    }).to_csv(out / "benchmarks.csv", index=False)
+
+    print(f"created data written to {out} ({rows} telemetry rows)")
+    return out
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Generate synthetic raw CSVs for the ETL.")
+    ap.add_argument("--out", type=Path, default=None, help="output dir (default: RT_DATA_DIR or data/raw)")
+    ap.add_argument("--equipment", type=int, default=2)
+    ap.add_argument("--days", type=int, default=1)
+    ap.add_argument("--cadence", type=int, default=5, help="minutes between samples")
+    ap.add_argument("--start", default="2025-08-01")
+    ap.add_argument("--dup-rate", type=float, default=0.0)
+    ap.add_argument("--oor-rate", type=float, default=0.0, help="out-of-range rate")
+    ap.add_argument("--downtime-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--chunk-rows", type=int, default=1_000_000, help="telemetry rows per write")
+    ap.add_argument("--price-freq", choices=["D", "h"], default="D", help="daily or hourly power prices")
+    a = ap.parse_args(argv)
+    generate(a.out, a.equipment, a.days, a.cadence, a.start, a.dup_rate, a.oor_rate,
+             a.downtime_rate, a.seed, a.chunk_rows, a.price_freq)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import closing
+from pathlib import Path
+import argparse, glob, hashlib, json, os, sqlite3, sys
+import pandas as pd
+
+# Multi-file telemetry ingest: many per-site/per-hour CSV drops are parsed and
+# checked in worker processes, while this process is the only SQLite writer
+# and commits one file per transaction. Files are tracked by content checksum
+# in etl_ingested_file, so re-running over the same drop is a no-op.
+#
+#   python src/ingest.py "data/incoming/*/*.csv" --workers 8
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src import anomaly, costs, etl, metrics, parquet_store, rollups, telemetry
+    from src.db import connect, get_storage
+    from src.integrity import dq_rows, record_keys, run_checks, write_dq
+    from src.timekeys import add_time_keys
+except Exception:
+    import anomaly, costs, etl, metrics, parquet_store, rollups, telemetry
+    from db import connect, get_storage
+    from integrity import dq_rows, record_keys, run_checks, write_dq
+    from timekeys import add_time_keys
+
+def get_ingest_glob() -> str:
+    # read fresh each call so tests can set RT_INGEST_GLOB after import
+    return os.getenv("RT_INGEST_GLOB", str(etl.get_raw_dir() / "telemetry" / "*.csv"))
+
+def discover(pattern: str | None = None, manifest: Path | None = None) -> list[Path]:
+    """
+    Input files from a manifest (a JSON list or one path per line, relative
+    paths resolved against the manifest's directory) or else a glob pattern
+    (default RT_INGEST_GLOB), sorted and de-duplicated.
+    """
+    if manifest is not None:
+        manifest = Path(manifest)
+        text = manifest.read_text()
+        names = json.loads(text) if text.lstrip().startswith("[") else text.split()
+        paths = [manifest.parent / n for n in names]
+    else:
+        paths = [Path(p) for p in glob.glob(pattern or get_ingest_glob(), recursive=True)]
+    return sorted({p.resolve() for p in paths if p.is_file()})
+
+def checksum(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(block):
+            h.update(chunk)
+    return h.hexdigest()
+
+def parse_file(path: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Worker side: read one telemetry CSV, add time keys and run the DQ checks."""
+    tele = telemetry.read_csv(path, "float64")
+    add_time_keys(tele)
+    tele["timestamp"] = tele["timestamp"].astype(str)
+    return tele, run_checks(tele, "fact_telemetry")
+
+def already_ingested(con: sqlite3.Connection, sums: list[str]) -> set[str]:
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS ingest_sums (checksum TEXT PRIMARY KEY)")
+    con.execute("DELETE FROM temp.ingest_sums")
+    con.executemany("INSERT OR IGNORE INTO temp.ingest_sums VALUES (?)", ((s,) for s in sums))
+    return {r[0] for r in con.execute(
+        "SELECT checksum FROM etl_ingested_file JOIN temp.ingest_sums USING (checksum)")}
+
+def _write(con: sqlite3.Connection, path: Path, digest: str, tele: pd.DataFrame, dq: pd.DataFrame) -> None:
+    """Writer side: one file, one transaction."""
+    with metrics.stage("ingest_write", table="fact_telemetry") as m:
+        # a key another file (or an earlier load) already stored is a duplicate too
+        prev = etl.stored_keys(con, tele[etl.TELEMETRY_KEY].drop_duplicates())
+        if not prev.empty:
+            dq = pd.concat([dq, dq_rows("fact_telemetry", record_keys(prev, etl.TELEMETRY_KEY),
+                                        "duplicate_key", "HIGH")]).drop_duplicates()
+        write_dq(con, dq)
+        etl.upsert_table(con, "fact_telemetry", tele, etl.TELEMETRY_KEY)
+        if get_storage() == "parquet":
+            parquet_store.write(tele, "upsert")
+        etl.update_watermarks(con, "fact_telemetry", tele)
+        con.execute("INSERT INTO etl_ingested_file (checksum, path, rows) VALUES (?, ?, ?)",
+                    (digest, str(path), len(tele)))
+        con.commit()
+        m["rows"] = len(tele)
+
+def ingest(paths: list[Path], workers: int | None = None) -> dict[str, int]:
+    """
+    Ingest telemetry files not seen before; returns counts of files
+    ingested/skipped and rows written. workers=None uses one per CPU,
+    workers=1 parses in this process.
+    """
+    etl.ensure_db()
+    days: set[str] = set()
+    stats = {"files": 0, "skipped": 0, "rows": 0}
+    with closing(connect()) as con, con:
+        for pragma in etl.LOAD_PRAGMAS:
+            con.execute(pragma)
+        etl.ensure_unique_key(con, "fact_telemetry", etl.TELEMETRY_KEY)
+
+        sums = {p: checksum(p) for p in paths}
+        seen = already_ingested(con, list(sums.values()))
+        todo = []
+        for path, digest in sums.items():
+            # the same content under two names is ingested once
+            if digest not in seen:
+                seen.add(digest)
+                todo.append((digest, path))
+        stats["skipped"] = len(paths) - len(todo)
+
+        def write(digest: str, path: Path, parsed: tuple[pd.DataFrame, pd.DataFrame]) -> None:
+            _write(con, path, digest, *parsed)
+            days.update(parsed[0]["day"].unique())
+            stats["files"] += 1
+            stats["rows"] += len(parsed[0])
+
+        if workers == 1 or len(todo) <= 1:
+            for digest, path in todo:
+                write(digest, path, parse_file(path))
+        else:
+            queue = iter(todo)
+            pending: dict[Future, tuple[str, Path]] = {}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                def submit() -> None:
+                    item = next(queue, None)
+                    if item is not None:
+                        pending[pool.submit(parse_file, item[1])] = item
+                # bounded in-flight window so parsed frames cannot pile up
+                # faster than the single writer drains them
+                for _ in range(2 * (workers or os.cpu_count() or 1)):
+                    submit()
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        write(*pending.pop(fut), fut.result())
+                        submit()
+
+        if days:
+            rollups.refresh(con, days)
+            costs.refresh(con, days)
+            # files finish out of order, so score once all rows are in place
+            anomaly.catch_up(con)
+            etl.bump_data_version(con)
+    print(f"→ ingested {stats['files']} files ({stats['rows']} rows), skipped {stats['skipped']}")
+    metrics.flush()
+    return stats
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Ingest many telemetry CSVs in parallel.")
+    ap.add_argument("pattern", nargs="?", default=None, help="glob (default: RT_INGEST_GLOB or <raw>/telemetry/*.csv)")
+    ap.add_argument("--manifest", type=Path, default=None, help="file listing the inputs instead of a glob")
+    ap.add_argument("--workers", type=int, default=None, help="parser processes (default: one per CPU)")
+    args = ap.parse_args(argv)
+    ingest(discover(args.pattern, args.manifest), args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 
 def check_duplicates(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
@@ -12,4 +13,83 @@ def check_ranges(df: pd.DataFrame, col_ranges: dict[str, tuple[float, float]]) -
             bad = df[(df[col] < lo) | (df[col] > hi)]
             if not bad.empty:
                 issues.append(bad.assign(_col=col, _lo=lo, _hi=hi))
-    return pd.concat(issues, ignore_index=True) if issues else pd.DataFrame()
\ No newline at end of file
+    return pd.concat(issues, ignore_index=True) if issues else pd.DataFrame()
+
+# Per-table data-quality rules: the record key (duplicate check, DQ record_key)
+# and inclusive (lo, hi) ranges. Bit i of a violation mask is the i-th range.
+RULES: dict[str, dict] = {
+    "fact_telemetry": {
+        "key": ["timestamp", "equipment_id"],
+        "ranges": {
+            "throughput_tph": (0, 1000),
+            "power_kw": (0, 5000),
+            "temperature_c": (-10, 120),
+            "pressure_kpa": (0, 500),
+            "status": (0, 1),
+        },
+    },
+    "fact_downtime": {
+        "key": ["equipment_id", "start_ts"],
+        "ranges": {"duration_min": (0, 7 * 24 * 60)},
+    },
+    "fact_lab_assays": {
+        "key": ["date"],
+        "ranges": {"ore_grade_pct": (0, 100), "moisture_pct": (0, 100), "bond_work_index_kwhpt": (0, 50)},
+    },
+    "fact_power_price": {
+        "key": ["date"],
+        "ranges": {"usd_per_mwh": (-1000, 10000)},
+    },
+}
+
+DQ_COLUMNS = ["table_name", "record_key", "check_name", "check_result", "severity"]
+
+def range_violations(df: pd.DataFrame, ranges: dict[str, tuple[float, float]]) -> np.ndarray:
+    """One vectorized pass over all range rules; returns a uint64 bitmask per row."""
+    cols = [c for c in ranges if c in df]
+    if not cols or df.empty:
+        return np.zeros(len(df), dtype=np.uint64)
+    vals = df[cols].to_numpy(dtype="float64", na_value=np.nan)
+    lo = np.array([ranges[c][0] for c in cols], dtype="float64")
+    hi = np.array([ranges[c][1] for c in cols], dtype="float64")
+    bits = np.uint64(1) << np.array([list(ranges).index(c) for c in cols], dtype=np.uint64)
+    bad = (vals < lo) | (vals > hi)
+    return (bad * bits).sum(axis=1, dtype=np.uint64)
+
+def record_keys(df: pd.DataFrame, keys: list[str]) -> pd.Series:
+    """'k1|k2|...' per row, built column-wise rather than row by row."""
+    out = df[keys[0]].astype(str)
+    for k in keys[1:]:
+        out = out + "|" + df[k].astype(str)
+    return out
+
+def dq_rows(table: str, record_key: pd.Series, check_name: str, severity: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "table_name": table,
+        "record_key": record_key.drop_duplicates().to_numpy(),
+        "check_name": check_name,
+        "check_result": "FAIL",
+        "severity": severity,
+    }, columns=DQ_COLUMNS)
+
+def run_checks(df: pd.DataFrame, table: str, rules: dict[str, dict] | None = None) -> pd.DataFrame:
+    """Duplicate-key and range checks for one table; returns data_quality rows."""
+    rule = (rules or RULES)[table]
+    keys = rule["key"]
+    dup = df.duplicated(subset=keys, keep=False).to_numpy()
+    bad = range_violations(df, rule.get("ranges", {})) != 0
+    if not dup.any() and not bad.any():
+        return pd.DataFrame(columns=DQ_COLUMNS)
+    return pd.concat([
+        dq_rows(table, record_keys(df.loc[dup, keys], keys), "duplicate_key", "HIGH"),
+        dq_rows(table, record_keys(df.loc[bad, keys], keys), "out_of_range", "MEDIUM"),
+    ], ignore_index=True)
+
+def write_dq(con, rows: pd.DataFrame) -> None:
+    """Bulk-insert data_quality rows in one executemany."""
+    if rows.empty:
+        return
+    con.executemany(
+        f"INSERT INTO data_quality ({', '.join(DQ_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+        rows[DQ_COLUMNS].itertuples(index=False, name=None),
+    )
@@ -0,0 +1,361 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse, asyncio, json, os, sqlite3, sys
+import pandas as pd
+
+# Live telemetry ingest. Sources send records as JSON lines over TCP, or POST
+# them (a JSON object, a list, or JSON lines) to /telemetry over HTTP. Records
+# go into a bounded queue that one batcher drains into micro-batches, flushed
+# at RT_LIVE_BATCH rows or RT_LIVE_FLUSH seconds, whichever comes first. Each
+# batch is DQ-checked, written, scored for anomalies and rolled up in one
+# transaction on a single writer thread.
+#
+# Only one batch is in flight: while it is written the queue fills, put()
+# blocks, and the connections stop being read, so TCP flow control pushes the
+# back-pressure out to the senders instead of growing memory.
+#
+# A batch that fails to write (locked database, disk full) is rolled back and
+# counted in stats["failed"], its rows in stats["dropped"]; the batcher goes
+# on with the next batch, so the queue keeps draining.
+#
+#   python src/live.py serve --simulate 4
+#   python src/live.py simulate --equipment 8 --rate 500
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src import anomaly, costs, etl, metrics, rollups
+    from src.db import connect
+    from src.generate_data import iter_telemetry
+    from src.integrity import dq_rows, record_keys, run_checks, write_dq
+    from src.timekeys import add_time_keys
+except Exception:
+    import anomaly, costs, etl, metrics, rollups
+    from db import connect
+    from generate_data import iter_telemetry
+    from integrity import dq_rows, record_keys, run_checks, write_dq
+    from timekeys import add_time_keys
+
+COLUMNS = ["timestamp", "equipment_id", "area", "throughput_tph", "power_kw",
+           "temperature_c", "pressure_kpa", "status"]
+REQUIRED = ("timestamp", "equipment_id", "area")
+# a live writer commits often and small; keep WAL but let the OS flush
+LIVE_PRAGMAS = ("PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL")
+_STOP = object()
+
+def get_batch_rows() -> int:
+    return int(os.getenv("RT_LIVE_BATCH", "500"))
+
+def get_flush_interval() -> float:
+    """Seconds a record may wait in a partial batch."""
+    return float(os.getenv("RT_LIVE_FLUSH", "1.0"))
+
+def get_queue_size() -> int:
+    """Records buffered ahead of the writer before senders are held back."""
+    return int(os.getenv("RT_LIVE_QUEUE", "10000"))
+
+def _valid(record) -> bool:
+    return isinstance(record, dict) and all(record.get(k) not in (None, "") for k in REQUIRED)
+
+class LiveIngest:
+    """
+    Bounded buffer plus micro-batch writer. Use start() inside a running
+    loop, put() records, and close() to flush what is left.
+    """
+
+    def __init__(self, batch_rows: int | None = None, flush_s: float | None = None,
+                 queue_size: int | None = None):
+        self.batch_rows = batch_rows or get_batch_rows()
+        self.flush_s = get_flush_interval() if flush_s is None else flush_s
+        self.queue_size = queue_size or get_queue_size()
+        self.queue: asyncio.Queue | None = None
+        # blocked: puts that found the queue full and had to wait for the writer
+        self.stats = dict.fromkeys(["received", "rejected", "blocked", "batches", "rows", "flagged",
+                                    "failed", "dropped"], 0)
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="live-writer")
+        self._con: sqlite3.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self.connections: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.create_task(self._run(), name="live-batcher")
+
+    async def put(self, record) -> bool:
+        """Queue one record, waiting while the queue is full; False if it was rejected."""
+        if not _valid(record):
+            self.stats["rejected"] += 1
+            return False
+        if self.queue.full():
+            self.stats["blocked"] += 1
+        await self.queue.put(record)
+        self.stats["received"] += 1
+        return True
+
+    async def close(self) -> None:
+        await self.queue.put(_STOP)
+        await self._task
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._disconnect)
+        self._writer.shutdown()
+        metrics.flush()
+
+    async def _next_batch(self) -> tuple[list[dict], bool]:
+        """Up to batch_rows records, returned flush_s after the first one at the latest."""
+        loop = asyncio.get_running_loop()
+        first = await self.queue.get()
+        if first is _STOP:
+            return [], True
+        batch, deadline, getter = [first], loop.time() + self.flush_s, None
+        while len(batch) < self.batch_rows:
+            if getter is None and not self.queue.empty():
+                item = self.queue.get_nowait()
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                getter = getter or asyncio.ensure_future(self.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=timeout)
+                if not done:
+                    break
+                item, getter = getter.result(), None
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        # a cancelled get never removes an item; one that already finished has to be kept
+        if getter is not None and not getter.cancel():
+            item = getter.result()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                await loop.run_in_executor(self._writer, self.write, batch)
+            except Exception as e:
+                self.stats["failed"] += 1
+                self.stats["dropped"] += len(batch)
+                print(f"→ live batch of {len(batch)} records failed: {type(e).__name__}: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            etl.ensure_db()
+            self._con = connect()
+            for pragma in LIVE_PRAGMAS:
+                self._con.execute(pragma)
+            etl.ensure_unique_key(self._con, "fact_telemetry", etl.TELEMETRY_KEY)
+            self._con.commit()
+        return self._con
+
+    def _disconnect(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    def write(self, records: list[dict]) -> int:
+        """Writer side: check and commit one micro-batch; returns the rows written."""
+        con = self._connect()
+        with metrics.stage("live_batch", table="fact_telemetry") as m:
+            tele = pd.DataFrame.from_records(records).reindex(columns=COLUMNS)
+            tele["timestamp"] = pd.to_datetime(tele["timestamp"], errors="coerce")
+            for c in COLUMNS[3:]:
+                tele[c] = pd.to_numeric(tele[c], errors="coerce")
+            # without a parseable timestamp a record has no key to store it under
+            keyless = tele["timestamp"].isna()
+            self.stats["rejected"] += int(keyless.sum())
+            tele = tele[~keyless].reset_index(drop=True)
+            if tele.empty:
+                return 0
+            add_time_keys(tele)
+            tele["timestamp"] = tele["timestamp"].astype(str)
+
+            try:
+                dq = run_checks(tele, "fact_telemetry")
+                prev = etl.stored_keys(con, tele[etl.TELEMETRY_KEY].drop_duplicates())
+                if not prev.empty:
+                    dq = pd.concat([dq, dq_rows("fact_telemetry", record_keys(prev, etl.TELEMETRY_KEY),
+                                                "duplicate_key", "HIGH")]).drop_duplicates()
+                write_dq(con, dq)
+                etl.bulk_load(con, "fact_telemetry", tele, "append")
+                flagged = anomaly.process(con, tele)
+                etl.update_watermarks(con, "fact_telemetry", tele)
+                # only the hours this batch touched; a whole-day refresh would
+                # grow with the time of day rather than with the batch
+                hours = _hours(tele)
+                rollups.refresh_hours(con, hours)
+                costs.refresh_hours(con, hours)
+                etl.bump_data_version(con)
+                con.commit()
+            except BaseException:
+                # nothing of the batch stays half-written on the writer connection
+                con.rollback()
+                raise
+            m["rows"] = len(tele)
+        self.stats["flagged"] += flagged
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(tele)
+        return len(tele)
+
+def _hours(tele: pd.DataFrame) -> list[tuple[str, int, str]]:
+    """The (equipment_id, hour_ts, day) a batch wrote to."""
+    hours = pd.DataFrame({"equipment_id": tele["equipment_id"].astype(str),
+                          "hour_ts": tele["ts"] - tele["ts"] % 3600, "day": tele["day"].astype(str)})
+    hours = hours.drop_duplicates()
+    return list(zip(*(hours[c].tolist() for c in hours.columns)))
+
+def _records(body: bytes) -> list:
+    text = body.decode().strip()
+    if not text:
+        return []
+    if text[0] in "[{":
+        try:
+            data = json.loads(text)
+            return data if isinstance(data, list) else [data]
+        except json.JSONDecodeError:
+            pass  # more than one object: JSON lines
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+async def handle_lines(svc: LiveIngest, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """TCP source: one JSON record per line until the sender closes."""
+    svc.connections.add(task := asyncio.current_task())
+    try:
+        while line := await reader.readline():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            await svc.put(record)
+    finally:
+        writer.close()
+        svc.connections.discard(task)
+
+async def handle_http(svc: LiveIngest, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """POST /telemetry queues records (202); GET /health reports the counters."""
+    try:
+        method, target, _ = (await reader.readline()).decode().split(" ", 2)
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            k, _, v = line.decode().partition(":")
+            headers[k.strip().lower()] = v.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        if method == "POST" and target == "/telemetry":
+            try:
+                records = _records(body)
+            except (ValueError, UnicodeDecodeError) as e:
+                status, payload = 400, {"error": str(e)}
+            else:
+                accepted = [await svc.put(r) for r in records]
+                status, payload = 202, {"accepted": sum(accepted), "rejected": len(accepted) - sum(accepted)}
+        elif method == "GET" and target == "/health":
+            status, payload = 200, {**svc.stats, "queued": svc.queue.qsize()}
+        else:
+            status, payload = 404, {"error": f"no route {method} {target}"}
+    except (ValueError, asyncio.IncompleteReadError):
+        status, payload = 400, {"error": "malformed request"}
+    data = json.dumps(payload).encode()
+    reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found"}[status]
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def start_servers(svc: LiveIngest, host: str = "127.0.0.1", port: int = 8765,
+                        http_port: int | None = 8766) -> list[asyncio.AbstractServer]:
+    """Listen for JSON lines on port and HTTP on http_port (None: no HTTP); port 0 picks a free one."""
+    servers = [await asyncio.start_server(lambda r, w: handle_lines(svc, r, w), host, port)]
+    if http_port is not None:
+        servers.append(await asyncio.start_server(lambda r, w: handle_http(svc, r, w), host, http_port))
+    for s in servers:
+        print(f"→ listening on {s.sockets[0].getsockname()[:2]}")
+    return servers
+
+async def simulate(host: str = "127.0.0.1", port: int = 8765, n_equipment: int = 2, days: int = 1,
+                   rate: float = 0.0, start: str | None = None, **kwargs) -> int:
+    """
+    Send generate_data telemetry to a running service as JSON lines, at
+    about `rate` records per second (0: as fast as the service accepts them).
+    Returns the number of records sent.
+    """
+    start = start or pd.Timestamp.now().floor("D").strftime("%Y-%m-%d")
+    _, writer = await asyncio.open_connection(host, port)
+    sent = 0
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    for chunk in iter_telemetry(n_equipment, days, start=start, chunk_rows=max(n_equipment, 1000), **kwargs):
+        chunk["timestamp"] = chunk["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+        for record in chunk.to_dict("records"):
+            writer.write(json.dumps(record).encode() + b"\n")
+            sent += 1
+            if sent % 100 == 0:
+                # drain() waits while the service is not reading: that is the back-pressure
+                await writer.drain()
+                if rate:
+                    await asyncio.sleep(max(0.0, t0 + sent / rate - loop.time()))
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+    return sent
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, http_port: int | None = 8766,
+                simulate_equipment: int = 0, **sim) -> dict[str, int]:
+    """Run until cancelled (or until the simulator, if any, has sent everything); returns the counters."""
+    svc = LiveIngest()
+    await svc.start()
+    servers = await start_servers(svc, host, port, http_port)
+    try:
+        if simulate_equipment:
+            bound = servers[0].sockets[0].getsockname()[1]
+            await simulate(host, bound, simulate_equipment, **sim)
+            # the sender is done; wait until its connection has been read to the end
+            while svc.connections:
+                await asyncio.wait(set(svc.connections))
+        else:
+            await asyncio.Event().wait()
+    finally:
+        for s in servers:
+            s.close()
+        await svc.close()
+        print(f"→ live ingest: {svc.stats}")
+    return svc.stats
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Live telemetry ingest service and simulator.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="accept telemetry and write micro-batches")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8765, help="JSON lines over TCP")
+    s.add_argument("--http-port", type=int, default=8766, help="HTTP POST /telemetry (-1: off)")
+    s.add_argument("--simulate", type=int, default=0, metavar="N",
+                   help="feed N simulated equipment into the service, then stop")
+    s.add_argument("--days", type=int, default=1)
+    s.add_argument("--rate", type=float, default=0.0, help="simulated records per second (0: unthrottled)")
+    p = sub.add_parser("simulate", help="send simulated telemetry to a running service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--equipment", type=int, default=2)
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--rate", type=float, default=0.0)
+    p.add_argument("--start", default=None, help="first timestamp's day (default: today)")
+    a = ap.parse_args(argv)
+    try:
+        if a.cmd == "serve":
+            asyncio.run(serve(a.host, a.port, None if a.http_port < 0 else a.http_port,
+                              a.simulate, days=a.days, rate=a.rate))
+        else:
+            sent = asyncio.run(simulate(a.host, a.port, a.equipment, a.days, a.rate, a.start))
+            print(f"→ sent {sent} records")
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
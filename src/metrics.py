@@ -0,0 +1,170 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+import atexit, json, logging, os, re, resource, sys, threading, time
+
+# Stage-level instrumentation for the ETL and the read layer. Off unless
+# RT_METRICS_FILE is set; then every stage records its duration, rows, bytes
+# and RSS delta, and flush() writes them out:
+#   *.prom  Prometheus textfile (totals per stage, for node_exporter)
+#   other   one JSON object per stage record (appended)
+# RT_PROFILE_DIR additionally dumps a cProfile + tracemalloc report per run.
+# Entry points flush when they finish; records left over (e.g. db.read stages
+# in the dashboard or analytics processes) are flushed every
+# RT_METRICS_FLUSH_S seconds (default 60) as stages complete, and at exit.
+
+log = logging.getLogger("rt_mining.metrics")
+RECORDS: deque[dict] = deque(maxlen=100_000)
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+def get_metrics_path() -> Path | None:
+    # read fresh each call so tests can set RT_METRICS_FILE after import
+    path = os.getenv("RT_METRICS_FILE")
+    return Path(path) if path else None
+
+def get_flush_interval() -> float:
+    return float(os.getenv("RT_METRICS_FLUSH_S", "60"))
+
+def get_profile_dir() -> Path | None:
+    path = os.getenv("RT_PROFILE_DIR")
+    return Path(path) if path else None
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+@contextmanager
+def stage(name: str, **labels) -> Iterator[dict]:
+    """
+    Time the block and record it under name and labels. The caller may set
+    "rows" and "bytes" on the yielded dict.
+    """
+    rec = {"stage": name, **labels, "rows": None, "bytes": None}
+    if get_metrics_path() is None:
+        yield rec
+        return
+    rss0, t0 = rss_bytes(), time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["seconds"] = round(time.perf_counter() - t0, 6)
+        rec["rss_delta_bytes"] = rss_bytes() - rss0
+        rec["ts"] = round(time.time(), 3)
+        RECORDS.append(rec)
+        log.debug(json.dumps(rec))
+        if time.monotonic() - _last_flush >= get_flush_interval():
+            flush()
+
+def iter_stage(name: str, items: Iterable, **labels) -> Iterator:
+    """Yield from items, recording each step (e.g. parsing one CSV chunk) as a stage."""
+    it = iter(items)
+    while True:
+        with stage(name, **labels) as rec:
+            item = next(it, StopIteration)
+            if item is not StopIteration:
+                rec["rows"] = len(item)
+        if item is StopIteration:
+            return
+        yield item
+
+def _labels(rec: dict) -> str:
+    skip = {"rows", "bytes", "seconds", "rss_delta_bytes", "ts"}
+    pairs = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+             for k, v in rec.items() if k not in skip and v is not None]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def to_prometheus(records: Iterable[dict]) -> str:
+    """Totals per (stage, labels) in the Prometheus text exposition format."""
+    totals: dict[str, dict] = {}
+    for r in records:
+        t = totals.setdefault(_labels(r), {"calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0, "rss": 0})
+        t["calls"] += 1
+        t["seconds"] += r["seconds"]
+        t["rows"] += r["rows"] or 0
+        t["bytes"] += r["bytes"] or 0
+        t["rss"] = r["rss_delta_bytes"]
+    metrics = [
+        ("rt_stage_calls_total", "counter", "Stage executions.", "calls"),
+        ("rt_stage_duration_seconds_total", "counter", "Wall time spent in the stage.", "seconds"),
+        ("rt_stage_rows_total", "counter", "Rows handled by the stage.", "rows"),
+        ("rt_stage_bytes_total", "counter", "Bytes read by the stage.", "bytes"),
+        ("rt_stage_rss_delta_bytes", "gauge", "RSS change over the last execution.", "rss"),
+    ]
+    lines = []
+    for metric, kind, help_, field in metrics:
+        lines += [f"# HELP {metric} {help_}", f"# TYPE {metric} {kind}"]
+        lines += [f"{metric}{labels} {t[field]:g}" for labels, t in totals.items()]
+    lines += ["# HELP rt_metrics_flush_timestamp_seconds When these metrics were written.",
+              "# TYPE rt_metrics_flush_timestamp_seconds gauge",
+              f"rt_metrics_flush_timestamp_seconds {time.time():.3f}"]
+    return "\n".join(lines) + "\n"
+
+def flush(path: Path | None = None) -> Path | None:
+    """Write and clear the recorded stages; returns the file written, if any."""
+    global _last_flush
+    path = path or get_metrics_path()
+    if path is None or not RECORDS:
+        return None
+    with _flush_lock:
+        _last_flush = time.monotonic()
+        # popleft, not list() then clear(): other threads may be recording
+        records = [RECORDS.popleft() for _ in range(len(RECORDS))]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".prom":
+            # write-then-rename so a collector never sees a partial file
+            tmp = path.with_suffix(".prom.tmp")
+            tmp.write_text(to_prometheus(records))
+            tmp.replace(path)
+        else:
+            with open(path, "a") as f:
+                f.writelines(json.dumps(r) + "\n" for r in records)
+    return path
+
+atexit.register(flush)
+
+_TABLE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+
+def sql_table(sql: str) -> str:
+    """First table named in a query, used as a low-cardinality label."""
+    m = _TABLE.search(sql)
+    return m.group(1) if m else "?"
+
+@contextmanager
+def profiled(name: str, out_dir: Path | None = None, top: int = 25) -> Iterator[None]:
+    """
+    Opt-in profiler: with RT_PROFILE_DIR (or out_dir) set, run the block under
+    cProfile and tracemalloc and write <name>-<time>.prof (for pstats/snakeviz)
+    and <name>-<time>.mem.txt (top allocation sites).
+    """
+    out_dir = out_dir or get_profile_dir()
+    if out_dir is None:
+        yield
+        return
+    import cProfile, tracemalloc
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"{name}-{time.strftime('%Y%m%dT%H%M%S')}"
+    prof = cProfile.Profile()
+    tracemalloc.start()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        snap = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        prof.dump_stats(f"{stem}.prof")
+        stats = snap.statistics("lineno")[:top]
+        Path(f"{stem}.mem.txt").write_text(
+            f"peak traced: {peak / 2**20:.1f} MiB\n" + "\n".join(str(s) for s in stats) + "\n")
+        print(f"→ profile written to {stem}.prof")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from pathlib import Path
+import os, shutil, uuid
+import pandas as pd
+
+# Optional columnar copy of fact_telemetry, written by the ETL next to SQLite
+# when RT_STORAGE=parquet. Files are hive-partitioned as
+#   <RT_PARQUET_DIR>/day=YYYY-MM-DD/equipment_id=<id>/part-*.parquet
+# so readers only open the partitions and columns they ask for.
+
+ROOT = Path(__file__).resolve().parent.parent
+PARTITIONS = ["day", "equipment_id"]
+KEY = ["timestamp", "equipment_id"]
+
+def get_parquet_dir() -> Path:
+    # read fresh each call so tests can set RT_PARQUET_DIR after import
+    return Path(os.getenv("RT_PARQUET_DIR", str(ROOT / "db" / "telemetry_parquet")))
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("RT_STORAGE=parquet needs pyarrow: pip install pyarrow") from e
+    return pa, ds
+
+def _partitioning():
+    pa, ds = _pyarrow()
+    return ds.partitioning(pa.schema([("day", pa.string()), ("equipment_id", pa.string())]), flavor="hive")
+
+def write(df: pd.DataFrame, mode: str = "append", root: Path | None = None) -> None:
+    """
+    Write telemetry rows (with a `day` column) into the dataset.
+
+    mode: "replace" drops the whole dataset first, "append" adds new files,
+    "upsert" rewrites only the touched partitions with existing rows merged
+    in, keeping the incoming row on (timestamp, equipment_id) conflicts.
+    """
+    pa, ds = _pyarrow()
+    root = Path(root or get_parquet_dir())
+    if mode == "replace" and root.exists():
+        shutil.rmtree(root)
+    if df.empty:
+        return
+    behavior = "overwrite_or_ignore"
+    if mode == "upsert":
+        old = read(list(df.columns), df["day"].min(), df["day"].max(),
+                   df["equipment_id"].unique().tolist(), root=root)
+        touched = old.set_index(PARTITIONS).index.isin(df.set_index(PARTITIONS).index)
+        df = (pd.concat([old[touched], df], ignore_index=True)
+                .drop_duplicates(KEY, keep="last"))
+        behavior = "delete_matching"
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False), root, format="parquet",
+        partitioning=_partitioning(), existing_data_behavior=behavior,
+        basename_template=f"part-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+    )
+
+def read(columns: list[str], start_day: str, end_day: str | None = None,
+         equipment_ids: list[str] | None = None, root: Path | None = None) -> pd.DataFrame:
+    """Rows for days start..end (inclusive), only the given columns, ordered by equipment_id, ts."""
+    pa, ds = _pyarrow()
+    root = Path(root or get_parquet_dir())
+    if not root.exists():
+        return pd.DataFrame(columns=columns)
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+    flt = (ds.field("day") >= start_day) & (ds.field("day") <= (end_day or start_day))
+    if equipment_ids:
+        flt &= ds.field("equipment_id").isin(equipment_ids)
+    cols = list(dict.fromkeys([*columns, "equipment_id", "ts"]))
+    df = dataset.to_table(columns=cols, filter=flt).to_pandas()
+    return df.sort_values(["equipment_id", "ts"], ignore_index=True)[columns]
@@ -0,0 +1,293 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+import io, re, threading
+import numpy as np
+import pandas as pd
+
+# Postgres backend, selected with RT_DB_URL=postgresql://... (see db.py).
+#
+# Loaders take a PgConnection: a psycopg connection behind the part of
+# sqlite3.Connection the pipeline uses (execute, executemany, executescript,
+# commit), so etl, rollups, costs, anomaly, ingest and live run unchanged.
+# Their SQL is written for SQLite and translated per statement:
+#   ? and :name              %s and %(name)s (a literal % becomes %%)
+#   INSERT OR IGNORE         ... ON CONFLICT DO NOTHING
+#   INSERT OR REPLACE        ... ON CONFLICT (<primary key>) DO UPDATE
+#   temp.<table>             pg_temp.<table>
+#   max(a, b)                GREATEST(a, b)
+#   datetime('now')          the same UTC text via to_char
+#   WITHOUT ROWID, PRAGMA    dropped (SQLite storage and tuning only)
+#
+# Bulk loads go through COPY: straight into the table after a replace's
+# TRUNCATE, otherwise into a temp stage and on with INSERT ... ON CONFLICT,
+# so a repeated key keeps the last row as INSERT OR REPLACE does. An
+# executemany of a plain or OR IGNORE INSERT ... VALUES is staged the same
+# way, instead of one statement per row. Readers
+# (db.read, the dashboard) use a SQLAlchemy pool of read-only connections,
+# and under MVCC they never wait for a load.
+#
+# fact_telemetry is range-partitioned on ts by calendar month (schema_pg.sql).
+# Partitions are created ahead of each write, queries bounded on ts only scan
+# their months, and old months can be dropped or detached whole.
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA = ROOT / "db" / "schema_pg.sql"
+PARTITIONED = "fact_telemetry"
+
+_NOW = "to_char(timezone('UTC', now()), 'YYYY-MM-DD HH24:MI:SS')"
+_REPLACE = re.compile(r"INSERT OR REPLACE INTO (\w+)\s*\(([^)]*)\)", re.I)
+_IGNORE = re.compile(r"INSERT OR IGNORE INTO", re.I)
+_NAMED = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+_TEMP = re.compile(r"\btemp\.", re.I)
+_MAX2 = re.compile(r"\bmax\((?=[^()]*,[^()]*\))", re.I)  # two-argument, scalar max
+_ROWID = re.compile(r"\s+WITHOUT ROWID", re.I)
+_VALUES = re.compile(r"INSERT (OR IGNORE )?INTO ([\w.]+)\s*(?:\(([^)]*)\))?\s*VALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+
+def is_postgres_url(url: str) -> bool:
+    return url.startswith(("postgresql", "postgres:"))
+
+def redact(url: str) -> str:
+    """url without its user and password, for logs."""
+    return re.sub(r"//[^@/]*@", "//", url)
+
+def _conninfo(url: str) -> str:
+    """A libpq URI from a SQLAlchemy-style URL (postgresql+psycopg://...)."""
+    return re.sub(r"^postgres(ql)?(\+\w+)?://", "postgresql://", url)
+
+def _on_conflict(keys: list[str], cols: list[str]) -> str:
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in keys)
+    return f" ON CONFLICT ({', '.join(keys)}) " + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+
+def translate(sql: str, primary_key=None) -> str:
+    """
+    SQLite-flavoured SQL as Postgres SQL with psycopg placeholders.
+    primary_key(table) -> key columns is needed for INSERT OR REPLACE.
+    """
+    sql = sql.strip().rstrip(";")
+    sql = sql.replace("%", "%%").replace("?", "%s")
+    sql = _NAMED.sub(r"%(\1)s", sql)
+    sql = _TEMP.sub("pg_temp.", _ROWID.sub("", _MAX2.sub("GREATEST(", sql)))
+    sql = re.sub(r"datetime\('now'\)", _NOW, sql, flags=re.I)
+    if _IGNORE.match(sql):
+        sql = _IGNORE.sub("INSERT INTO", sql, 1) + " ON CONFLICT DO NOTHING"
+    m = _REPLACE.match(sql)
+    if m:
+        if primary_key is None:
+            raise ValueError("INSERT OR REPLACE needs the table's primary key")
+        cols = [c.strip() for c in m.group(2).split(",")]
+        sql = f"INSERT INTO{sql[len('INSERT OR REPLACE INTO'):]}" + _on_conflict(primary_key(m.group(1)), cols)
+    return sql
+
+def _value(v):
+    # psycopg stores NaN as a float; SQLite (and the KPIs' SUMs) treat it as NULL
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is pd.NA or v is pd.NaT or (isinstance(v, float) and v != v):
+        return None
+    return v
+
+def _row(params):
+    if isinstance(params, dict):
+        return {k: _value(v) for k, v in params.items()}
+    return tuple(_value(v) for v in params)
+
+def _register(con) -> None:
+    # numeric (e.g. integer * 100.0) as float, like SQLite's REAL, not Decimal
+    from psycopg.types.numeric import FloatLoader
+    con.adapters.register_loader("numeric", FloatLoader)
+
+class PgConnection:
+    """A psycopg connection with the sqlite3.Connection surface the loaders use."""
+
+    def __init__(self, con, release=None):
+        self.con = con
+        self._release = release or con.close
+        self._keys: dict[str, list[str]] = {}
+        self._types: dict[str, dict[str, str]] = {}
+
+    def cursor(self):
+        return self.con.cursor()
+
+    def execute(self, sql: str, params: dict | tuple = ()):
+        cur = self.con.cursor()
+        if sql.lstrip()[:6].upper() == "PRAGMA":
+            cur.execute("SELECT 1 WHERE false")
+        else:
+            cur.execute(translate(sql, self.primary_key), _row(params))
+        return cur
+
+    def executemany(self, sql: str, rows: Iterable):
+        m = _VALUES.fullmatch(sql.strip().rstrip(";"))
+        if m:
+            ignore, table, cols = m.groups()
+            cols = [c.strip() for c in cols.split(",")] if cols else None
+            with self._stage(_TEMP.sub("pg_temp.", table), cols, ignore and " ON CONFLICT DO NOTHING") as copy:
+                for row in rows:
+                    copy.write_row(_row(row))
+            return self.con.cursor()
+        cur = self.con.cursor()
+        cur.executemany(translate(sql, self.primary_key), (_row(r) for r in rows))
+        return cur
+
+    @contextmanager
+    def _stage(self, table: str, cols: list[str] | None, conflict: str | None = None,
+               fmt: str = "text") -> Iterator:
+        """A COPY into a temp copy of table's columns, inserted into table (plus conflict) on exit."""
+        stage = "stage_" + table.split(".")[-1]
+        collist = ", ".join(cols) if cols else "*"
+        self.con.execute(f"DROP TABLE IF EXISTS pg_temp.{stage}")
+        # CREATE ... AS, not LIKE: no NOT NULL on columns the rows leave to their defaults
+        self.con.execute(f"CREATE TEMP TABLE {stage} AS SELECT {collist} FROM {table} WHERE false")
+        with self.con.cursor().copy(f"COPY {stage} FROM STDIN (FORMAT {fmt})") as copy:
+            yield copy
+        into = f"{table} ({collist})" if cols else table
+        self.con.execute(f"INSERT INTO {into} SELECT * FROM pg_temp.{stage}" + (conflict or ""))
+        self.con.execute(f"DROP TABLE pg_temp.{stage}")
+
+    def executescript(self, script: str) -> None:
+        self.con.execute(script)
+
+    def read(self, sql: str, params: dict | tuple = ()) -> pd.DataFrame:
+        cur = self.execute(sql, params)
+        return pd.DataFrame.from_records(cur.fetchall(), columns=[d.name for d in cur.description],
+                                         coerce_float=True)
+
+    def primary_key(self, table: str) -> list[str]:
+        if table not in self._keys:
+            self._keys[table] = [r[0] for r in self.con.execute("""
+                SELECT a.attname FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)
+                WHERE i.indrelid = %s::regclass AND i.indisprimary
+                ORDER BY array_position(i.indkey, a.attnum)
+            """, (table,))]
+        return self._keys[table]
+
+    def column_types(self, table: str) -> dict[str, str]:
+        if table not in self._types:
+            self._types[table] = dict(self.con.execute(
+                "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = %s",
+                (table,)).fetchall())
+        return self._types[table]
+
+    def commit(self) -> None:
+        self.con.commit()
+
+    def rollback(self) -> None:
+        self.con.rollback()
+
+    def close(self) -> None:
+        self._release()
+
+    def __enter__(self) -> PgConnection:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        # as sqlite3: commit or roll back, but stay open
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+def is_postgres(con) -> bool:
+    return isinstance(con, PgConnection)
+
+def connect(url: str) -> PgConnection:
+    """A read-write connection for one loader."""
+    import psycopg
+    con = psycopg.connect(_conninfo(url))
+    _register(con)
+    return PgConnection(con)
+
+_engines: dict[str, object] = {}
+_engines_lock = threading.Lock()
+
+def get_engine(url: str, pool_size: int = 8):
+    """The SQLAlchemy engine (a pool of read-only connections) for url, created on first use."""
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            from sqlalchemy import create_engine, event
+            engine = create_engine(re.sub(r"^postgres(ql)?://", "postgresql+psycopg://", url),
+                                   pool_size=pool_size, pool_pre_ping=True)
+
+            @event.listens_for(engine, "connect")
+            def _setup(dbapi_con, _record):
+                _register(dbapi_con)
+                dbapi_con.execute("SET default_transaction_read_only = on")
+                dbapi_con.commit()
+
+            _engines[url] = engine
+        return engine
+
+@contextmanager
+def pooled(url: str, pool_size: int = 8) -> Iterator[PgConnection]:
+    """A read-only connection from url's pool, rolled back and returned afterwards."""
+    raw = get_engine(url, pool_size).raw_connection()
+    try:
+        yield PgConnection(raw.driver_connection, raw.close)
+    finally:
+        raw.close()
+
+def dispose_all() -> None:
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+def data_version(con: PgConnection) -> int:
+    if con.execute("SELECT to_regclass('etl_version')").fetchone()[0] is None:
+        return 0
+    row = con.execute("SELECT version FROM etl_version").fetchone()
+    return row[0] if row else 0
+
+def ensure_partitions(con: PgConnection, ts: pd.Series) -> list[str]:
+    """Create the monthly fact_telemetry partitions covering epoch seconds ts; returns those created."""
+    months = pd.to_datetime(pd.Series(ts.dropna().unique()), unit="s").dt.to_period("M").unique()
+    have = {r[0] for r in con.con.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass", (PARTITIONED,))}
+    made = []
+    for month in sorted(months):
+        name = f"{PARTITIONED}_{month.strftime('%Y_%m')}"
+        if name in have:
+            continue
+        lo, hi = (p.start_time.value // 10**9 for p in (month, month + 1))
+        con.con.execute(f"CREATE TABLE {name} PARTITION OF {PARTITIONED} FOR VALUES FROM ({lo}) TO ({hi})")
+        made.append(name)
+    return made
+
+def copy_load(con: PgConnection, name: str, df: pd.DataFrame, mode: str = "append") -> None:
+    """
+    Write df into table name with COPY. mode="replace" truncates the table
+    and drops its secondary indexes first; "append" upserts on the primary
+    key when df carries it.
+    """
+    if mode == "replace":
+        con.con.execute(f"TRUNCATE {name} RESTART IDENTITY")
+        # as in SQLite, secondary indexes are rebuilt once by etl.apply_schema
+        for (index,) in con.con.execute("SELECT indexrelid::regclass::text FROM pg_index "
+                                        "WHERE indrelid = %s::regclass AND NOT indisprimary", (name,)).fetchall():
+            con.con.execute(f"DROP INDEX {index}")
+    if df.empty:
+        return
+    if name == PARTITIONED:
+        ensure_partitions(con, df["ts"])
+    cols, keys = list(df.columns), con.primary_key(name)
+    upsert = bool(keys) and set(keys) <= set(cols)
+    if upsert:
+        df = df.drop_duplicates(keys, keep="last")
+    types = con.column_types(name)
+    ints = [c for c in cols if types.get(c) in ("integer", "bigint", "smallint")
+            and pd.api.types.is_float_dtype(df[c])]
+    if ints:
+        df = df.astype(dict.fromkeys(ints, "Int64"))  # 360.0 -> 360; COPY rejects a decimal point
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    if mode == "replace":
+        with con.cursor().copy(f"COPY {name} ({', '.join(cols)}) FROM STDIN (FORMAT csv)") as copy:
+            copy.write(buf.getvalue())
+        return
+    with con._stage(name, cols, _on_conflict(keys, cols) if upsert else None, "csv") as copy:
+        copy.write(buf.getvalue())
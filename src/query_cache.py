@@ -0,0 +1,128 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+import os, sys, threading, time
+import pandas as pd
+
+# Result cache for the dashboard's read queries. Entries are keyed on
+# (sql, params, data version): the ETL bumps the version on every load, so a
+# load makes every older entry unreachable at once. The cache is a bounded LRU
+# with a TTL, and on a version change it re-runs a registered prewarm hook
+# (the latest day's KPI and timeseries queries) in the background.
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src import db
+except Exception:
+    import db
+
+def get_cache_size() -> int:
+    return int(os.getenv("RT_CACHE_SIZE", "256"))
+
+def get_cache_ttl() -> float:
+    """Seconds an entry may be served, even without a new load."""
+    return float(os.getenv("RT_CACHE_TTL", "900"))
+
+def _key(sql: str, params: dict | tuple) -> tuple:
+    if isinstance(params, dict):
+        return sql, tuple(sorted(params.items()))
+    return sql, tuple(params)
+
+class QueryCache:
+    """
+    Thread-safe LRU of query results, at most `maxsize` entries of at most
+    `ttl` seconds. The data version is re-read at most every `poll` seconds.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 900.0, poll: float = 2.0,
+                 reader: Callable[[str, dict | tuple], pd.DataFrame] = db.read,
+                 version: Callable[[], int] = db.data_version):
+        self.maxsize, self.ttl, self.poll = maxsize, ttl, poll
+        self._reader, self._version_fn = reader, version
+        self._entries: OrderedDict[tuple, tuple[float, pd.DataFrame]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._checked = 0.0
+        self._prewarm: Callable[[QueryCache], None] | None = None
+        self._watcher: threading.Thread | None = None
+        self.hits = self.misses = 0
+
+    def version(self) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked < self.poll:
+            return self._version
+        current = self._version_fn()
+        with self._lock:
+            changed = self._version is not None and current != self._version
+            self._version, self._checked = current, now
+            if changed:
+                # entries of older versions can never be hit again
+                self._entries = OrderedDict((k, v) for k, v in self._entries.items() if k[-1] == current)
+        if changed and self._prewarm is not None:
+            threading.Thread(target=self._run_prewarm, daemon=True).start()
+        return current
+
+    def read(self, sql: str, params: dict | tuple = ()) -> pd.DataFrame:
+        key = (*_key(sql, params), self.version())
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hit[1].copy()
+        df = self._reader(sql, params)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, df)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return df.copy()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_prewarm(self, fn: Callable[[QueryCache], None], run_now: bool = False) -> None:
+        """fn(cache) issues the queries worth having warm; it runs after every load."""
+        self._prewarm = fn
+        if run_now:
+            self._run_prewarm()
+
+    def _run_prewarm(self) -> None:
+        try:
+            self._prewarm(self)
+        except Exception as e:  # a failed prewarm only costs a cold query later
+            print(f"→ cache prewarm failed: {e}")
+
+    def watch(self, interval: float | None = None) -> None:
+        """Poll the data version in a daemon thread so prewarming follows a load without a request."""
+        if self._watcher is not None:
+            return
+        def loop() -> None:
+            while True:
+                time.sleep(interval or self.poll)
+                try:
+                    self.version()
+                except Exception:
+                    pass
+        self._watcher = threading.Thread(target=loop, name="query-cache-watch", daemon=True)
+        self._watcher.start()
+
+_cache: QueryCache | None = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> QueryCache:
+    """The process-wide cache, sized from RT_CACHE_SIZE / RT_CACHE_TTL on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(get_cache_size(), get_cache_ttl())
+        return _cache
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import sqlite3
+from typing import Iterable
+
+# 5-minute cadence
+INTERVAL_HOURS = 5.0 / 60.0
+
+# agg_hourly is built from fact_telemetry, agg_daily from agg_hourly; both hold
+# additive sums only, so any KPI (utilization, averages, kWh/t) can be derived
+# for any period by summing rows and dividing at the end.
+_HOURLY = """
+    INSERT INTO agg_hourly (equipment_id, day, hour_ts, intervals, run_intervals,
+                            tonnage_t, energy_kwh, throughput_sum)
+    SELECT equipment_id, day, ts - ts % 3600,
+           COUNT(*),
+           SUM(CASE WHEN status = 1 THEN 1 ELSE 0 END),
+           SUM(throughput_tph) * :h,
+           SUM(power_kw) * :h,
+           SUM(throughput_tph)
+    FROM fact_telemetry
+    WHERE day IN (SELECT day FROM temp.refresh_days)
+    GROUP BY equipment_id, day, ts - ts % 3600
+"""
+
+_DAILY = """
+    INSERT INTO agg_daily (equipment_id, day, intervals, run_intervals,
+                           tonnage_t, energy_kwh, throughput_sum)
+    SELECT equipment_id, day, SUM(intervals), SUM(run_intervals),
+           SUM(tonnage_t), SUM(energy_kwh), SUM(throughput_sum)
+    FROM agg_hourly
+    WHERE day IN (SELECT day FROM temp.refresh_days)
+    GROUP BY equipment_id, day
+"""
+
+# the same sums for single (equipment, hour) pairs, as a live micro-batch
+# touches them; ts ranges per equipment stay on ix_telemetry_equipment_ts
+_HOURS = """
+    INSERT INTO agg_hourly (equipment_id, day, hour_ts, intervals, run_intervals,
+                            tonnage_t, energy_kwh, throughput_sum)
+    SELECT h.equipment_id, h.day, h.hour_ts,
+           COUNT(*),
+           SUM(CASE WHEN t.status = 1 THEN 1 ELSE 0 END),
+           SUM(t.throughput_tph) * :h,
+           SUM(t.power_kw) * :h,
+           SUM(t.throughput_tph)
+    FROM temp.refresh_hours h
+    JOIN fact_telemetry t
+      ON t.equipment_id = h.equipment_id AND t.ts >= h.hour_ts AND t.ts < h.hour_ts + 3600
+    GROUP BY h.equipment_id, h.day, h.hour_ts
+"""
+
+_DAYS_OF_HOURS = """
+    INSERT INTO agg_daily (equipment_id, day, intervals, run_intervals,
+                           tonnage_t, energy_kwh, throughput_sum)
+    SELECT equipment_id, day, SUM(intervals), SUM(run_intervals),
+           SUM(tonnage_t), SUM(energy_kwh), SUM(throughput_sum)
+    FROM agg_hourly
+    WHERE (equipment_id, day) IN (SELECT equipment_id, day FROM temp.refresh_hours)
+    GROUP BY equipment_id, day
+"""
+
+def refresh(con: sqlite3.Connection, days: Iterable[str] | None = None) -> None:
+    """
+    Recompute agg_hourly/agg_daily for the given days (YYYY-MM-DD).
+
+    days=None rebuilds both tables from scratch, e.g. after a full reload.
+    """
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS refresh_days (day TEXT PRIMARY KEY)")
+    con.execute("DELETE FROM temp.refresh_days")
+    if days is None:
+        con.execute("DELETE FROM agg_hourly")
+        con.execute("DELETE FROM agg_daily")
+        con.execute("INSERT INTO temp.refresh_days SELECT DISTINCT day FROM fact_telemetry")
+    else:
+        con.executemany("INSERT OR IGNORE INTO temp.refresh_days VALUES (?)", ((d,) for d in days))
+        for table in ("agg_hourly", "agg_daily"):
+            con.execute(f"DELETE FROM {table} WHERE day IN (SELECT day FROM temp.refresh_days)")
+    con.execute(_HOURLY, {"h": INTERVAL_HOURS})
+    con.execute(_DAILY)
+    n = con.execute("SELECT COUNT(*) FROM temp.refresh_days").fetchone()[0]
+    print(f"→ refreshed rollups: {n} days")
+
+def refresh_hours(con: sqlite3.Connection, hours: Iterable[tuple[str, int, str]]) -> None:
+    """
+    Recompute the agg_hourly rows of the given (equipment_id, hour_ts, day)
+    and the agg_daily rows of their days. The cost follows the hours
+    touched (plus at most 24 hourly rows per equipment and day), not how
+    much of the day is already stored.
+    """
+    con.execute("""CREATE TEMP TABLE IF NOT EXISTS refresh_hours
+        (equipment_id TEXT, hour_ts INTEGER, day TEXT, PRIMARY KEY (equipment_id, hour_ts))""")
+    con.execute("DELETE FROM temp.refresh_hours")
+    con.executemany("INSERT OR IGNORE INTO temp.refresh_hours VALUES (?, ?, ?)", hours)
+    con.execute("DELETE FROM agg_hourly WHERE (equipment_id, hour_ts) IN "
+                "(SELECT equipment_id, hour_ts FROM temp.refresh_hours)")
+    con.execute("DELETE FROM agg_daily WHERE (equipment_id, day) IN "
+                "(SELECT equipment_id, day FROM temp.refresh_hours)")
+    con.execute(_HOURS, {"h": INTERVAL_HOURS})
+    con.execute(_DAYS_OF_HOURS)
+
+def backfill(con: sqlite3.Connection) -> None:
+    """Build the rollups once for a database that has telemetry but predates them."""
+    if con.execute("SELECT 1 FROM agg_daily LIMIT 1").fetchone():
+        return
+    if con.execute("SELECT 1 FROM fact_telemetry LIMIT 1").fetchone():
+        refresh(con)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+import json, sqlite3, sys, threading, time, uuid
+
+# In-process DAG runner for the ETL. A load is a list of Tasks, each naming
+# the tasks it depends on. Every task's parse step (reading and checking a
+# CSV, no database access) is started at once on a thread pool, since
+# pandas' parser releases the GIL; the writes then run one task at a time in
+# dependency order on the single writer connection, each in its own
+# transaction together with the row that marks it done.
+#
+# A failed task rolls back alone and fails its run. Running the same load
+# again (same key: inputs and options) resumes that run, so tasks that
+# already committed are skipped and their results come back from etl_task.
+# run_every() repeats a job on an interval, no external orchestrator needed.
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src import metrics
+except Exception:
+    import metrics
+
+class Task:
+    """
+    One step of a load. parse() runs early on a worker thread and must not
+    touch the database; run(con, parsed, results) does the writes and may
+    return a JSON-serializable result, which later tasks find in
+    results[name].
+    """
+
+    def __init__(self, name: str, run: Callable, parse: Callable | None = None, deps: Iterable[str] = ()):
+        self.name, self.run, self.parse, self.deps = name, run, parse, list(deps)
+
+    def __repr__(self) -> str:
+        return f"Task({self.name!r}, deps={self.deps})"
+
+def order(tasks: list[Task]) -> list[Task]:
+    """Tasks in dependency order, otherwise as declared; ValueError for unknown deps or a cycle."""
+    names = {t.name for t in tasks}
+    for t in tasks:
+        missing = set(t.deps) - names
+        if missing:
+            raise ValueError(f"{t.name} depends on unknown task(s): {', '.join(sorted(missing))}")
+    done: list[Task] = []
+    left = list(tasks)
+    while left:
+        ready = [t for t in left if all(d in {x.name for x in done} for d in t.deps)]
+        if not ready:
+            raise ValueError(f"dependency cycle among: {', '.join(t.name for t in left)}")
+        done.append(ready[0])
+        left.remove(ready[0])
+    return done
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def begin(con) -> None:
+    # sqlite3 opens a transaction only before DML; open it here so a task's
+    # DROP/CREATE TABLE roll back with its rows (Postgres always does)
+    if isinstance(con, sqlite3.Connection) and not con.in_transaction:
+        con.execute("BEGIN")
+
+def is_done(con, key: str) -> bool:
+    """Whether the latest run of key finished."""
+    row = con.execute("SELECT status FROM etl_run WHERE key = ? ORDER BY started_ts DESC LIMIT 1",
+                      (key,)).fetchone()
+    return bool(row) and row[0] == "done"
+
+def _open_run(con, key: str, resume: bool) -> tuple[str, dict]:
+    """The unfinished run of key to resume with its finished tasks' results, or a new run."""
+    row = con.execute("SELECT run_id, status FROM etl_run WHERE key = ? ORDER BY started_ts DESC LIMIT 1",
+                      (key,)).fetchone()
+    if resume and row and row[1] != "done":
+        results = {task: json.loads(result) for task, result in con.execute(
+            "SELECT task, result FROM etl_task WHERE run_id = ? AND status = 'done'", (row[0],))}
+        return row[0], results
+    run_id = uuid.uuid4().hex
+    con.execute("INSERT INTO etl_run (run_id, key, status, started_ts) VALUES (?, ?, 'running', ?)",
+                (run_id, key, _now()))
+    con.commit()
+    return run_id, {}
+
+def _mark(con, run_id: str, task: str, status: str, result=None, error: str | None = None) -> None:
+    con.execute("""
+        INSERT OR REPLACE INTO etl_task (run_id, task, status, result, error, finished_ts)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (run_id, task, status, json.dumps(result), error, _now()))
+    con.execute("UPDATE etl_run SET status = ?, finished_ts = ? WHERE run_id = ?",
+                ("failed" if status == "failed" else "running", _now(), run_id))
+
+def _run_once(con, tasks: list[Task], key: str, resume: bool, workers: int | None) -> dict:
+    run_id, results = _open_run(con, key, resume)
+    todo = [t for t in tasks if t.name not in results]
+    if results:
+        print(f"→ resuming run {run_id[:8]}: {len(results)} of {len(tasks)} tasks already done")
+    with ThreadPoolExecutor(workers, thread_name_prefix="etl-parse") as pool:
+        parsed = {t.name: pool.submit(t.parse) for t in todo if t.parse}
+        for t in todo:
+            try:
+                with metrics.stage("task", table=t.name):
+                    begin(con)
+                    value = parsed[t.name].result() if t.parse else None
+                    results[t.name] = t.run(con, value, results)
+                    _mark(con, run_id, t.name, "done", results[t.name])
+                    con.commit()
+            except BaseException as e:
+                for f in parsed.values():
+                    f.cancel()
+                con.rollback()
+                _mark(con, run_id, t.name, "failed", error=f"{type(e).__name__}: {e}")
+                con.commit()
+                raise
+    con.execute("UPDATE etl_run SET status = 'done', finished_ts = ? WHERE run_id = ?", (_now(), run_id))
+    con.commit()
+    return results
+
+def run(con, tasks: list[Task], key: str = "", resume: bool = True, workers: int | None = None,
+        retries: int = 0, retry_delay: float = 5.0) -> dict:
+    """
+    Run tasks on con (tables etl_run/etl_task must exist) and return their
+    results by name. An unfinished earlier run of the same key is resumed
+    unless resume=False; a failure is retried up to `retries` times, each
+    retry resuming after the last committed task.
+    """
+    tasks = order(tasks)
+    for attempt in range(retries + 1):
+        try:
+            return _run_once(con, tasks, key, resume or attempt > 0, workers)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"→ run failed ({type(e).__name__}: {e}); retrying in {retry_delay:g}s")
+            time.sleep(retry_delay)
+
+def run_every(seconds: float, job: Callable[[], object], runs: int | None = None,
+              stop: threading.Event | None = None) -> int:
+    """
+    Call job every `seconds` (start to start) until stop is set or `runs`
+    calls were made. A failing call is reported and the schedule goes on, so
+    the next call resumes it. Returns the number of failed calls.
+    """
+    stop = stop or threading.Event()
+    failed = n = 0
+    while not stop.is_set() and (runs is None or n < runs):
+        t0 = time.monotonic()
+        n += 1
+        try:
+            job()
+        except Exception as e:
+            failed += 1
+            print(f"→ scheduled run {n} failed: {type(e).__name__}: {e}")
+        if runs is None or n < runs:
+            stop.wait(max(0.0, seconds - (time.monotonic() - t0)))
+    return failed
@@ -0,0 +1,57 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+
+# In-memory types for telemetry frames, shared by every loader. Ids and areas
+# repeat on every row, so they become categories (one small integer code per
+# row instead of a Python string); measures are float32, status int8 and
+# timestamps datetime64. A frame of raw telemetry shrinks about 3x against
+# pandas' own string columns (more against object columns), and groupbys on
+# equipment_id work on the codes. A status that is not a small integer keeps
+# its read type, so the range checks still see (and report) the real value.
+#
+# Frames that are written back to the database keep float64 measures
+# (measures="float64"): float32 would store 1538.413 as 1538.4129638671875.
+
+MEASURES = ["throughput_tph", "power_kw", "temperature_c", "pressure_kpa"]
+DTYPES = {
+    "equipment_id": "category",
+    "area": "category",
+    **dict.fromkeys(MEASURES, "float32"),
+    "status": "int8",
+    "ts": "int64",
+    "day": "category",
+}
+
+def csv_dtypes(measures: str = "float32") -> dict[str, str]:
+    """dtype= for pd.read_csv; status is cast afterwards by compact(), it may be missing."""
+    return {c: measures if c in MEASURES else d for c, d in DTYPES.items() if c not in ("status", "ts", "day")}
+
+def compact(df: pd.DataFrame, measures: str = "float32") -> pd.DataFrame:
+    """Cast the telemetry columns present in df to DTYPES, in place; returns df."""
+    for col, dtype in DTYPES.items():
+        if col not in df:
+            continue
+        if col in MEASURES:
+            dtype = measures
+        elif dtype == "int8":
+            v = df[col].dropna()
+            if not ((v % 1 == 0) & v.between(-128, 127)).all():
+                continue  # 1.5 or 256 would truncate or wrap; left as read for the DQ checks
+            if len(v) < len(df):
+                dtype = "Int8"  # nullable, so a missing status still reaches the DQ checks
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    if "timestamp" in df and not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+def read_csv(path: Path, measures: str = "float32", chunksize: int | None = None,
+             **kwargs) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """A telemetry CSV read straight into compact types (an iterator of chunks with chunksize)."""
+    reader = pd.read_csv(path, dtype=csv_dtypes(measures), parse_dates=["timestamp"],
+                         chunksize=chunksize, **kwargs)
+    if chunksize:
+        return (compact(chunk, measures) for chunk in reader)
+    return compact(reader, measures)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+import pandas as pd
+
+# fact_telemetry keeps an integer `ts` (UTC epoch seconds) and a `day`
+# (YYYY-MM-DD) next to the ISO `timestamp`, so day and range filters are
+# plain comparisons that SQLite can answer from an index.
+
+EPOCH = pd.Timestamp("1970-01-01")
+
+def to_epoch(ts: pd.Series) -> pd.Series:
+    # naive timestamps are taken as UTC, like SQLite's strftime('%s', ...)
+    ts = pd.to_datetime(ts)
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert(None)
+    return (ts - EPOCH) // pd.Timedelta(seconds=1)
+
+def day_bounds(start_day: str, end_day: str | None = None) -> tuple[int, int]:
+    """Half-open [t0, t1) epoch range covering start_day through end_day (inclusive)."""
+    t0 = pd.Timestamp(start_day).normalize()
+    t1 = pd.Timestamp(end_day or start_day).normalize() + pd.Timedelta(days=1)
+    sec = pd.Timedelta(seconds=1)
+    return int((t0 - EPOCH) // sec), int((t1 - EPOCH) // sec)
+
+def add_time_keys(df: pd.DataFrame, col: str = "timestamp", ts_col: str = "ts") -> pd.DataFrame:
+    """Add epoch seconds (ts_col) and `day` derived from df[col], in place."""
+    parsed = pd.to_datetime(df[col])
+    df[ts_col] = to_epoch(parsed)
+    df["day"] = parsed.dt.strftime("%Y-%m-%d")
+    return df
@@ -1,26 +1,45 @@
 from __future__ import annotations
 from pathlib import Path 
-import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+import hashlib, json, os, sys
 import pandas as pd 
-import matplotlib.pyplot as plt 
 
 ROOT = Path(__file__).resolve().parent.parent
-DB = ROOT / "db" / "rt_mining.db"
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+try:
+    from src.db import read as _read, read_telemetry
+    from src.downsample import downsample
+except Exception:
+    from db import read as _read, read_telemetry
+    from downsample import downsample
+
 OUT = ROOT / "outputs"
-OUT.mkdir(parents=True, exist_ok=True)
+MANIFEST = ".render_manifest.json"
+# bump when the charts change so existing PNGs are re-rendered
+RENDER_VERSION = "2"
 
-def _read(sql: str, params: dict | tuple = ()):
-    with sqlite3.connect(DB) as con:
-        return pd.read_sql_query(sql, con, params=params)
+def get_out_dir() -> Path:
+    # read fresh each call so tests can set RT_OUT_DIR after import
+    out = Path(os.getenv("RT_OUT_DIR", str(OUT)))
+    out.mkdir(parents=True, exist_ok=True)
+    return out
 
-def fetch_timeseries(day: str, equipment_id: str) -> pd.DataFrame:
-    df = _read("""
-        SELECT timestamp, equipment_id, throughput_tph, power_kw, status
-        FROM fact_telemetry
-        WHERE date(substr(timestamp,1,10)) = date(:d)
-          AND equipment_id = :eid
-        ORDER BY timestamp
-    """, {"d": day, "eid": equipment_id})
+TS_COLUMNS = ["timestamp", "equipment_id", "throughput_tph", "power_kw", "status"]
+
+def fetch_timeseries(day: str, equipment_id: str, max_points: int | None = None) -> pd.DataFrame:
+    """The day's series for one equipment; max_points LTTB-reduces it for plotting."""
+    df = _with_rolling(read_telemetry(TS_COLUMNS, day, equipment_ids=[equipment_id]))
+    if max_points and not df.empty:
+        df = downsample(df, ["throughput_tph", "power_kw", "roll_spec_energy_kwhpt"], max_points)
+    return df
+
+def fetch_timeseries_all(day: str) -> dict[str, pd.DataFrame]:
+    """Every equipment's timeseries for the day from a single query, keyed by equipment_id."""
+    df = read_telemetry(TS_COLUMNS, day)
+    return {eid: _with_rolling(g.reset_index(drop=True)) for eid, g in df.groupby("equipment_id", sort=False, observed=True)}
+
+def _with_rolling(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
     df["timestamp"] = pd.to_datetime(df["timestamp"])
@@ -34,10 +53,16 @@ def fetch_timeseries(day: str, equipment_id: str) -> pd.DataFrame:
                                      / df["tons"].rolling(roll, min_periods=1).sum().replace(0, pd.NA))
     return df
 
+def _pyplot():
+    # matplotlib costs ~0.5 s to import; only pay for it when a chart is drawn
+    import matplotlib.pyplot as plt
+    return plt
+
 def plot_throughput_power(df: pd.DataFrame, day: str, equipment_id: str):
     if df.empty:
         print("No data to plot.")
         return
+    plt = _pyplot()
     fig, ax1 = plt.subplots(figsize=(10,4))
     ax1.plot(df["timestamp"], df["throughput_tph"], label="Throughput (tph)")
     ax1.set_xlabel("Time")
@@ -50,7 +75,7 @@ def plot_throughput_power(df: pd.DataFrame, day: str, equipment_id: str):
 
     fig.suptitle(f"{equipment_id} — Throughput vs Power — {day}")
     fig.tight_layout()
-    out = OUT / f"{day}_{equipment_id}_throughput_power.png"
+    out = get_out_dir() / f"{day}_{equipment_id}_throughput_power.png"
     fig.savefig(out, dpi=140)
     plt.close(fig)
     print("Saved:", out)
@@ -59,6 +84,7 @@ def plot_specific_energy(df: pd.DataFrame, day: str, equipment_id: str):
     if df.empty:
         print("No data to plot.")
         return
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10,4))
     ax.plot(df["timestamp"], df["roll_spec_energy_kwhpt"], label="Rolling Specific Energy (kWh/t)")
     ax.set_xlabel("Time")
@@ -66,7 +92,7 @@ def plot_specific_energy(df: pd.DataFrame, day: str, equipment_id: str):
     ax.tick_params(axis='x', rotation=30)
     fig.suptitle(f"{equipment_id} — Rolling Specific Energy — {day}")
     fig.tight_layout()
-    out = OUT / f"{day}_{equipment_id}_specific_energy.png"
+    out = get_out_dir() / f"{day}_{equipment_id}_specific_energy.png"
     fig.savefig(out, dpi=140)
     plt.close(fig)
     print("Saved:", out)
@@ -74,32 +100,80 @@ def plot_specific_energy(df: pd.DataFrame, day: str, equipment_id: str):
 def save_daily_summary(day: str):
     df = _read("""
         SELECT equipment_id,
-               AVG(throughput_tph) AS avg_tph,
-               SUM(throughput_tph)*(5.0/60.0) AS total_tons,
-               SUM(power_kw)*(5.0/60.0)       AS total_kwh
-        FROM fact_telemetry
-        WHERE date(substr(timestamp,1,10)) = date(:d)
-        GROUP BY equipment_id
+               throughput_sum*1.0/intervals AS avg_tph,
+               tonnage_t  AS total_tons,
+               energy_kwh AS total_kwh
+        FROM agg_daily
+        WHERE day = :d
         ORDER BY equipment_id
     """, {"d": day})
     if df.empty:
         return
     df["specific_energy_kwhpt"] = df["total_kwh"] / df["total_tons"].replace(0, pd.NA)
-    out = OUT / f"{day}_daily_summary.csv"
+    out = get_out_dir() / f"{day}_daily_summary.csv"
     df.to_csv(out, index=False)
     print("Saved:", out)
 
-def main(day: str = "2025-08-01", equipment_ids: list[str] | None = None):
+def _digest(df: pd.DataFrame) -> str:
+    data = pd.util.hash_pandas_object(df[["timestamp", "throughput_tph", "power_kw"]], index=False)
+    return hashlib.sha1(RENDER_VERSION.encode() + data.values.tobytes()).hexdigest()
+
+def _render(day: str, equipment_id: str, df: pd.DataFrame) -> str:
+    # rolling values are computed on the full series, only the plotted points are reduced
+    plot_throughput_power(downsample(df, ["throughput_tph", "power_kw"]), day, equipment_id)
+    plot_specific_energy(downsample(df, ["roll_spec_energy_kwhpt"]), day, equipment_id)
+    return equipment_id
+
+def main(day: str = "2025-08-01", equipment_ids: list[str] | None = None,
+         workers: int | None = 1, force: bool = False) -> list[str]:
+    """
+    Render both charts per equipment plus the daily summary; returns the
+    equipment that were (re-)rendered.
+
+    All timeseries for the day come from one query. With workers > 1 (None:
+    one per CPU) rendering fans out over a process pool. Charts whose input
+    data hash matches the last run's manifest are skipped unless force=True.
+    """
     if equipment_ids is None:
         eq = _read("SELECT equipment_id FROM dim_equipment ORDER BY equipment_id")
         equipment_ids = eq["equipment_id"].tolist()
 
+    out = get_out_dir()
+    manifest_path = out / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    series = fetch_timeseries_all(day)
+
+    todo = []
     for eid in equipment_ids:
-        ts = fetch_timeseries(day, eid)
-        plot_throughput_power(ts, day, eid)
-        plot_specific_energy(ts, day, eid)
+        ts = series.get(eid, pd.DataFrame())
+        if ts.empty:
+            print("No data to plot.")
+            continue
+        key, digest = f"{day}_{eid}", _digest(ts)
+        pngs = [out / f"{key}_throughput_power.png", out / f"{key}_specific_energy.png"]
+        if not force and manifest.get(key) == digest and all(p.exists() for p in pngs):
+            continue
+        manifest[key] = digest
+        todo.append((eid, ts))
+
+    if workers == 1 or len(todo) <= 1:
+        done = [_render(day, eid, ts) for eid, ts in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_render, [day] * len(todo), *zip(*todo)))
 
+    manifest_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
     save_daily_summary(day)
+    return done
+
+def cli(argv: list[str] | None = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Render per-equipment charts and the daily summary.")
+    ap.add_argument("day", nargs="?", default="2025-08-01")
+    ap.add_argument("--workers", type=int, default=None, help="render processes (default: one per CPU)")
+    ap.add_argument("--force", action="store_true", help="re-render charts even if their data is unchanged")
+    args = ap.parse_args(argv)
+    main(args.day, workers=args.workers, force=args.force)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import pandas as pd
+import pytest
 from src import etl, analytics
 
 def seed_and_load(tmp_path, monkeypatch):
@@ -46,3 +47,28 @@ def test_downtime_summary(tmp_path, monkeypatch):
     assert set(dt.columns) == {"equipment_id","events","total_downtime_min"}
     assert dt.loc[0,"events"] >= 1
     assert dt.loc[0,"total_downtime_min"] >= 30.0
+
+def test_kpis_range_frequencies(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    daily = analytics.kpis_range("2025-07-31", "2025-08-02", "D")
+    assert list(daily["period"]) == [pd.Timestamp("2025-08-01")]
+    assert daily.loc[0, "total_tonnage_t"] == analytics.daily_kpis("2025-08-01").loc[0, "total_tonnage_t"]
+
+    hourly = analytics.kpis_range("2025-08-01", "2025-08-01", "H")
+    assert list(hourly["period"]) == [pd.Timestamp("2025-08-01 00:00")]
+
+    # 00:xx belongs to the night shift that started 18:00 the previous day
+    shifts = analytics.kpis_range("2025-08-01", "2025-08-01", "shift")
+    assert list(shifts["period"]) == [pd.Timestamp("2025-07-31 18:00")]
+    assert shifts.loc[0, "utilization_pct"] == 100.0
+
+    assert analytics.kpis_range("2025-09-01", "2025-09-30").empty
+    with pytest.raises(ValueError):
+        analytics.kpis_range("2025-08-01", "2025-08-01", "W")
+
+def test_kpis_from_telemetry_matches_rollups(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    tele = analytics._read("SELECT equipment_id, throughput_tph, power_kw, status FROM fact_telemetry")
+    bench = analytics._read("SELECT * FROM benchmarks")
+    from_raw = analytics.kpis_from_telemetry(tele, bench)
+    pd.testing.assert_frame_equal(from_raw, analytics.daily_kpis("2025-08-01"), check_dtype=False)
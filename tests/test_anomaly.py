@@ -0,0 +1,51 @@
+import sqlite3
+import pandas as pd
+from src import anomaly, etl
+from src.generate_data import iter_telemetry
+from src.timekeys import add_time_keys
+from tests.test_analytics import seed_and_load
+
+def telemetry(n_equipment=2, days=2):
+    df = next(iter_telemetry(n_equipment=n_equipment, days=days))
+    add_time_keys(df)
+    return df.reset_index(drop=True)
+
+def no_state():
+    return pd.DataFrame(columns=anomaly.STATE_COLUMNS)
+
+def test_spike_is_flagged():
+    df = telemetry()
+    spike = df.index[(df["equipment_id"] == df["equipment_id"].iloc[0])][400]
+    df.loc[spike, "power_kw"] += 5000
+    flagged, state = anomaly.score(df, no_state())
+    hit = flagged[(flagged["measure"] == "power_kw") & (flagged["ts"] == df.loc[spike, "ts"])]
+    assert len(hit) == 1 and hit["zscore"].iloc[0] > anomaly.get_threshold()
+    assert len(state) == df["equipment_id"].nunique() * len(anomaly.MEASURES)
+    assert (state["n"] == len(df) // df["equipment_id"].nunique()).all()
+
+def test_batches_match_single_pass():
+    df = telemetry()
+    flagged, state = anomaly.score(df, no_state())
+    cut = df["ts"].quantile(0.3)
+    f1, s1 = anomaly.score(df[df["ts"] < cut], no_state())
+    f2, s2 = anomaly.score(df[df["ts"] >= cut], s1)
+    key = ["equipment_id", "measure"]
+    pd.testing.assert_frame_equal(s2.sort_values(key).reset_index(drop=True),
+                                  state.sort_values(key).reset_index(drop=True))
+    assert len(f1) + len(f2) == len(flagged)
+    # rows at or before the stored state are not scored again
+    f3, s3 = anomaly.score(df, s2)
+    assert f3.empty and s3.empty
+
+def test_etl_persists_state(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    with sqlite3.connect(db_file) as con:
+        state = anomaly.load_state(con)
+        assert len(state) == len(anomaly.MEASURES)
+        assert (state["n"] == 12).all()
+        assert con.execute("SELECT COUNT(*) FROM fact_anomaly").fetchone()[0] == 0
+        assert anomaly.catch_up(con) == 0
+    # a full reload starts the detector over instead of skipping every row
+    etl.load_all()
+    with sqlite3.connect(db_file) as con:
+        assert (anomaly.load_state(con)["n"] == 12).all()
@@ -0,0 +1,28 @@
+import pytest
+from src import bench
+
+def test_compare_flags_only_real_regressions():
+    base = [
+        {"size": "xs", "case": "etl.load_all", "wall_s": 1.0},
+        {"size": "xs", "case": "analytics.daily_kpis", "wall_s": 0.01},
+    ]
+    results = [
+        {"size": "xs", "case": "etl.load_all", "wall_s": 1.5},
+        {"size": "xs", "case": "analytics.daily_kpis", "wall_s": 0.03},  # +200% but only 20 ms
+        {"size": "s", "case": "etl.load_all", "wall_s": 9.0},            # no baseline entry
+    ]
+    msgs = bench.compare(results, base, threshold=0.25)
+    assert len(msgs) == 1 and msgs[0].startswith("xs etl.load_all")
+    assert bench.compare(results, base, threshold=0.6) == []
+
+def test_run_smallest_size():
+    res = bench.run(["xs"], ["etl.load_all", "analytics.daily_kpis"])
+    assert [r["case"] for r in res] == ["etl.load_all", "analytics.daily_kpis"]
+    for r in res:
+        assert r["rows"] > 0 and r["wall_s"] > 0 and r["peak_rss_mb"] > 0 and r["rows_per_s"] > 0
+
+def test_save_baseline_needs_a_file(monkeypatch, capsys):
+    monkeypatch.setattr(bench, "run", lambda *a: pytest.fail("ran before rejecting the arguments"))
+    with pytest.raises(SystemExit) as e:
+        bench.main(["--save-baseline"])
+    assert e.value.code == 2 and "--baseline" in capsys.readouterr().err
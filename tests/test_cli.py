@@ -0,0 +1,25 @@
+import subprocess, sys
+from pathlib import Path
+from src import __main__ as cli, bench
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+def test_top_level_help_imports_nothing_heavy():
+    out = _run("-X", "importtime", "-m", "src", "--help")
+    assert all(name in out.stdout for name in cli.COMMANDS)
+    imported = {line.split("|")[-1].strip().split(".")[0] for line in out.stderr.splitlines()}
+    assert not imported & {"pandas", "numpy", "matplotlib"}
+
+def test_subcommand_gets_its_own_arguments():
+    out = _run("-m", "src", "kpis", "--help")
+    assert out.stdout.startswith("usage: mining kpis") and "--freq" in out.stdout
+    out = _run("-X", "importtime", "-m", "src", "render", "--help")
+    assert "matplotlib" not in out.stderr
+
+def test_startup_records(capsys):
+    res = bench.startup(["", "bench"], repeat=1)
+    assert [r["case"] for r in res] == ["mining", "mining bench"]
+    assert all(r["size"] == "startup" and r["wall_s"] > 0 for r in res)
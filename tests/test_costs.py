@@ -0,0 +1,79 @@
+import sqlite3
+import pandas as pd
+import pytest
+from src import analytics, costs, etl, generate_data
+from tests.test_analytics import seed_and_load
+
+def test_daily_price_and_assay(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    c = analytics.cost_kpis("2025-08-01", "2025-08-01")
+    assert list(c.columns) == ["equipment_id", "period"] + analytics.COST_COLUMNS[1:]
+    # one hour at 360 tph / 1500 kW, priced at $57.25/MWh, BWI 14.8
+    row = c.iloc[0]
+    assert row["total_energy_kwh"] == pytest.approx(1500.0)
+    assert row["energy_cost_usd"] == pytest.approx(1500.0 * 57.25 / 1000)
+    assert row["cost_per_t_usd"] == pytest.approx(row["energy_cost_usd"] / 360.0)
+    assert row["cost_per_day_usd"] == pytest.approx(row["energy_cost_usd"] * 24)
+    assert row["bond_work_index_kwhpt"] == pytest.approx(14.8)
+    assert row["bwi_energy_ratio"] == pytest.approx(1500.0 / 360.0 / 14.8)
+
+def test_hourly_prices_asof(tmp_path, monkeypatch):
+    raw = generate_data.generate(tmp_path / "raw", n_equipment=2, days=2, price_freq="h")
+    monkeypatch.setenv("RT_DATA_DIR", str(raw))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "gen.db"))
+    etl.load_all()
+
+    # reference: every 5-minute sample priced at its own hour, no rollups
+    tele = pd.read_csv(raw / "telemetry.csv", parse_dates=["timestamp"])
+    prices = pd.read_csv(raw / "power_prices.csv", parse_dates=["date"])
+    tele = pd.merge_asof(tele.sort_values("timestamp"), prices, left_on="timestamp", right_on="date")
+    tele["usd"] = tele["power_kw"] * 5 / 60 * tele["usd_per_mwh"] / 1000
+    expect = tele.groupby([tele["equipment_id"], tele["timestamp"].dt.normalize()])["usd"].sum()
+
+    c = analytics.cost_kpis("2025-08-01", "2025-08-02").set_index(["equipment_id", "period"])
+    assert c["energy_cost_usd"].to_numpy() == pytest.approx(expect.to_numpy())
+    shifts = analytics.cost_kpis("2025-08-01", "2025-08-02", "shift")
+    assert shifts["energy_cost_usd"].sum() == pytest.approx(expect.sum())
+
+def test_incremental_load_costs_new_days_only(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    with sqlite3.connect(db_file) as con:
+        con.execute("UPDATE agg_cost_daily SET energy_cost_usd = -1")
+    rows = [{"timestamp": f"2025-08-02T01:{i:02d}:00", "equipment_id": "CR-01", "area": "Crusher", "throughput_tph": 300,
+             "power_kw": 1200, "temperature_c": 40, "pressure_kpa": 200, "status": 1} for i in range(12)]
+    pd.DataFrame(rows).to_csv(tmp_path / "raw" / "telemetry.csv", index=False)
+    etl.load_all(incremental=True)
+    c = analytics.cost_kpis("2025-08-01", "2025-08-02").set_index("period")["energy_cost_usd"]
+    # no price for 08-02 yet: the latest one (08-01) stays in effect
+    assert c[pd.Timestamp("2025-08-01")] == -1
+    assert c[pd.Timestamp("2025-08-02")] == pytest.approx(1200.0 * 57.25 / 1000)
+    with sqlite3.connect(db_file) as con:
+        costs.refresh(con)
+    assert analytics.cost_kpis("2025-08-01", "2025-08-01").loc[0, "energy_cost_usd"] > 0
+
+def test_incremental_load_recosts_from_a_changed_price(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    raw = tmp_path / "raw"
+    rows = [{"timestamp": f"2025-08-0{d}T01:{i:02d}:00", "equipment_id": "CR-01", "area": "Crusher", "throughput_tph": 300,
+             "power_kw": 1200, "temperature_c": 40, "pressure_kpa": 200, "status": 1} for d in (2, 3) for i in range(12)]
+    pd.DataFrame(rows[:12]).to_csv(raw / "telemetry.csv", index=False)
+    etl.load_all(incremental=True)
+    with sqlite3.connect(db_file) as con:
+        con.execute("UPDATE agg_cost_daily SET energy_cost_usd = -1")
+
+    # 08-03's telemetry arrives with a price for 08-02: 08-02 is re-costed, 08-01 is not
+    pd.DataFrame(rows[12:]).to_csv(raw / "telemetry.csv", index=False)
+    pd.DataFrame([{"date": "2025-08-01", "usd_per_mwh": 57.25}, {"date": "2025-08-02", "usd_per_mwh": 80}]) \
+        .to_csv(raw / "power_prices.csv", index=False)
+    etl.load_all(incremental=True)
+    c = analytics.cost_kpis("2025-08-01", "2025-08-03").set_index("period")["energy_cost_usd"]
+    assert c[pd.Timestamp("2025-08-01")] == -1
+    assert c[pd.Timestamp("2025-08-02")] == pytest.approx(1200.0 * 80 / 1000)
+    assert c[pd.Timestamp("2025-08-03")] == pytest.approx(1200.0 * 80 / 1000)
+
+    # a corrected first price also covers the hours before it: everything is re-costed
+    pd.DataFrame([{"date": "2025-08-01", "usd_per_mwh": 60}, {"date": "2025-08-02", "usd_per_mwh": 80}]) \
+        .to_csv(raw / "power_prices.csv", index=False)
+    etl.load_all(incremental=True)
+    c = analytics.cost_kpis("2025-08-01", "2025-08-01").loc[0, "energy_cost_usd"]
+    assert c == pytest.approx(1500.0 * 60 / 1000)
@@ -0,0 +1,50 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src import db
+
+def make_db(path, value):
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE t (v INTEGER)")
+        con.execute("INSERT INTO t VALUES (?)", (value,))
+    return path
+
+def test_read_follows_rt_db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(make_db(tmp_path / "a.db", 1)))
+    assert db.read("SELECT v FROM t").loc[0, "v"] == 1
+    monkeypatch.setenv("RT_DB_PATH", str(make_db(tmp_path / "b.db", 2)))
+    assert db.read("SELECT v FROM t").loc[0, "v"] == 2
+
+def test_pool_is_read_only_and_bounded(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(make_db(tmp_path / "a.db", 1)))
+    monkeypatch.setenv("RT_DB_POOL_SIZE", "2")
+    db.close_all()
+    with ThreadPoolExecutor(8) as ex:
+        results = list(ex.map(lambda i: db.read("SELECT v + :i AS v FROM t", {"i": i}).loc[0, "v"], range(50)))
+    assert results == [i + 1 for i in range(50)]
+    pool = db.get_pool()
+    assert pool._opened <= 2
+    with pool.connection() as con:
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with pytest.raises(sqlite3.OperationalError):
+            con.execute("INSERT INTO t VALUES (3)")
+    db.close_all()
+
+def test_pool_recovers_failed_connects_and_close(tmp_path, monkeypatch):
+    pool = db.ConnectionPool(make_db(tmp_path / "a.db", 1), size=1)
+    connect = pool._connect
+    monkeypatch.setattr(pool, "_connect", lambda: (_ for _ in ()).throw(sqlite3.OperationalError("unable to open")))
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection():
+            pass
+    # the failed connects gave their slot back; otherwise the next caller waits forever
+    assert pool._opened == 0
+    monkeypatch.setattr(pool, "_connect", connect)
+    with pool.connection() as con:
+        pool.close()  # while con is checked out
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute("SELECT 1")
+    with pool.connection() as a:
+        assert a is not con
+    assert pool._idle.qsize() == 1 and pool._opened == 1
+    pool.close()
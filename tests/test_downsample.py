@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import downsample as ds
+
+def series(n=10_000):
+    rng = np.random.default_rng(0)
+    y = np.sin(np.linspace(0, 20, n)) * 100 + rng.normal(0, 5, n)
+    y[1234], y[8765] = 900.0, -900.0  # a spike and a dip
+    return pd.DataFrame({"timestamp": pd.date_range("2025-08-01", periods=n, freq="5min"), "y": y})
+
+def test_lttb_keeps_endpoints_and_extremes():
+    df = series()
+    idx = ds.lttb(df["timestamp"].to_numpy(), df["y"].to_numpy(), 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == len(df) - 1
+    assert (np.diff(idx) > 0).all()
+    assert {1234, 8765} <= set(idx)
+
+def test_minmax_keeps_every_bucket_extreme():
+    df = series()
+    idx = ds.minmax(df["y"].to_numpy(), 200)
+    assert len(idx) <= 202 and {0, 1234, 8765, len(df) - 1} <= set(idx)
+
+def test_downsample_frame():
+    df = series()
+    df.loc[:20, "y"] = np.nan  # leading gap, as in a rolling column
+    out = ds.downsample(df, ["y"], 300)
+    assert len(out) == 300 and out["timestamp"].is_monotonic_increasing
+    assert len(ds.downsample(df.head(100), ["y"], 300)) == 100  # short series pass through
+    with pytest.raises(ValueError):
+        ds.downsample(df, ["y"], 300, method="avg")
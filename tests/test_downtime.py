@@ -0,0 +1,83 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from src import analytics, downtime, etl, generate_data
+from src.timekeys import to_epoch
+from tests.test_analytics import seed_and_load
+
+def events(*rows):
+    df = pd.DataFrame(rows, columns=["equipment_id", "start", "end"])
+    return df.assign(start_epoch=to_epoch(df.pop("start")), end_epoch=to_epoch(df.pop("end")))
+
+def test_merge_overlapping_and_touching():
+    ev = events(("CR-01", "2025-08-01 06:00", "2025-08-01 07:00"),
+                ("CR-01", "2025-08-01 06:30", "2025-08-01 06:45"),  # inside the first
+                ("CR-01", "2025-08-01 07:00", "2025-08-01 07:30"),  # touches it
+                ("CR-01", "2025-08-01 09:00", "2025-08-01 09:10"),
+                ("CR-02", "2025-08-01 06:10", "2025-08-01 06:20"))
+    m = downtime.merge(ev.sample(frac=1, random_state=1))
+    assert m["equipment_id"].tolist() == ["CR-01", "CR-01", "CR-02"]
+    assert ((m["end_epoch"] - m["start_epoch"]) // 60).tolist() == [90, 10, 10]
+    assert m["events"].tolist() == [3, 1, 1]
+
+def test_split_at_midnight_and_shifts():
+    ev = events(("CR-01", "2025-08-01 23:50", "2025-08-02 00:20"))
+    days = downtime.split(ev)
+    assert days["minutes"].tolist() == [10.0, 20.0]
+    assert pd.to_datetime(days["period"], unit="s").dt.day.tolist() == [1, 2]
+    # 12h shifts from 06:00: the whole stop is in the night shift
+    shifts = downtime.split(ev, 12 * 3600, 6 * 3600)
+    assert shifts["minutes"].tolist() == [30.0]
+
+def test_from_status_run_length():
+    ts = np.arange(10) * 300
+    tele = pd.DataFrame({"equipment_id": "CR-01", "ts": ts, "status": [1, 0, 0, 1, 0, 0, 0, 1, 0, 0]})
+    tele = tele.drop(index=9)  # a gap closes the last run
+    runs = downtime.from_status(tele)
+    assert runs[["start_epoch", "end_epoch", "samples"]].values.tolist() == [[300, 900, 2], [1200, 2100, 3], [2400, 2700, 1]]
+
+def test_index_query_and_lookup():
+    ev = events(("CR-01", "2025-08-01 06:00", "2025-08-01 07:00"),
+                ("CR-01", "2025-08-01 23:00", "2025-08-02 01:00"),
+                ("CR-02", "2025-08-02 02:00", "2025-08-02 03:00"))
+    idx = downtime.DowntimeIndex(ev)
+    t0, t1 = to_epoch(pd.Series(["2025-08-02", "2025-08-03"])).tolist()
+    q = idx.query(t0, t1)
+    assert q["equipment_id"].tolist() == ["CR-01", "CR-02"]
+    assert ((q["end_epoch"] - q["start_epoch"]) // 60).tolist() == [60, 60]
+    assert idx.is_down("CR-01", t0) and not idx.is_down("CR-01", t0 + 3600)
+    assert idx.intervals("CR-01").is_non_overlapping_monotonic
+
+def test_events_and_status_agree(tmp_path, monkeypatch):
+    # generated events overlap each other; merged, they are exactly the status == 0 runs
+    raw = generate_data.generate(tmp_path / "raw", n_equipment=3, days=2, downtime_rate=0.1, seed=5)
+    monkeypatch.setenv("RT_DATA_DIR", str(raw))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "gen.db"))
+    etl.load_all()
+    by_events = analytics.downtime_range("2025-08-01", "2025-08-02", source="events")
+    by_status = analytics.downtime_range("2025-08-01", "2025-08-02", source="status")
+    keys = ["equipment_id", "period"]
+    pd.testing.assert_series_equal(by_events.set_index(keys)["downtime_min"],
+                                   by_status.set_index(keys)["downtime_min"])
+    naive = pd.read_csv(raw / "downtime_events.csv")["duration_min"].sum()
+    assert by_events["downtime_min"].sum() <= naive
+
+def test_summary_splits_cross_midnight(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    raw = tmp_path / "raw"
+    pd.DataFrame([
+        {"equipment_id": "CR-01", "start_ts": "2025-08-01T23:30:00", "end_ts": "2025-08-02T00:30:00", "duration_min": 60.0, "reason": "Breakdown"},
+        {"equipment_id": "CR-01", "start_ts": "2025-08-01T23:45:00", "end_ts": "2025-08-02T00:15:00", "duration_min": 30.0, "reason": "Power trip"},
+    ]).to_csv(raw / "downtime_events.csv", index=False)
+    etl.load_all()
+    for day in ("2025-08-01", "2025-08-02"):
+        dt = analytics.downtime_summary(day)
+        assert list(dt.columns) == ["equipment_id", "events", "total_downtime_min"]
+        assert dt.loc[0, "events"] == 2 and dt.loc[0, "total_downtime_min"] == 30.0
+
+def test_overlap_query_uses_the_span_index(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    with sqlite3.connect(db_file) as con:
+        sql, params = downtime.events_query("2025-08-02")
+        plan = " ".join(r[-1] for r in con.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "USING INDEX ix_downtime_span" in plan
@@ -2,6 +2,7 @@ import os
 import sqlite3
 from pathlib import Path
 import pandas as pd
+import pytest
 from src import etl
 
 def write_csvs(base: Path):
@@ -56,7 +57,8 @@ def test_etl_end_to_end(tmp_path, monkeypatch):
         # tables exist & have rows
         cnt = lambda t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
         assert cnt("dim_equipment") == 1
-        assert cnt("fact_telemetry") == 3
+        # the duplicate is reported to DQ but the declared primary key keeps one copy
+        assert cnt("fact_telemetry") == 2
         assert cnt("fact_downtime") == 1
         assert cnt("fact_lab_assays") == 1
         assert cnt("fact_power_price") == 1
@@ -65,3 +67,126 @@ def test_etl_end_to_end(tmp_path, monkeypatch):
         # DQ should have 2 entries: one duplicate, one out_of_range
         dq_rows = cnt("data_quality")
         assert dq_rows >= 2
+
+def test_etl_incremental_upsert(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    db_file = tmp_path / "rt_test.db"
+    write_csvs(data_dir)
+    monkeypatch.setenv("RT_DATA_DIR", str(data_dir / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+    etl.load_all()
+
+    # next drop repeats an old row (changed) and adds two new ones
+    pd.DataFrame([
+        {"timestamp":"2025-08-01T00:00:00","equipment_id":"CR-01","area":"Crusher","throughput_tph":999,"power_kw":1600,"temperature_c":40,"pressure_kpa":200,"status":1},
+        {"timestamp":"2025-08-01T00:10:00","equipment_id":"CR-01","area":"Crusher","throughput_tph":390,"power_kw":1610,"temperature_c":41,"pressure_kpa":201,"status":1},
+        {"timestamp":"2025-08-01T00:15:00","equipment_id":"CR-01","area":"Crusher","throughput_tph":395,"power_kw":1620,"temperature_c":41,"pressure_kpa":202,"status":0},
+    ]).to_csv(data_dir/"raw"/"telemetry.csv", index=False)
+    etl.load_all(incremental=True)
+    etl.load_all(incremental=True)  # re-running the same drop is a no-op
+
+    with sqlite3.connect(db_file) as con:
+        rows = con.execute("SELECT timestamp, throughput_tph FROM fact_telemetry ORDER BY timestamp").fetchall()
+        # full load deduplicated on the key, then two new rows; the old row is untouched
+        assert [r[0] for r in rows] == ["2025-08-01 00:00:00", "2025-08-01 00:05:00",
+                                        "2025-08-01 00:10:00", "2025-08-01 00:15:00"]
+        assert rows[0][1] == 380
+        hw = con.execute("SELECT high_water_ts FROM etl_watermark WHERE equipment_id='CR-01'").fetchone()[0]
+        assert hw == "2025-08-01 00:15:00"
+
+def test_etl_incremental_first_load(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    db_file = tmp_path / "rt_test.db"
+    write_csvs(data_dir)
+    monkeypatch.setenv("RT_DATA_DIR", str(data_dir / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+
+    # no watermarks yet: every row is new, streamed or not
+    etl.load_all(incremental=True)
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 2
+    db_file.unlink()
+    etl.load_all(incremental=True, chunksize=1)
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 2
+
+    # a drop of equipment without a watermark of its own
+    pd.DataFrame([
+        {"timestamp":"2025-08-01T00:00:00","equipment_id":"SAG-01","area":"Mill","throughput_tph":900,"power_kw":8000,"temperature_c":50,"pressure_kpa":300,"status":1},
+        {"timestamp":"2025-08-01T00:05:00","equipment_id":"SAG-01","area":"Mill","throughput_tph":910,"power_kw":8100,"temperature_c":50,"pressure_kpa":300,"status":1},
+    ]).to_csv(data_dir/"raw"/"telemetry.csv", index=False)
+    etl.load_all(incremental=True)
+    with sqlite3.connect(db_file) as con:
+        counts = dict(con.execute("SELECT equipment_id, COUNT(*) FROM fact_telemetry GROUP BY equipment_id").fetchall())
+        assert counts == {"CR-01": 2, "SAG-01": 2}
+
+def test_etl_chunked_catches_cross_chunk_duplicates(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    db_file = tmp_path / "rt_test.db"
+    write_csvs(data_dir)
+    monkeypatch.setenv("RT_DATA_DIR", str(data_dir / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+
+    # chunks of one row: the duplicate sits two chunks after its twin
+    etl.load_all(chunksize=1)
+
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 2
+        checks = dict(con.execute("SELECT check_name, COUNT(*) FROM data_quality GROUP BY check_name").fetchall())
+        assert checks == {"duplicate_key": 1, "out_of_range": 1}
+
+def test_etl_chunked_first_chunk_is_atomic(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    db_file = tmp_path / "rt_test.db"
+    write_csvs(data_dir)
+    monkeypatch.setenv("RT_DATA_DIR", str(data_dir / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+    etl.load_all()
+
+    # the first chunk replaces the table and then fails: the old rows stay
+    def fail(con, df):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(etl.anomaly, "process", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        etl.load_all(chunksize=1)
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 2
+
+def test_full_load_keeps_declared_schema(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    db_file = tmp_path / "rt_test.db"
+    write_csvs(data_dir)
+    monkeypatch.setenv("RT_DATA_DIR", str(data_dir / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+    etl.load_all()
+    etl.load_all()  # a second full load replaces rather than appends
+
+    with sqlite3.connect(db_file) as con:
+        pk = [r[1] for r in sorted(con.execute("PRAGMA table_info(fact_telemetry)"), key=lambda r: r[5]) if r[5]]
+        assert pk == ["timestamp", "equipment_id"]
+        assert con.execute("PRAGMA foreign_key_list(fact_telemetry)").fetchone()[2] == "dim_equipment"
+        assert con.execute("SELECT COUNT(*), COUNT(load_ts) FROM fact_telemetry").fetchone() == (2, 2)
+        idx = {r[1] for r in con.execute("PRAGMA index_list(fact_telemetry)")}
+        assert {"ix_telemetry_equipment_ts", "ix_telemetry_day_equipment"} <= idx
+        # the duplicate keeps its last occurrence
+        assert con.execute("SELECT throughput_tph FROM fact_telemetry WHERE timestamp = '2025-08-01 00:00:00'").fetchall() == [(380.0,)]
+
+def test_migrate_adds_time_keys_and_indexes(tmp_path, monkeypatch):
+    db_file = tmp_path / "old.db"
+    monkeypatch.setenv("RT_DB_PATH", str(db_file))
+    # a database as written by the original to_sql-based ETL
+    with sqlite3.connect(db_file) as con:
+        pd.DataFrame([{"timestamp":"2025-08-01 00:05:00","equipment_id":"CR-01","area":"Crusher","throughput_tph":380.0,"power_kw":1600.0,"temperature_c":40.0,"pressure_kpa":200.0,"status":1}]).to_sql("fact_telemetry", con, index=False)
+        pd.DataFrame([{"equipment_id":"CR-01","start_ts":"2025-08-01T23:50:00","end_ts":"2025-08-02T00:20:00","duration_min":30.0,"reason":"Maintenance"}]).to_sql("fact_downtime", con, index=False)
+
+    etl.ensure_db()
+
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT ts, day FROM fact_telemetry").fetchone() == (1754006700, "2025-08-01")
+        assert con.execute("SELECT start_epoch, end_epoch, day FROM fact_downtime").fetchone() == (1754092200, 1754094000, "2025-08-01")
+        plan = " ".join(r[-1] for r in con.execute(
+            "EXPLAIN QUERY PLAN SELECT equipment_id, SUM(throughput_tph) FROM fact_telemetry WHERE day = '2025-08-01' GROUP BY equipment_id"))
+        assert "COVERING INDEX ix_telemetry_day_equipment" in plan
+        plan = " ".join(r[-1] for r in con.execute(
+            "EXPLAIN QUERY PLAN SELECT timestamp, power_kw FROM fact_telemetry WHERE equipment_id = 'CR-01' AND ts >= 0 AND ts < 1 ORDER BY ts"))
+        assert "COVERING INDEX ix_telemetry_equipment_ts" in plan
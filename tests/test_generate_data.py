@@ -0,0 +1,35 @@
+import sqlite3
+import pandas as pd
+from src import etl, generate_data
+
+def test_generate_scales_and_injects_faults(tmp_path, monkeypatch):
+    raw = generate_data.generate(tmp_path / "raw", n_equipment=5, days=2, cadence_min=10,
+                                 dup_rate=0.01, out_of_range_rate=0.01, downtime_rate=0.1,
+                                 seed=3, chunk_rows=100)
+    tele = pd.read_csv(raw / "telemetry.csv")
+    keys = tele[["timestamp", "equipment_id"]]
+    assert keys.drop_duplicates().shape[0] == 5 * 2 * 144
+    assert tele["equipment_id"].nunique() == 5
+    assert keys.duplicated().any()
+    assert (tele["throughput_tph"] < 0).any()
+
+    # downtime events and status == 0 describe the same stops
+    events = pd.read_csv(raw / "downtime_events.csv")
+    down_min = (tele.drop_duplicates(["timestamp", "equipment_id"])
+                    .query("status == 0").groupby("equipment_id").size() * 10)
+    assert (events.groupby("equipment_id")["duration_min"].sum() >= down_min.reindex(events["equipment_id"].unique())).all()
+
+    monkeypatch.setenv("RT_DATA_DIR", str(raw))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "gen.db"))
+    etl.load_all()
+    with sqlite3.connect(tmp_path / "gen.db") as con:
+        checks = dict(con.execute("SELECT check_name, COUNT(*) FROM data_quality GROUP BY check_name"))
+    assert checks["duplicate_key"] > 0 and checks["out_of_range"] > 0
+
+def test_default_is_the_original_sample(tmp_path):
+    raw = generate_data.generate(tmp_path)
+    tele = pd.read_csv(raw / "telemetry.csv")
+    assert len(tele) == 2 * 288
+    assert sorted(tele["equipment_id"].unique()) == ["CR-01", "SAG-01"]
+    assert (tele["status"] == 1).all()
+    assert len(pd.read_csv(raw / "downtime_events.csv")) == 1
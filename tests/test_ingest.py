@@ -0,0 +1,55 @@
+import sqlite3
+import pandas as pd
+from src import ingest
+from src.generate_data import iter_telemetry
+
+def write_site_files(raw, hours=3):
+    """One file per site per hour, as the sites drop them."""
+    tele = next(iter_telemetry(n_equipment=4, days=1))
+    tele = tele[tele["timestamp"] < pd.Timestamp("2025-08-01") + pd.Timedelta(hours=hours)]
+    tele["site"] = tele["equipment_id"].astype(str).str[-2:]
+    paths = []
+    for (site, hour), part in tele.groupby(["site", tele["timestamp"].dt.hour], observed=True):
+        path = raw / f"site={site}" / f"{hour:02d}.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part.drop(columns="site").to_csv(path, index=False, date_format="%Y-%m-%dT%H:%M:%S")
+        paths.append(path)
+    return paths, len(tele)
+
+def test_parallel_ingest_and_skip(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    paths, n = write_site_files(tmp_path / "in")
+    found = ingest.discover(str(tmp_path / "in" / "*" / "*.csv"))
+    assert found == sorted(p.resolve() for p in paths)
+
+    stats = ingest.ingest(found, workers=2)
+    assert stats == {"files": len(paths), "skipped": 0, "rows": n}
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == n
+        assert con.execute("SELECT SUM(intervals) FROM agg_daily").fetchone()[0] == n
+        assert con.execute("SELECT COUNT(*) FROM etl_ingested_file").fetchone()[0] == len(paths)
+
+    # a re-run skips everything; a copy under a new name is skipped by content
+    (tmp_path / "in" / "copy.csv").write_bytes(paths[0].read_bytes())
+    again = ingest.ingest(ingest.discover(str(tmp_path / "in" / "**" / "*.csv")), workers=1)
+    assert again == {"files": 0, "skipped": len(paths) + 1, "rows": 0}
+
+def test_manifest(tmp_path):
+    paths, _ = write_site_files(tmp_path / "in", hours=1)
+    manifest = tmp_path / "in" / "manifest.txt"
+    manifest.write_text("\n".join(str(p.relative_to(tmp_path / "in")) for p in paths[:1]))
+    assert ingest.discover(manifest=manifest) == [paths[0].resolve()]
+
+def test_duplicate_key_across_files_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    paths, n = write_site_files(tmp_path / "in", hours=1)
+    # a resend of one row in another file, with a changed reading
+    resent = pd.read_csv(paths[0]).iloc[[2]].reset_index(drop=True).assign(power_kw=1.0)
+    resent.to_csv(tmp_path / "in" / "resend.csv", index=False)
+    stats = ingest.ingest(paths + [tmp_path / "in" / "resend.csv"], workers=2)
+    assert stats["rows"] == n + 1
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == n
+        dups = con.execute("SELECT record_key FROM data_quality WHERE check_name = 'duplicate_key'").fetchall()
+    ts = resent.loc[0, "timestamp"].replace("T", " ")
+    assert dups == [(f"{ts}|{resent.loc[0, 'equipment_id']}",)]
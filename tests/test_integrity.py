@@ -20,4 +20,29 @@ def test_check_ranges():
     issues = check_ranges(df, {"throughput_tph": (0, 1000)})
     # Expect 2 offending rows
     assert len(issues) == 2
-    assert set(["_col","_lo","_hi","throughput_tph"]).issubset(set(issues.columns))
\ No newline at end of file
+    assert set(["_col","_lo","_hi","throughput_tph"]).issubset(set(issues.columns))
+
+def test_range_violations_bitmask():
+    from src.integrity import range_violations
+    df = pd.DataFrame({
+        "throughput_tph": [100, -5, 1200, None],
+        "power_kw": [10, 6000, 30, 40],
+    })
+    mask = range_violations(df, {"status": (0, 1), "throughput_tph": (0, 1000), "power_kw": (0, 5000)})
+    # bit 0 = status (absent), bit 1 = throughput, bit 2 = power; NaN never violates
+    assert mask.tolist() == [0, 0b110, 0b010, 0]
+
+def test_run_checks_telemetry():
+    from src.integrity import run_checks
+    df = pd.DataFrame({
+        "timestamp": ["t1", "t1", "t2"],
+        "equipment_id": ["E1", "E1", "E1"],
+        "throughput_tph": [100, 100, -1],
+        "status": [1, 1, 2],
+    })
+    dq = run_checks(df, "fact_telemetry")
+    assert sorted(zip(dq["check_name"], dq["record_key"], dq["severity"])) == [
+        ("duplicate_key", "t1|E1", "HIGH"),
+        ("out_of_range", "t2|E1", "MEDIUM"),
+    ]
+    assert (dq["table_name"] == "fact_telemetry").all()
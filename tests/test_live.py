@@ -0,0 +1,129 @@
+import asyncio, json, sqlite3, time, urllib.request
+import pytest
+from src import costs, db, etl, live, rollups
+
+def post(port, body):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/telemetry", data=body.encode(), method="POST")
+    with urllib.request.urlopen(req) as r:
+        return r.status, json.loads(r.read())
+
+def test_simulated_feed_is_written(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+
+    async def run():
+        svc = live.LiveIngest(batch_rows=100, flush_s=0.05)
+        await svc.start()
+        tcp, http = await live.start_servers(svc, port=0, http_port=0)
+        sent = await live.simulate(port=tcp.sockets[0].getsockname()[1], n_equipment=2,
+                                   start="2025-08-01", out_of_range_rate=0.01)
+        while svc.connections:
+            await asyncio.wait(set(svc.connections))
+        await asyncio.sleep(0.2)  # past the flush interval, so the feed is committed
+        # a late repeat of a stored row and a record without a key, over HTTP
+        body = "\n".join([
+            json.dumps({"timestamp": "2025-08-01T00:00:00", "equipment_id": "CR-01", "area": "Crusher",
+                        "throughput_tph": 400, "power_kw": 1500, "temperature_c": 40,
+                        "pressure_kpa": 200, "status": 1}),
+            json.dumps({"equipment_id": "CR-01"}),
+        ])
+        status, reply = await asyncio.to_thread(post, http.sockets[0].getsockname()[1], body)
+        for s in (tcp, http):
+            s.close()
+        await svc.close()
+        return sent, status, reply, svc.stats
+
+    sent, status, reply, stats = asyncio.run(run())
+    assert sent == 2 * 288
+    assert (status, reply) == (202, {"accepted": 1, "rejected": 1})
+    assert stats["rows"] == sent + 1 and stats["batches"] >= sent // 100
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        one = lambda sql: con.execute(sql).fetchone()[0]
+        assert one("SELECT COUNT(*) FROM fact_telemetry") == sent
+        assert one("SELECT SUM(intervals) FROM agg_daily") == sent
+        assert one("SELECT throughput_tph FROM fact_telemetry WHERE ts = 1754006400 AND equipment_id = 'CR-01'") == 400
+        checks = dict(con.execute("SELECT check_name, COUNT(*) FROM data_quality GROUP BY check_name").fetchall())
+        assert checks["duplicate_key"] == 1 and checks["out_of_range"] > 0
+        assert one("SELECT COUNT(*) FROM anomaly_state") == 2 * 4
+    db.close_all()
+    assert db.data_version() == stats["batches"]
+
+def test_backpressure_and_time_flush(monkeypatch):
+    batches, depth = [], []
+
+    async def run():
+        svc = live.LiveIngest(batch_rows=10, flush_s=0.05, queue_size=5)
+        def slow_write(records):
+            time.sleep(0.02)  # a writer slower than the producer
+            batches.append(len(records))
+            return len(records)
+        monkeypatch.setattr(svc, "write", slow_write)
+        await svc.start()
+        record = {"timestamp": "2025-08-01T00:00:00", "equipment_id": "CR-01", "area": "Crusher"}
+        for _ in range(40):
+            await svc.put(record)
+            depth.append(svc.queue.qsize())
+        assert not await svc.put({"equipment_id": "CR-01"})
+        # a lone record is flushed by the timer, not by batch size
+        await asyncio.sleep(0.2)
+        n = sum(batches)
+        await svc.put(record)
+        await asyncio.sleep(0.2)
+        assert sum(batches) == n + 1
+        await svc.close()
+        return svc.stats
+
+    stats = asyncio.run(run())
+    assert max(depth) <= 5
+    assert stats["blocked"] > 0 and stats["rejected"] == 1
+    assert sum(batches) == 41 and max(batches) <= 10
+
+def test_failed_batch_is_rolled_back_and_the_batcher_goes_on(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    bulk_load, calls = live.etl.bulk_load, []
+    def flaky(con, name, df, mode="replace"):
+        calls.append(len(df))
+        bulk_load(con, name, df, mode)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database or disk is full")
+    monkeypatch.setattr(live.etl, "bulk_load", flaky)
+
+    async def run():
+        svc = live.LiveIngest(batch_rows=2, flush_s=0.05, queue_size=2)
+        await svc.start()
+        for minute in range(0, 30, 5):
+            await svc.put({"timestamp": f"2025-08-01T00:{minute:02d}:00", "equipment_id": "CR-01",
+                           "area": "Crusher", "power_kw": 1500, "status": 1})
+        await svc.close()
+        return svc.stats
+
+    # a dead batcher would leave put() and close() waiting forever
+    stats = asyncio.run(asyncio.wait_for(run(), 10))
+    assert stats["failed"] == 1 and stats["dropped"] == 2
+    assert stats["batches"] == 2 and stats["rows"] == 4
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 4
+        assert con.execute("SELECT MIN(timestamp) FROM fact_telemetry").fetchone()[0] == "2025-08-01 00:10:00"
+
+def test_batches_refresh_only_their_hours(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.ensure_db()
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        con.execute("INSERT INTO fact_power_price VALUES ('2025-08-01', 55.0)")
+    svc = live.LiveIngest()
+    records = [{"timestamp": f"2025-08-01T{m // 60:02d}:{m % 60:02d}:00", "equipment_id": eid, "area": "Crusher",
+                "throughput_tph": 300 + m, "power_kw": 1500, "status": int(m % 20 > 0)}
+               for m in range(0, 180, 5) for eid in ("CR-01", "CR-02")]
+    capsys.readouterr()
+    for i in range(0, len(records), 7):
+        svc.write(records[i:i + 7])
+    svc._disconnect()
+    assert "refreshed" not in capsys.readouterr().out
+
+    tables = ("agg_hourly", "agg_daily", "agg_cost_hourly", "agg_cost_daily")
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        live_rows = {t: sorted(con.execute(f"SELECT * FROM {t}")) for t in tables}
+        rollups.refresh(con)
+        costs.refresh(con)
+        # hour by hour ends where a rebuild from scratch does
+        assert {t: sorted(con.execute(f"SELECT * FROM {t}")) for t in tables} == live_rows
+        assert len(live_rows["agg_hourly"]) == 6 and len(live_rows["agg_cost_daily"]) == 2
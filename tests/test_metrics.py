@@ -0,0 +1,70 @@
+import json, os, subprocess, sys
+from pathlib import Path
+import pytest
+from src import db, etl, metrics
+from tests.test_analytics import seed_and_load
+
+ROOT = Path(__file__).resolve().parent.parent
+
+@pytest.fixture(autouse=True)
+def _clear():
+    metrics.RECORDS.clear()
+    yield
+    metrics.RECORDS.clear()
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.delenv("RT_METRICS_FILE", raising=False)
+    with metrics.stage("x") as m:
+        m["rows"] = 1
+    assert not metrics.RECORDS and metrics.flush() is None
+
+def test_etl_and_reads_emit_json_lines(tmp_path, monkeypatch):
+    out = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv("RT_METRICS_FILE", str(out))
+    seed_and_load(tmp_path, monkeypatch)
+    recs = [json.loads(line) for line in out.read_text().splitlines()]
+    stages = {(r["stage"], r.get("table")) for r in recs}
+    for s in [("read_csv", "fact_telemetry"), ("dq_checks", "fact_telemetry"),
+              ("time_keys", "fact_telemetry"), ("write", "fact_telemetry"), ("load_all", None)]:
+        assert s in stages
+    read = next(r for r in recs if r["stage"] == "read_csv" and r["table"] == "fact_telemetry")
+    assert read["rows"] == 12 and read["bytes"] > 0 and read["seconds"] >= 0
+    assert "rss_delta_bytes" in read
+
+    db.read("SELECT * FROM agg_daily")
+    (rec,) = metrics.RECORDS
+    assert rec["stage"] == "read" and rec["table"] == "agg_daily" and rec["rows"] == 1
+
+def test_prometheus_textfile(tmp_path, monkeypatch):
+    out = tmp_path / "etl.prom"
+    monkeypatch.setenv("RT_METRICS_FILE", str(out))
+    for rows in (5, 7):
+        with metrics.stage("write", table="t") as m:
+            m["rows"] = rows
+    metrics.flush()
+    text = out.read_text()
+    assert 'rt_stage_calls_total{stage="write",table="t"} 2' in text
+    assert 'rt_stage_rows_total{stage="write",table="t"} 12' in text
+    assert "# TYPE rt_stage_duration_seconds_total counter" in text
+
+def test_profile_hook(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_PROFILE_DIR", str(tmp_path / "prof"))
+    with metrics.profiled("unit"):
+        sum(range(1000))
+    names = sorted(p.suffix for p in (tmp_path / "prof").iterdir())
+    assert names == [".prof", ".txt"]
+
+def test_reads_outside_the_etl_are_flushed(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    out = tmp_path / "reads.jsonl"
+    # a process that only reads, like the dashboard, and never calls flush()
+    script = f"from src import db; db.read('SELECT COUNT(*) FROM fact_telemetry')"
+    env = {**os.environ, "RT_DB_PATH": str(db_file), "RT_METRICS_FILE": str(out)}
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+    assert [json.loads(line)["stage"] for line in out.read_text().splitlines()] == ["read"]
+
+    # a long-running one flushes as stages complete
+    monkeypatch.setenv("RT_METRICS_FILE", str(out))
+    monkeypatch.setenv("RT_METRICS_FLUSH_S", "0")
+    db.read("SELECT COUNT(*) FROM fact_telemetry")
+    assert not metrics.RECORDS and len(out.read_text().splitlines()) == 2
@@ -0,0 +1,122 @@
+import os, uuid
+from contextlib import closing
+import pandas as pd
+import pytest
+from sqlalchemy.engine import make_url
+from src import analytics, db, etl, generate_data, ingest, postgres
+
+# Postgres runs against RT_TEST_PG_URL, or else a throwaway server started
+# with pgserver (in requirements.txt). A missing pgserver fails these tests;
+# RT_TEST_NO_PG=1 skips them where no server can run.
+
+@pytest.fixture(scope="module")
+def pg_server(tmp_path_factory):
+    url = os.getenv("RT_TEST_PG_URL")
+    if url:
+        return url
+    if os.getenv("RT_TEST_NO_PG"):
+        pytest.skip("RT_TEST_NO_PG is set")
+    import pgserver
+    return pgserver.get_server(tmp_path_factory.mktemp("pg"), cleanup_mode="stop").get_uri()
+
+@pytest.fixture
+def pg_url(pg_server, monkeypatch):
+    import psycopg
+    name = f"rt_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(pg_server, autocommit=True) as con:
+        con.execute(f"CREATE DATABASE {name}")
+    # the same server, another database
+    url = make_url(pg_server).set(database=name).render_as_string(hide_password=False)
+    monkeypatch.setenv("RT_DB_URL", url)
+    yield url
+    db.close_all()
+    with psycopg.connect(pg_server, autocommit=True) as con:
+        con.execute(f"DROP DATABASE {name} WITH (FORCE)")
+
+def test_translate():
+    sql = postgres.translate("INSERT OR IGNORE INTO temp.days VALUES (?)")
+    assert sql == "INSERT INTO pg_temp.days VALUES (%s) ON CONFLICT DO NOTHING"
+    sql = postgres.translate("SELECT ts - ts % 3600 FROM t WHERE day = :day AND x::int > 0")
+    assert sql == "SELECT ts - ts %% 3600 FROM t WHERE day = %(day)s AND x::int > 0"
+    sql = postgres.translate("INSERT OR REPLACE INTO t (a, b, c) VALUES (?, ?, ?)", lambda t: ["a"])
+    assert sql.endswith("ON CONFLICT (a) DO UPDATE SET b = EXCLUDED.b, c = EXCLUDED.c")
+    assert "GREATEST(t.hw, excluded.hw)" in postgres.translate("SET hw = max(t.hw, excluded.hw)")
+    assert "MAX(timestamp)" in postgres.translate("SELECT MAX(timestamp) FROM t")
+
+def test_sqlite_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_URL", f"sqlite:///{tmp_path / 'url.db'}")
+    assert db.get_db_path() == tmp_path / "url.db" and not db.is_postgres()
+    etl.ensure_db()
+    assert (tmp_path / "url.db").exists()
+
+def _reports(start, end):
+    return (analytics.kpis_range(start, end, "H"), analytics.cost_kpis(start, end, "shift"),
+            analytics.downtime_range(start, end), analytics.downtime_range(start, end, source="status"))
+
+def test_postgres_matches_sqlite(tmp_path, monkeypatch, pg_url):
+    # two days across a month boundary, so fact_telemetry gets two partitions
+    raw = generate_data.generate(tmp_path / "raw", n_equipment=3, days=2, start="2025-07-31",
+                                 out_of_range_rate=0.01, downtime_rate=0.05)
+    monkeypatch.setenv("RT_DATA_DIR", str(raw))
+    monkeypatch.delenv("RT_DB_URL")
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.load_all()
+    expect = _reports("2025-07-31", "2025-08-01")
+    db.close_all()
+
+    monkeypatch.setenv("RT_DB_URL", pg_url)
+    assert db.is_postgres()
+    etl.load_all(chunksize=500)
+    for got, want in zip(_reports("2025-07-31", "2025-08-01"), expect):
+        assert not want.empty
+        pd.testing.assert_frame_equal(got, want, check_dtype=False)
+    assert analytics.daily_kpis("2025-08-01").equals(analytics.kpis_range("2025-08-01", "2025-08-01")
+                                                     .drop(columns="period"))
+
+    with closing(db.connect()) as con, con:
+        parts = {r[0] for r in con.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid")}
+        assert {"fact_telemetry_2025_07", "fact_telemetry_2025_08"} <= parts
+        # a range on ts reads only its month
+        plan = "\n".join(r[0] for r in con.execute(
+            "EXPLAIN SELECT * FROM fact_telemetry WHERE ts >= ? AND ts < ?", (1754006400, 1754092800)))
+        assert "fact_telemetry_2025_08" in plan and "fact_telemetry_2025_07" not in plan
+        # and so do the readers, with and without an equipment filter
+        read, sent = db.read, []
+        monkeypatch.setattr(db, "read", lambda sql, params=(): sent.append((sql, params)) or read(sql, params))
+        assert len(db.read_telemetry(["equipment_id", "ts", "power_kw"], "2025-08-01")) == 3 * 288
+        db.read_telemetry(["equipment_id", "ts"], "2025-08-01", equipment_ids=["CR-01"])
+        for sql, params in sent:
+            plan = "\n".join(r[0] for r in con.execute("EXPLAIN " + sql, params))
+            assert "fact_telemetry_2025_08" in plan and "fact_telemetry_2025_07" not in plan
+        assert con.execute("SELECT COUNT(*) FROM data_quality").fetchone()[0] > 0
+    assert db.data_version() == 1
+
+def test_copy_upsert_and_ingest(tmp_path, monkeypatch, pg_url):
+    raw = generate_data.generate(tmp_path / "raw", n_equipment=2, days=1)
+    monkeypatch.setenv("RT_DATA_DIR", str(raw))
+    etl.load_all()
+    tele = pd.read_csv(raw / "telemetry.csv")
+    with closing(db.connect()) as con, con:
+        n = con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0]
+        assert n == len(tele)
+        # a repeated key keeps the last row, as INSERT OR REPLACE does
+        rows = db.query(con, "SELECT * FROM fact_telemetry ORDER BY ts LIMIT 1").drop(columns="load_ts")
+        rows = pd.concat([rows, rows.assign(power_kw=1.0)])
+        etl.bulk_load(con, "fact_telemetry", rows, "append")
+        assert con.execute("SELECT COUNT(*), MIN(power_kw) FROM fact_telemetry").fetchone() == (n, 1.0)
+
+    # the next day through the multi-file ingest: upserts, rollups and costs
+    nxt = generate_data.generate(tmp_path / "next", n_equipment=2, days=1, start="2025-08-02")
+    stats = ingest.ingest([nxt / "telemetry.csv"], workers=1)
+    assert stats["rows"] == len(tele)
+    kpis = analytics.kpis_range("2025-08-01", "2025-08-02")
+    assert len(kpis) == 4 and kpis["total_tonnage_t"].gt(0).all()
+    assert len(analytics.cost_kpis("2025-08-02", "2025-08-02")) == 2
+
+def test_loaders_close_their_connections(tmp_path, monkeypatch, pg_url):
+    monkeypatch.setenv("RT_DATA_DIR", str(generate_data.generate(tmp_path / "raw", n_equipment=1, days=1)))
+    connect, opened = postgres.connect, []
+    monkeypatch.setattr(postgres, "connect", lambda url: opened.append(connect(url)) or opened[-1])
+    etl.load_all()
+    assert len(opened) == 2 and all(c.con.closed for c in opened)
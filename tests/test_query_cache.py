@@ -0,0 +1,49 @@
+import sqlite3
+import time
+from src import db, etl
+from src.query_cache import QueryCache
+from tests.test_analytics import seed_and_load
+
+SQL = "SELECT equipment_id, tonnage_t FROM agg_daily WHERE day = :d"
+
+def test_lru_and_ttl():
+    calls = []
+    def reader(sql, params):
+        calls.append(params)
+        import pandas as pd
+        return pd.DataFrame({"x": [params["i"]]})
+    cache = QueryCache(maxsize=2, ttl=0.2, poll=60, reader=reader, version=lambda: 1)
+    for i in (1, 2, 1, 3):  # 3 evicts 2, the least recently used
+        cache.read("q", {"i": i})
+    assert len(cache) == 2 and len(calls) == 3
+    cache.read("q", {"i": 1})
+    assert len(calls) == 3
+    cache.read("q", {"i": 2})
+    assert len(calls) == 4
+    time.sleep(0.25)
+    cache.read("q", {"i": 2})
+    assert len(calls) == 5
+
+def test_etl_load_invalidates_and_prewarms(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    v1 = db.data_version()
+    assert v1 >= 1
+
+    warmed = []
+    cache = QueryCache(poll=0)
+    cache.set_prewarm(lambda c: warmed.append(c.read(SQL, {"d": "2025-08-01"})))
+    first = cache.read(SQL, {"d": "2025-08-01"})
+    first.loc[0, "tonnage_t"] = -1  # callers get copies
+    assert cache.read(SQL, {"d": "2025-08-01"}).loc[0, "tonnage_t"] > 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # a later load changes the data under the cache
+    with sqlite3.connect(tmp_path / "rt_test.db") as con:
+        con.execute("UPDATE agg_daily SET tonnage_t = 1")
+        etl.bump_data_version(con)
+    assert db.data_version() == v1 + 1
+    assert cache.read(SQL, {"d": "2025-08-01"}).loc[0, "tonnage_t"] == 1
+    deadline = time.time() + 5
+    while not warmed and time.time() < deadline:
+        time.sleep(0.01)
+    assert warmed and warmed[0].loc[0, "tonnage_t"] == 1
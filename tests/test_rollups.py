@@ -0,0 +1,35 @@
+import sqlite3
+import pandas as pd
+from src import etl, analytics
+from tests.test_analytics import seed_and_load
+
+def test_rollups_match_raw_telemetry(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    with sqlite3.connect(db_file) as con:
+        raw = con.execute("""
+            SELECT COUNT(*), SUM(status = 1), SUM(throughput_tph) * 5.0 / 60.0, SUM(power_kw) * 5.0 / 60.0
+            FROM fact_telemetry WHERE day = '2025-08-01'""").fetchone()
+        daily = con.execute("""
+            SELECT intervals, run_intervals, tonnage_t, energy_kwh
+            FROM agg_daily WHERE day = '2025-08-01'""").fetchone()
+        hourly = con.execute("SELECT COUNT(*), SUM(intervals) FROM agg_hourly").fetchone()
+    assert daily == raw
+    assert hourly == (1, 12)
+
+def test_incremental_load_refreshes_only_new_days(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    raw = tmp_path / "raw"
+    with sqlite3.connect(db_file) as con:
+        # tamper with the first day's rollup: an incremental run must leave it alone
+        con.execute("UPDATE agg_daily SET tonnage_t = -1 WHERE day = '2025-08-01'")
+
+    rows = [{"timestamp":f"2025-08-02T01:{i:02d}:00","equipment_id":"CR-01","area":"Crusher","throughput_tph":300,"power_kw":1200,"temperature_c":40,"pressure_kpa":200,"status":int(i < 6)} for i in range(12)]
+    pd.DataFrame(rows).to_csv(raw/"telemetry.csv", index=False)
+    etl.load_all(incremental=True)
+
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT tonnage_t FROM agg_daily WHERE day = '2025-08-01'").fetchone()[0] == -1
+    kpis = analytics.daily_kpis("2025-08-02")
+    assert kpis.loc[0, "utilization_pct"] == 50.0
+    assert kpis.loc[0, "total_tonnage_t"] == 300.0
+    assert kpis.loc[0, "avg_throughput_tph"] == 300.0
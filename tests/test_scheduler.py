@@ -0,0 +1,143 @@
+import sqlite3, threading
+import pandas as pd
+import pytest
+from src import costs, db, etl, scheduler
+from tests.test_etl_load import write_csvs
+
+Task = scheduler.Task
+
+def test_order_and_cycles():
+    tasks = [Task("c", None, deps=["b"]), Task("a", None), Task("b", None, deps=["a"]), Task("d", None)]
+    assert [t.name for t in scheduler.order(tasks)] == ["a", "b", "c", "d"]
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler.order([Task("a", None, deps=["b"]), Task("b", None, deps=["a"])])
+    with pytest.raises(ValueError, match="unknown"):
+        scheduler.order([Task("a", None, deps=["x"])])
+
+def test_parses_run_concurrently_and_writes_in_order(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.ensure_db()
+    # each parse waits for the other: this only finishes when both run at once
+    both = threading.Barrier(2, timeout=10)
+    written = []
+    def parse(v):
+        both.wait()
+        return v
+    tasks = [Task("b", lambda con, v, r: written.append((v, r["a"])), lambda: parse("b"), deps=["a"]),
+             Task("a", lambda con, v, r: written.append(v) or v.upper(), lambda: parse("a"))]
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert scheduler.run(con, tasks, key="k", workers=2) == {"a": "A", "b": None}
+    assert written == ["a", ("b", "A")]
+
+def test_failed_task_rolls_back_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.ensure_db()
+    calls = {"a": 0, "b": 0}
+    def write(name, fail=False):
+        def run(con, _, results):
+            calls[name] += 1
+            con.execute(f"CREATE TABLE {name} (x)")
+            con.execute(f"INSERT INTO {name} VALUES (1)")
+            if fail and calls[name] == 1:
+                raise RuntimeError("disk on fire")
+            return calls[name]
+        return run
+    tasks = [Task("a", write("a")), Task("b", write("b", fail=True), deps=["a"])]
+    con = sqlite3.connect(tmp_path / "rt.db")
+    with pytest.raises(RuntimeError):
+        scheduler.run(con, tasks, key="k")
+    # a is committed; b's table and row went with its transaction
+    tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "a" in tables and "b" not in tables
+    assert con.execute("SELECT status, error FROM etl_task WHERE task = 'b'").fetchone() == \
+        ("failed", "RuntimeError: disk on fire")
+    assert not scheduler.is_done(con, "k")
+
+    assert scheduler.run(con, tasks, key="k") == {"a": 1, "b": 2}
+    assert calls == {"a": 1, "b": 2} and scheduler.is_done(con, "k")
+    assert con.execute("SELECT COUNT(DISTINCT run_id) FROM etl_task").fetchone()[0] == 1
+    con.close()
+
+def test_schema_stays_in_the_task_transaction(tmp_path, monkeypatch):
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.ensure_db()
+    con = sqlite3.connect(tmp_path / "rt.db")
+    con.execute("DROP INDEX ix_agg_hourly_day")
+    con.commit()
+    def fail(con, *_):
+        etl.apply_schema(con)
+        raise RuntimeError("after the schema")
+    with pytest.raises(RuntimeError):
+        scheduler.run(con, [Task("schema", fail)], key="k")
+    # the rebuilt index went with the failed task
+    assert con.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'ix_agg_hourly_day'").fetchone()[0] == 0
+    con.close()
+
+def test_load_all_resumes_after_costs_failure(tmp_path, monkeypatch):
+    write_csvs(tmp_path / "data")
+    monkeypatch.setenv("RT_DATA_DIR", str(tmp_path / "data" / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    refresh = costs.refresh
+    def flaky(con, days=None):
+        monkeypatch.setattr(costs, "refresh", refresh)
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(costs, "refresh", flaky)
+    with pytest.raises(sqlite3.OperationalError):
+        etl.load_all()
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry").fetchone()[0] == 2
+        assert con.execute("SELECT COUNT(*) FROM agg_cost_hourly").fetchone()[0] == 0
+    assert db.data_version() == 0
+
+    loaded = []
+    monkeypatch.setattr(etl, "load_table", lambda con, name, df, *a: loaded.append(name))
+    etl.load_all()
+    assert loaded == []  # every table was already committed; only costs and schema ran
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        assert con.execute("SELECT COUNT(*) FROM agg_cost_hourly").fetchone()[0] > 0
+    assert db.data_version() == 1
+
+    # unchanged inputs: the scheduled load has nothing to do
+    etl.load_all(if_changed=True)
+    assert db.data_version() == 1
+
+def test_chunked_incremental_resume_refreshes_committed_days(tmp_path, monkeypatch):
+    write_csvs(tmp_path / "data")
+    monkeypatch.setenv("RT_DATA_DIR", str(tmp_path / "data" / "raw"))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "rt.db"))
+    etl.load_all()
+
+    # a new drop of one row per day, loaded in chunks of one; the second chunk fails
+    row = {"equipment_id": "CR-01", "area": "Crusher", "throughput_tph": 400, "power_kw": 1600,
+           "temperature_c": 40, "pressure_kpa": 200, "status": 1}
+    pd.DataFrame([{"timestamp": "2025-08-02T00:00:00", **row}, {"timestamp": "2025-08-03T00:00:00", **row}]) \
+        .to_csv(tmp_path / "data" / "raw" / "telemetry.csv", index=False)
+    process, calls = etl.anomaly.process, []
+    def flaky(con, df):
+        calls.append(len(df))
+        if len(calls) == 2:
+            raise sqlite3.OperationalError("database is locked")
+        return process(con, df)
+    monkeypatch.setattr(etl.anomaly, "process", flaky)
+    with pytest.raises(sqlite3.OperationalError):
+        etl.load_all(incremental=True, chunksize=1)
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        # the first chunk committed; its day waits for the rollups
+        assert con.execute("SELECT COUNT(*) FROM fact_telemetry WHERE day = '2025-08-02'").fetchone()[0] == 1
+        assert con.execute("SELECT day FROM etl_pending_day").fetchall() == [("2025-08-02",)]
+
+    etl.load_all(incremental=True, chunksize=1)
+    with sqlite3.connect(tmp_path / "rt.db") as con:
+        days = [r[0] for r in con.execute("SELECT day FROM agg_daily ORDER BY day")]
+        assert days == ["2025-08-01", "2025-08-02", "2025-08-03"]
+        assert con.execute("SELECT COUNT(*) FROM agg_cost_daily WHERE day = '2025-08-02'").fetchone()[0] == 1
+        assert con.execute("SELECT COUNT(*) FROM etl_pending_day").fetchone()[0] == 0
+
+def test_run_every():
+    calls = []
+    def job():
+        calls.append(len(calls))
+        if len(calls) == 2:
+            raise RuntimeError("flaky")
+    assert scheduler.run_every(0, job, runs=3) == 1
+    assert calls == [0, 1, 2]
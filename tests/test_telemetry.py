@@ -0,0 +1,70 @@
+import sqlite3
+import pandas as pd
+from src import db, etl, ingest, telemetry
+from src.generate_data import iter_telemetry
+from tests.test_analytics import seed_and_load
+
+def test_read_csv_compact_types(tmp_path):
+    df = next(iter_telemetry(n_equipment=6, days=1))
+    df.to_csv(tmp_path / "t.csv", index=False)
+    plain = pd.read_csv(tmp_path / "t.csv", parse_dates=["timestamp"])
+    typed = telemetry.read_csv(tmp_path / "t.csv")
+    assert isinstance(typed["equipment_id"].dtype, pd.CategoricalDtype)
+    assert typed["power_kw"].dtype == "float32" and typed["status"].dtype == "int8"
+    assert pd.api.types.is_datetime64_any_dtype(typed["timestamp"])
+    assert typed.memory_usage(deep=True).sum() * 2 < plain.memory_usage(deep=True).sum()
+    chunks = list(telemetry.read_csv(tmp_path / "t.csv", chunksize=500))
+    assert sum(map(len, chunks)) == len(df) and chunks[-1]["status"].dtype == "int8"
+
+def test_missing_status_stays_visible():
+    df = telemetry.compact(pd.DataFrame({"equipment_id": ["CR-01", "CR-01"], "status": [1, None]}))
+    assert df["status"].dtype == "Int8" and df["status"].isna().sum() == 1
+
+def test_invalid_status_is_reported_not_cast(tmp_path, monkeypatch):
+    df = telemetry.compact(pd.DataFrame({"status": [1, 1.5, 256, None]}))
+    assert df["status"].tolist()[:3] == [1, 1.5, 256]
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    raw = pd.read_csv(tmp_path / "raw" / "telemetry.csv")
+    raw["status"] = raw["status"].astype(float)
+    raw.loc[0, "status"], raw.loc[1, "status"] = 1.5, 256
+    raw.to_csv(tmp_path / "raw" / "telemetry.csv", index=False)
+    etl.load_all()
+    with sqlite3.connect(db_file) as con:
+        keys = {f"{ts}|{eid}" for ts, eid in raw.loc[:1, ["timestamp", "equipment_id"]].itertuples(index=False)}
+        flagged = {r[0] for r in con.execute("SELECT record_key FROM data_quality WHERE check_name = 'out_of_range'")}
+        assert {k.replace("T", " ") for k in keys} <= flagged
+        assert sorted(r[0] for r in con.execute("SELECT status FROM fact_telemetry WHERE status NOT IN (0, 1)")) == [1.5, 256]
+
+def test_reads_are_compact_and_stores_exact(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    tele = db.read_telemetry(["equipment_id", "ts", "power_kw", "status"], "2025-08-01")
+    assert isinstance(tele["equipment_id"].dtype, pd.CategoricalDtype)
+    assert tele["power_kw"].dtype == "float32" and tele["status"].dtype == "int8"
+    # the ETL path loads float64, so what reaches SQLite is the CSV's value
+    raw = pd.read_csv(tmp_path / "raw" / "telemetry.csv")
+    raw["power_kw"] = 1538.413
+    raw.to_csv(tmp_path / "raw" / "telemetry.csv", index=False)
+    etl.load_all()
+    with sqlite3.connect(db_file) as con:
+        assert con.execute("SELECT DISTINCT power_kw FROM fact_telemetry").fetchall() == [(1538.413,)]
+
+def test_missing_status_loads_as_null(tmp_path, monkeypatch):
+    db_file = seed_and_load(tmp_path, monkeypatch)
+    raw = pd.read_csv(tmp_path / "raw" / "telemetry.csv")
+    raw["status"] = raw["status"].astype(float)
+    raw.loc[3, "status"] = None
+    raw.to_csv(tmp_path / "raw" / "telemetry.csv", index=False)
+    missing = lambda: sqlite3.connect(db_file).execute(
+        "SELECT COUNT(*) FROM fact_telemetry WHERE status IS NULL").fetchone()[0]
+    for kwargs in ({}, {"chunksize": 5}):
+        etl.load_all(**kwargs)
+        assert missing() == 1
+    db_file.unlink()
+    etl.load_all(incremental=True)
+    assert missing() == 1
+
+    # a later file through ingest
+    late = raw.assign(timestamp=raw["timestamp"].str.replace("2025-08-01", "2025-08-02"))
+    late.to_csv(tmp_path / "late.csv", index=False)
+    ingest.ingest([tmp_path / "late.csv"], workers=1)
+    assert missing() == 2
@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+from src import etl, generate_data, visualize
+from tests.test_analytics import seed_and_load
+
+def test_main_renders_in_parallel_and_skips_unchanged(tmp_path, monkeypatch):
+    # two equipment, so workers=2 takes the process pool rather than the serial path
+    monkeypatch.setenv("RT_DATA_DIR", str(generate_data.generate(tmp_path / "raw", n_equipment=2)))
+    monkeypatch.setenv("RT_DB_PATH", str(tmp_path / "gen.db"))
+    etl.load_all()
+    out = tmp_path / "out"
+    monkeypatch.setenv("RT_OUT_DIR", str(out))
+    pools = []
+    class Pool(ProcessPoolExecutor):
+        def __init__(self, *a, **kw):
+            pools.append(kw.get("max_workers"))
+            super().__init__(*a, **kw)
+    monkeypatch.setattr(visualize, "ProcessPoolExecutor", Pool)
+
+    assert visualize.main("2025-08-01", workers=2) == ["CR-01", "SAG-01"]
+    assert pools == [2]
+    pngs = sorted(p.name for p in out.glob("*.png"))
+    assert pngs == [f"2025-08-01_{e}_{c}.png" for e in ("CR-01", "SAG-01")
+                    for c in ("specific_energy", "throughput_power")]
+    assert (out / "2025-08-01_daily_summary.csv").exists()
+
+    # same inputs: nothing to re-render, unless forced or a PNG went missing
+    assert visualize.main("2025-08-01", workers=2) == []
+    assert visualize.main("2025-08-01", force=True, workers=2) == ["CR-01", "SAG-01"]
+    (out / pngs[0]).unlink()
+    assert visualize.main("2025-08-01") == ["CR-01"]
+    assert len(pools) == 2
+
+def test_fetch_timeseries_all_matches_single_fetch(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    every = visualize.fetch_timeseries_all("2025-08-01")
+    one = visualize.fetch_timeseries("2025-08-01", "CR-01")
+    assert list(every) == ["CR-01"]
+    assert every["CR-01"].equals(one)
+
+def test_fetch_timeseries_max_points(tmp_path, monkeypatch):
+    seed_and_load(tmp_path, monkeypatch)
+    full = visualize.fetch_timeseries("2025-08-01", "CR-01")
+    small = visualize.fetch_timeseries("2025-08-01", "CR-01", max_points=5)
+    assert len(full) == 12 and 5 <= len(small) < 12
+    assert small["timestamp"].iloc[0] == full["timestamp"].iloc[0]
+    assert small["timestamp"].iloc[-1] == full["timestamp"].iloc[-1]